@@ -0,0 +1 @@
+"""Benchmarks and a local stand-in of the Pstryk API."""
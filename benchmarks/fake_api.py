@@ -0,0 +1,166 @@
+"""Local stand-in for the Pstryk /prices endpoint.
+
+Serves a synthetic price feed of configurable size and resolution, with
+optional latency, random server errors and ETag revalidation, so the API
+client and the coordinator can be exercised without the real service.
+
+Run it on its own with ``python -m benchmarks.fake_api --port 8080``.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import hashlib
+import json
+import math
+import random
+from dataclasses import dataclass
+from datetime import UTC, datetime, timedelta
+from typing import Any
+
+from aiohttp import web
+
+
+@dataclass
+class FakeApiConfig:
+    """Shape and behaviour of the fake feed."""
+
+    days: float = 2  # days of prices served, starting at today's UTC midnight
+    slot_minutes: int = 60  # resolution of the feed
+    latency: float = 0.0  # seconds added to every response
+    error_rate: float = 0.0  # share of requests answered with a 503
+    etag: bool = True  # send ETags and answer matching requests with a 304
+    seed: int = 0  # seed of the prices and of the errors
+
+
+class FakePstrykApi:
+    """aiohttp application serving ``GET /prices``."""
+
+    def __init__(self, config: FakeApiConfig) -> None:
+        """Initialize the fake with the prices of the first publication."""
+        self.config = config
+        self._rng = random.Random(config.seed)
+        self._runner: web.AppRunner | None = None
+        self.requests = 0
+        self.not_modified = 0
+        self.errors = 0
+        self.publications = 0
+        self._body = b""
+        self._etag = ""
+        self.publish()
+
+    def build_payload(self) -> dict[str, Any]:
+        """Return a /prices response for the configured days and resolution."""
+        start = datetime.now(UTC).replace(hour=0, minute=0, second=0, microsecond=0)
+        step = timedelta(minutes=self.config.slot_minutes)
+        count = int(self.config.days * 24 * 60 / self.config.slot_minutes)
+        prices = []
+        for index in range(count):
+            moment = start + index * step
+            hour = moment.hour + moment.minute / 60
+            # Two daily peaks plus noise, shifted by the publication number
+            price = (
+                0.45
+                + 0.15 * math.sin((hour - 7) * math.pi / 12)
+                + 0.05 * self._rng.random()
+                + 0.001 * self.publications
+            )
+            prices.append({"hour": moment.strftime("%Y-%m-%dT%H:%M:%SZ"), "price": round(price, 4)})
+        return {"prices": prices}
+
+    def publish(self) -> None:
+        """Replace the served prices, as the daily publication does."""
+        self._body = json.dumps(self.build_payload()).encode()
+        self._etag = f'"{hashlib.sha256(self._body).hexdigest()[:16]}"'
+        self.publications += 1
+
+    @property
+    def payload_bytes(self) -> int:
+        """Return the size of the served body."""
+        return len(self._body)
+
+    async def handle_prices(self, request: web.Request) -> web.Response:
+        """Answer a price request."""
+        self.requests += 1
+        if self.config.latency:
+            await asyncio.sleep(self.config.latency)
+        if self._rng.random() < self.config.error_rate:
+            self.errors += 1
+            return web.Response(status=503, text="Service unavailable")
+        if self.config.etag and request.headers.get("If-None-Match") == self._etag:
+            self.not_modified += 1
+            return web.Response(status=304, headers={"ETag": self._etag})
+
+        headers = {"ETag": self._etag} if self.config.etag else {}
+        return web.Response(body=self._body, content_type="application/json", headers=headers)
+
+    def make_app(self) -> web.Application:
+        """Return the aiohttp application."""
+        app = web.Application()
+        app.router.add_get("/prices", self.handle_prices)
+        return app
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> str:
+        """Start serving and return the base URL, port 0 picks a free one."""
+        self._runner = web.AppRunner(self.make_app())
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, host, port)
+        await site.start()
+        bound_port = site._server.sockets[0].getsockname()[1]
+        return f"http://{host}:{bound_port}"
+
+    async def stop(self) -> None:
+        """Stop serving."""
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+
+def add_arguments(parser: argparse.ArgumentParser) -> None:
+    """Add the options of the fake feed to a parser."""
+    parser.add_argument("--days", type=float, default=2, help="days of prices served")
+    parser.add_argument("--slot-minutes", type=int, default=60, help="feed resolution")
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds per response")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="share of 503 answers")
+    parser.add_argument("--no-etag", dest="etag", action="store_false", help="disable ETags")
+    parser.add_argument("--seed", type=int, default=0)
+
+
+def config_from_arguments(args: argparse.Namespace) -> FakeApiConfig:
+    """Return the feed configuration from parsed options."""
+    return FakeApiConfig(
+        days=args.days,
+        slot_minutes=args.slot_minutes,
+        latency=args.latency,
+        error_rate=args.error_rate,
+        etag=args.etag,
+        seed=args.seed,
+    )
+
+
+async def _serve(config: FakeApiConfig, host: str, port: int) -> None:
+    """Serve until interrupted."""
+    api = FakePstrykApi(config)
+    url = await api.start(host, port)
+    print(f"Serving {api.payload_bytes} bytes of prices at {url}/prices")
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await api.stop()
+
+
+def main() -> None:
+    """Run the fake from the command line."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    add_arguments(parser)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    args = parser.parse_args()
+    try:
+        asyncio.run(_serve(config_from_arguments(args), args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,284 @@
+"""Benchmarks of the price fetch, parse and refresh paths.
+
+Runs against the local stand-in of the Pstryk API and prints one JSON
+document, so results can be stored and compared between revisions:
+
+    python -m benchmarks.run --days 2 --slot-minutes 15 --output results.json
+
+Home Assistant must be importable, the coordinator benchmark boots a minimal
+instance in a temporary configuration directory.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from collections.abc import Awaitable, Callable, Iterator
+from contextlib import contextmanager
+from typing import Any
+
+import aiohttp
+from homeassistant import bootstrap, loader
+from homeassistant.config_entries import SOURCE_USER, ConfigEntry
+from homeassistant.const import EVENT_STATE_CHANGED
+from homeassistant.const import __version__ as HA_VERSION
+from homeassistant.core import Event, HomeAssistant, callback
+from homeassistant.helpers.aiohttp_client import async_get_clientsession
+from homeassistant.helpers.storage import Store
+
+from custom_components.pstryk_scheduler.api import PstrykApiClient
+from custom_components.pstryk_scheduler.const import CONF_API_KEY, DATA_CLIENTS, DOMAIN
+
+from .fake_api import FakeApiConfig, FakePstrykApi, add_arguments, config_from_arguments
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+API_KEY = "benchmark"
+
+
+def _summary(samples: list[float]) -> dict[str, float | int]:
+    """Return the distribution of timings in milliseconds."""
+    if not samples:
+        return {"count": 0}
+    ordered = sorted(samples)
+    return {
+        "count": len(ordered),
+        "mean_ms": statistics.fmean(ordered) * 1000,
+        "p50_ms": ordered[len(ordered) // 2] * 1000,
+        "p95_ms": ordered[min(int(len(ordered) * 0.95), len(ordered) - 1)] * 1000,
+        "max_ms": ordered[-1] * 1000,
+    }
+
+
+async def _timed(function: Callable[[], Awaitable[Any]]) -> float:
+    """Return the duration of an awaited call in seconds."""
+    start = time.perf_counter()
+    await function()
+    return time.perf_counter() - start
+
+
+@contextmanager
+def _peak_memory() -> Iterator[dict[str, int]]:
+    """Trace allocations, filling in the peak once the block is left."""
+    result: dict[str, int] = {}
+    tracemalloc.start()
+    try:
+        yield result
+    finally:
+        result["peak_bytes"] = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+
+@contextmanager
+def _count_store_saves() -> Iterator[dict[str, int]]:
+    """Count the Store saves made within the block."""
+    counts = {"saves": 0}
+    original = Store.async_save
+
+    async def counting_save(store: Store, data: Any) -> None:
+        counts["saves"] += 1
+        await original(store, data)
+
+    Store.async_save = counting_save
+    try:
+        yield counts
+    finally:
+        Store.async_save = original
+
+
+def bench_parse(api: FakePstrykApi, iterations: int) -> dict[str, Any]:
+    """Measure decoding and parsing of a full price payload."""
+    client = PstrykApiClient(API_KEY, None)
+    body = json.dumps(api.build_payload()).encode()
+    data = json.loads(body)
+    slots = len(data["prices"])
+
+    decode = []
+    parse = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        json.loads(body)
+        decode.append(time.perf_counter() - start)
+        start = time.perf_counter()
+        client.parse_prices(data)
+        parse.append(time.perf_counter() - start)
+
+    with _peak_memory() as memory:
+        client.parse_prices(json.loads(body))
+
+    return {
+        "slots": slots,
+        "payload_bytes": len(body),
+        "decode": _summary(decode),
+        "parse": _summary(parse),
+        "parse_slots_per_second": slots / statistics.fmean(parse),
+        "peak_memory_bytes": memory["peak_bytes"],
+    }
+
+
+async def bench_client(api: FakePstrykApi, url: str, fetches: int) -> dict[str, Any]:
+    """Measure a cold fetch followed by revalidating fetches."""
+    requests_before = api.requests
+    not_modified_before = api.not_modified
+    async with aiohttp.ClientSession() as session:
+        client = PstrykApiClient(API_KEY, session, base_url=url)
+        cold = await _timed(client.async_fetch_prices)
+        warm = []
+        failures = 0
+        for _ in range(fetches):
+            try:
+                warm.append(await _timed(client.async_fetch_prices))
+            except Exception:  # noqa: BLE001 - failures are part of the result
+                failures += 1
+
+    return {
+        "cold_ms": cold * 1000,
+        "revalidate": _summary(warm),
+        "failures": failures,
+        "requests": api.requests - requests_before,
+        "not_modified": api.not_modified - not_modified_before,
+    }
+
+
+async def _async_start_hass(config_dir: str) -> HomeAssistant:
+    """Boot a minimal Home Assistant with the integration available."""
+    os.makedirs(os.path.join(config_dir, "custom_components"))
+    os.symlink(
+        os.path.join(REPO_ROOT, "custom_components", DOMAIN),
+        os.path.join(config_dir, "custom_components", DOMAIN),
+    )
+    hass = HomeAssistant(config_dir)
+    hass.config.skip_pip = True
+    loader.async_setup(hass)
+    await bootstrap.async_from_config_dict({"homeassistant": {"time_zone": "UTC"}}, hass)
+    return hass
+
+
+async def bench_coordinator(
+    api: FakePstrykApi, url: str, refreshes: int, publish_every: int
+) -> dict[str, Any]:
+    """Measure refreshes through the coordinator, with the sensors listening.
+
+    Every ``publish_every`` refreshes the fake publishes new prices, the
+    others find the prices unchanged.
+    """
+    with tempfile.TemporaryDirectory() as config_dir:
+        hass = await _async_start_hass(config_dir)
+        try:
+            # Point the shared client of the key at the fake before setup
+            hass.data[DATA_CLIENTS] = {
+                API_KEY: PstrykApiClient(API_KEY, async_get_clientsession(hass), base_url=url)
+            }
+            entry = ConfigEntry(
+                version=2,
+                minor_version=1,
+                domain=DOMAIN,
+                title="Benchmark",
+                data={CONF_API_KEY: API_KEY},
+                source=SOURCE_USER,
+                options={},
+            )
+            with _count_store_saves() as setup_saves:
+                setup = time.perf_counter()
+                await hass.config_entries.async_add(entry)
+                await hass.async_block_till_done()
+                setup = time.perf_counter() - setup
+            coordinator = hass.data[DOMAIN][entry.entry_id]
+
+            state_writes = 0
+
+            @callback
+            def count_state_write(event: Event) -> None:
+                nonlocal state_writes
+                state_writes += 1
+
+            unsub = hass.bus.async_listen(EVENT_STATE_CHANGED, count_state_write)
+            changed: list[float] = []
+            unchanged: list[float] = []
+            writes = {"changed": [], "unchanged": []}
+
+            with _count_store_saves() as saves, _peak_memory() as memory:
+                for index in range(refreshes):
+                    publish = index % publish_every == 0
+                    if publish:
+                        api.publish()
+                    state_writes = 0
+                    duration = await _timed(coordinator.async_refresh)
+                    await hass.async_block_till_done()
+                    (changed if publish else unchanged).append(duration)
+                    writes["changed" if publish else "unchanged"].append(state_writes)
+            unsub()
+
+            return {
+                "setup_ms": setup * 1000,
+                "setup_store_saves": setup_saves["saves"],
+                "refresh_changed": _summary(changed),
+                "refresh_unchanged": _summary(unchanged),
+                "state_writes_per_changed_refresh": statistics.fmean(writes["changed"] or [0]),
+                "state_writes_per_unchanged_refresh": statistics.fmean(writes["unchanged"] or [0]),
+                "store_saves": saves["saves"],
+                "store_saves_per_refresh": saves["saves"] / refreshes,
+                "peak_memory_bytes": memory["peak_bytes"],
+                "last_update_success": coordinator.last_update_success,
+            }
+        finally:
+            await hass.async_stop(force=True)
+
+
+async def async_run(args: argparse.Namespace) -> dict[str, Any]:
+    """Run all benchmarks and return the results."""
+    config: FakeApiConfig = config_from_arguments(args)
+    api = FakePstrykApi(config)
+    url = await api.start()
+    try:
+        results = {
+            "parse": bench_parse(api, args.iterations),
+            "client": await bench_client(api, url, args.fetches),
+            "coordinator": await bench_coordinator(
+                api, url, args.refreshes, args.publish_every
+            ),
+        }
+    finally:
+        await api.stop()
+
+    return {
+        "environment": {
+            "python": platform.python_version(),
+            "homeassistant": HA_VERSION,
+            "platform": platform.platform(),
+            "time": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        },
+        "config": vars(config),
+        "results": results,
+    }
+
+
+def main() -> None:
+    """Run the benchmarks from the command line."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    add_arguments(parser)
+    parser.add_argument("--iterations", type=int, default=50, help="parse repetitions")
+    parser.add_argument("--fetches", type=int, default=20, help="client fetches after the first")
+    parser.add_argument("--refreshes", type=int, default=20, help="coordinator refreshes")
+    parser.add_argument(
+        "--publish-every", type=int, default=5, help="refreshes between new prices"
+    )
+    parser.add_argument("--output", help="file to write the JSON results to")
+    args = parser.parse_args()
+
+    report = json.dumps(asyncio.run(async_run(args)), indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            file.write(report + "\n")
+    else:
+        sys.stdout.write(report + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -2,55 +2,489 @@
 from __future__ import annotations
 
 import logging
-from datetime import timedelta
+from datetime import datetime, timedelta
+from typing import Any
 
+import homeassistant.helpers.config_validation as cv
+import voluptuous as vol
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.const import Platform
-from homeassistant.core import HomeAssistant, ServiceCall
+from homeassistant.const import ATTR_DEVICE_ID, WEEKDAYS, Platform
+from homeassistant.core import (
+    HomeAssistant,
+    ServiceCall,
+    ServiceResponse,
+    SupportsResponse,
+    callback,
+)
+from homeassistant.exceptions import ServiceValidationError
+from homeassistant.helpers import device_registry as dr
+from homeassistant.helpers import entity_registry as er
 from homeassistant.helpers.aiohttp_client import async_get_clientsession
-from homeassistant.helpers.update_coordinator import DataUpdateCoordinator
+from homeassistant.helpers.storage import Store
 
-from .const import DOMAIN, CONF_API_KEY
 from .api import PstrykApiClient
+from .archive import PriceArchive, archive_path
+from .const import (
+    ATTR_ABOVE,
+    ATTR_AFTER,
+    ATTR_AUTO,
+    ATTR_BEFORE,
+    ATTR_BELOW,
+    ATTR_CAPACITY,
+    ATTR_CHARGE_RATE,
+    ATTR_CONFIG_ENTRY_ID,
+    ATTR_COUNT,
+    ATTR_DEADLINE,
+    ATTR_DISCHARGE_RATE,
+    ATTR_DURATION,
+    ATTR_EFFICIENCY,
+    ATTR_END,
+    ATTR_ENTRIES,
+    ATTR_HOUR,
+    ATTR_HOURS,
+    ATTR_MODE,
+    ATTR_QUERY,
+    ATTR_RULE_ID,
+    ATTR_SOC,
+    ATTR_START,
+    ATTR_STRATEGY,
+    ATTR_WEEKDAY,
+    BULK_SCHEDULE_MAX_RANGE,
+    BULK_SCHEDULE_MAX_SLOTS,
+    CONF_API_KEY,
+    DATA_CLIENTS,
+    DEFAULT_BATTERY_EFFICIENCY,
+    DEFAULT_SCAN_INTERVAL,
+    DOMAIN,
+    LEGACY_DEVICE_ID,
+    MIN_SLOT_LENGTH,
+    MODE_ACTION_OPTIONS,
+    MODE_BUY_CHARGE_CAR,
+    MODES,
+    PRICE_HISTORY_MAX_RANGE,
+    QUERY_AVERAGE,
+    QUERY_CHEAPEST,
+    QUERY_CHEAPEST_WINDOW,
+    QUERY_EXPENSIVE,
+    QUERY_EXPENSIVE_WINDOW,
+    SCHEDULE_MAX_RULES,
+    SERVICE_ADD_RULE,
+    SERVICE_CLEAR_SCHEDULE,
+    SERVICE_CLEAR_SCHEDULE_BULK,
+    SERVICE_GET_COSTS,
+    SERVICE_GET_PRICE_HISTORY,
+    SERVICE_GET_PRICES,
+    SERVICE_GET_SCHEDULE,
+    SERVICE_PLAN,
+    SERVICE_QUERY_PRICES,
+    SERVICE_REMOVE_RULE,
+    SERVICE_SET_SCHEDULE,
+    SERVICE_SET_SCHEDULE_BULK,
+    STORAGE_KEY,
+    STORAGE_KEY_ACCOUNTING,
+    STORAGE_KEY_PRICES,
+    STORAGE_VERSION,
+    STRATEGY_BATTERY,
+    STRATEGY_CHEAPEST,
+)
 from .coordinator import PstrykDataUpdateCoordinator
+from .executor import PstrykModeExecutor
+from .prices import floor_to_slot, parse_timestamp, slot_key
+from .websocket_api import async_register_websocket_commands
 
 _LOGGER = logging.getLogger(__name__)
 
-PLATFORMS: list[Platform] = [Platform.SENSOR]
+PLATFORMS: list[Platform] = [Platform.BINARY_SENSOR, Platform.CALENDAR, Platform.SENSOR]
+
+
+# Every service may name the entry or device it acts on, which is optional
+# while a single entry is loaded
+TARGET_FIELDS = {
+    vol.Optional(ATTR_CONFIG_ENTRY_ID): cv.string,
+    vol.Optional(ATTR_DEVICE_ID): cv.string,
+}
+
+
+def _hour_key(value: Any) -> str:
+    """Validate a slot start and normalise it to the schedule key format.
+
+    Times without an offset are UTC, like the keys of the price data. An
+    entry on a full hour covers the whole hour when slots are shorter.
+    """
+    try:
+        hour = parse_timestamp(str(value))
+    except ValueError as err:
+        raise vol.Invalid(f"Invalid hour: {value}") from err
+    return slot_key(floor_to_slot(hour, int(MIN_SLOT_LENGTH.total_seconds())))
+
+
+def _validate_range(data: dict[str, Any]) -> None:
+    """Check the start (inclusive) and end (exclusive) of a bulk call.
+
+    The range is expanded into slots when the call is handled, as the slot
+    length follows the price feed.
+    """
+    start = parse_timestamp(data[ATTR_START])
+    end = parse_timestamp(data[ATTR_END])
+    if end <= start:
+        raise vol.Invalid("End must be after start")
+    if end - start > BULK_SCHEDULE_MAX_RANGE:
+        raise vol.Invalid(f"Range is longer than {BULK_SCHEDULE_MAX_RANGE.days} days")
+
+
+def _validate_bulk(data: dict[str, Any], items: str, needs_mode: bool) -> dict[str, Any]:
+    """Require either a list of items or a complete start/end range."""
+    has_range = ATTR_START in data or ATTR_END in data
+    if (items in data) == has_range:
+        raise vol.Invalid(f"Provide either {items} or start and end")
+    if has_range:
+        if ATTR_START not in data or ATTR_END not in data:
+            raise vol.Invalid("Both start and end are required for a range")
+        if needs_mode and ATTR_MODE not in data:
+            raise vol.Invalid("Mode is required for a range")
+        _validate_range(data)
+    elif len(data[items]) > BULK_SCHEDULE_MAX_SLOTS:
+        raise vol.Invalid(f"More than {BULK_SCHEDULE_MAX_SLOTS} {items} given")
+    return data
+
+
+TARGET_SCHEMA = vol.Schema(TARGET_FIELDS)
+
+SET_SCHEDULE_SCHEMA = vol.Schema(
+    {
+        **TARGET_FIELDS,
+        vol.Required(ATTR_HOUR): _hour_key,
+        vol.Required(ATTR_MODE): vol.In(MODES),
+    }
+)
+
+CLEAR_SCHEDULE_SCHEMA = vol.Schema(
+    {
+        **TARGET_FIELDS,
+        vol.Required(ATTR_HOUR): _hour_key,
+    }
+)
+
+BULK_ENTRY_SCHEMA = vol.Schema(
+    {
+        vol.Required(ATTR_HOUR): _hour_key,
+        vol.Required(ATTR_MODE): vol.In(MODES),
+    }
+)
+
+SET_SCHEDULE_BULK_SCHEMA = vol.All(
+    vol.Schema(
+        {
+            **TARGET_FIELDS,
+            vol.Optional(ATTR_ENTRIES): vol.All(cv.ensure_list, [BULK_ENTRY_SCHEMA]),
+            vol.Optional(ATTR_START): _hour_key,
+            vol.Optional(ATTR_END): _hour_key,
+            vol.Optional(ATTR_MODE): vol.In(MODES),
+        }
+    ),
+    lambda data: _validate_bulk(data, ATTR_ENTRIES, needs_mode=True),
+)
+
+CLEAR_SCHEDULE_BULK_SCHEMA = vol.All(
+    vol.Schema(
+        {
+            **TARGET_FIELDS,
+            vol.Optional(ATTR_HOURS): vol.All(cv.ensure_list, [_hour_key]),
+            vol.Optional(ATTR_START): _hour_key,
+            vol.Optional(ATTR_END): _hour_key,
+        }
+    ),
+    lambda data: _validate_bulk(data, ATTR_HOURS, needs_mode=False),
+)
+
+
+def _validate_rule(data: dict[str, Any]) -> dict[str, Any]:
+    """Check that the window and the thresholds of a rule can match."""
+    if ATTR_AFTER in data and data[ATTR_AFTER] == data.get(ATTR_BEFORE):
+        raise vol.Invalid("After and before must differ")
+    if ATTR_ABOVE in data and ATTR_BELOW in data and data[ATTR_ABOVE] >= data[ATTR_BELOW]:
+        raise vol.Invalid("Above must be lower than below")
+    return data
+
+
+# A rule matches the slots starting on its weekdays between after and
+# before (local times, past midnight when before is earlier), and only
+# while the slot price is above or below the thresholds given
+ADD_RULE_SCHEMA = vol.All(
+    vol.Schema(
+        {
+            **TARGET_FIELDS,
+            vol.Required(ATTR_MODE): vol.In(MODES),
+            vol.Optional(ATTR_WEEKDAY): vol.All(cv.ensure_list, [vol.In(WEEKDAYS)]),
+            vol.Optional(ATTR_AFTER): cv.time,
+            vol.Optional(ATTR_BEFORE): cv.time,
+            vol.Optional(ATTR_ABOVE): vol.Coerce(float),
+            vol.Optional(ATTR_BELOW): vol.Coerce(float),
+        }
+    ),
+    _validate_rule,
+)
+
+REMOVE_RULE_SCHEMA = vol.Schema(
+    {
+        **TARGET_FIELDS,
+        vol.Required(ATTR_RULE_ID): cv.string,
+    }
+)
+
+
+def _validate_history_range(data: dict[str, Any]) -> dict[str, Any]:
+    """Check the start (inclusive) and end (exclusive) of a history query."""
+    if data[ATTR_END] <= data[ATTR_START]:
+        raise vol.Invalid("End must be after start")
+    if data[ATTR_END] - data[ATTR_START] > PRICE_HISTORY_MAX_RANGE:
+        raise vol.Invalid(f"Range is longer than {PRICE_HISTORY_MAX_RANGE.days} days")
+    return data
+
+
+def _timestamp(value: Any) -> datetime:
+    """Validate a moment given as an ISO timestamp, UTC unless an offset is given."""
+    try:
+        return parse_timestamp(str(value))
+    except ValueError as err:
+        raise vol.Invalid(f"Invalid time: {value}") from err
+
+
+GET_PRICE_HISTORY_SCHEMA = vol.All(
+    vol.Schema(
+        {
+            **TARGET_FIELDS,
+            vol.Required(ATTR_START): _timestamp,
+            vol.Required(ATTR_END): _timestamp,
+        }
+    ),
+    _validate_history_range,
+)
+
+
+def _validate_query_range(data: dict[str, Any]) -> dict[str, Any]:
+    """Require the end of a price query to come after its start."""
+    if ATTR_START in data and ATTR_END in data and data[ATTR_END] <= data[ATTR_START]:
+        raise vol.Invalid("End must be after start")
+    return data
+
+
+# The window of a query, from the current slot to the end of the known
+# prices unless given
+QUERY_RANGE_FIELDS = {
+    **TARGET_FIELDS,
+    vol.Optional(ATTR_START): _timestamp,
+    vol.Exclusive(ATTR_END, "end"): _timestamp,
+    vol.Exclusive(ATTR_DEADLINE, "end"): cv.time,
+}
+
+QUERY_WINDOW_SCHEMA = vol.Schema(
+    {
+        **QUERY_RANGE_FIELDS,
+        vol.Required(ATTR_QUERY): vol.In([QUERY_CHEAPEST_WINDOW, QUERY_EXPENSIVE_WINDOW]),
+        vol.Required(ATTR_DURATION): vol.All(
+            cv.positive_time_period, vol.Range(max=BULK_SCHEDULE_MAX_RANGE)
+        ),
+    }
+)
+
+QUERY_TOP_SCHEMA = vol.Schema(
+    {
+        **QUERY_RANGE_FIELDS,
+        vol.Required(ATTR_QUERY): vol.In([QUERY_CHEAPEST, QUERY_EXPENSIVE]),
+        vol.Required(ATTR_COUNT): vol.All(
+            vol.Coerce(int), vol.Range(min=1, max=BULK_SCHEDULE_MAX_SLOTS)
+        ),
+    }
+)
+
+QUERY_PRICES_SCHEMA = vol.All(
+    cv.key_value_schemas(
+        ATTR_QUERY,
+        {
+            QUERY_CHEAPEST_WINDOW: QUERY_WINDOW_SCHEMA,
+            QUERY_EXPENSIVE_WINDOW: QUERY_WINDOW_SCHEMA,
+            QUERY_AVERAGE: vol.Schema(
+                {**QUERY_RANGE_FIELDS, vol.Required(ATTR_QUERY): QUERY_AVERAGE}
+            ),
+            QUERY_CHEAPEST: QUERY_TOP_SCHEMA,
+            QUERY_EXPENSIVE: QUERY_TOP_SCHEMA,
+        },
+    ),
+    _validate_query_range,
+)
+
+
+GET_COSTS_SCHEMA = vol.All(
+    vol.Schema(
+        {
+            **TARGET_FIELDS,
+            vol.Optional(ATTR_START): _timestamp,
+            vol.Optional(ATTR_END): _timestamp,
+        }
+    ),
+    _validate_query_range,
+)
+
+
+def _validate_soc(data: dict[str, Any]) -> dict[str, Any]:
+    """Require the starting charge to fit in the battery."""
+    if data[ATTR_SOC] > data[ATTR_CAPACITY]:
+        raise vol.Invalid("State of charge exceeds the capacity")
+    return data
+
+
+PLAN_SCHEMA = cv.key_value_schemas(
+    ATTR_STRATEGY,
+    {
+        STRATEGY_CHEAPEST: vol.Schema(
+            {
+                **TARGET_FIELDS,
+                vol.Required(ATTR_STRATEGY): STRATEGY_CHEAPEST,
+                vol.Required(ATTR_COUNT): vol.All(
+                    vol.Coerce(int), vol.Range(min=1, max=BULK_SCHEDULE_MAX_SLOTS)
+                ),
+                vol.Optional(ATTR_DEADLINE): cv.time,
+                vol.Optional(ATTR_MODE, default=MODE_BUY_CHARGE_CAR): vol.In(MODES),
+                vol.Optional(ATTR_AUTO, default=False): cv.boolean,
+            }
+        ),
+        STRATEGY_BATTERY: vol.All(
+            vol.Schema(
+                {
+                    **TARGET_FIELDS,
+                    vol.Required(ATTR_STRATEGY): STRATEGY_BATTERY,
+                    vol.Required(ATTR_CAPACITY): vol.All(
+                        vol.Coerce(float), vol.Range(min=0, min_included=False)
+                    ),
+                    vol.Required(ATTR_CHARGE_RATE): vol.All(
+                        vol.Coerce(float), vol.Range(min=0)
+                    ),
+                    vol.Required(ATTR_DISCHARGE_RATE): vol.All(
+                        vol.Coerce(float), vol.Range(min=0)
+                    ),
+                    vol.Optional(
+                        ATTR_EFFICIENCY, default=DEFAULT_BATTERY_EFFICIENCY
+                    ): vol.All(vol.Coerce(float), vol.Range(min=0, max=1, min_included=False)),
+                    vol.Optional(ATTR_SOC, default=0.0): vol.All(
+                        vol.Coerce(float), vol.Range(min=0)
+                    ),
+                    vol.Optional(ATTR_DEADLINE): cv.time,
+                    vol.Optional(ATTR_AUTO, default=False): cv.boolean,
+                }
+            ),
+            _validate_soc,
+        ),
+    },
+)
 
 
 async def async_setup(hass: HomeAssistant, config: dict) -> bool:
     """Set up the Pstryk Energy Scheduler component."""
     hass.data.setdefault(DOMAIN, {})
+    hass.data.setdefault(DATA_CLIENTS, {})
+    async_register_websocket_commands(hass)
+    async_setup_services(hass)
+    return True
+
+
+async def async_migrate_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
+    """Migrate an entry set up before several entries were supported."""
+    if entry.version == 1:
+        # Entity ids, the device and the stored schedule were global
+        @callback
+        def _migrate_unique_id(entity: er.RegistryEntry) -> dict[str, Any] | None:
+            legacy_prefix = f"{DOMAIN}_"
+            if not entity.unique_id.startswith(legacy_prefix):
+                return None
+            return {
+                "new_unique_id": f"{entry.entry_id}_{entity.unique_id[len(legacy_prefix):]}"
+            }
+
+        await er.async_migrate_entries(hass, entry.entry_id, _migrate_unique_id)
+
+        device_registry = dr.async_get(hass)
+        device = device_registry.async_get_device(identifiers={(DOMAIN, LEGACY_DEVICE_ID)})
+        if device is not None and entry.entry_id in device.config_entries:
+            device_registry.async_update_device(
+                device.id, new_identifiers={(DOMAIN, entry.entry_id)}
+            )
+
+        legacy_store = Store(hass, STORAGE_VERSION, STORAGE_KEY)
+        if (data := await legacy_store.async_load()) is not None:
+            await Store(hass, STORAGE_VERSION, f"{STORAGE_KEY}.{entry.entry_id}").async_save(data)
+            await legacy_store.async_remove()
+
+        hass.config_entries.async_update_entry(entry, version=2)
+        _LOGGER.debug("Migrated entry %s to version 2", entry.entry_id)
+
     return True
 
 
+@callback
+def _async_get_client(hass: HomeAssistant, api_key: str) -> PstrykApiClient:
+    """Return the API client of a key, shared by all entries using it."""
+    clients: dict[str, PstrykApiClient] = hass.data[DATA_CLIENTS]
+    if api_key not in clients:
+        clients[api_key] = PstrykApiClient(api_key, async_get_clientsession(hass))
+    return clients[api_key]
+
+
 async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Set up Pstryk Energy Scheduler from a config entry."""
     api_key = entry.data.get(CONF_API_KEY)
 
-    session = async_get_clientsession(hass)
-    api_client = PstrykApiClient(api_key, session)
+    # Entries sharing a key share the client, and with it its cache and
+    # in-flight requests
+    api_client = _async_get_client(hass, api_key)
 
-    # Create data update coordinator
+    # Create data update coordinator, the fetch interval is adjusted to
+    # the price publication schedule after every refresh
     coordinator = PstrykDataUpdateCoordinator(
         hass,
+        entry,
         api_client,
-        update_interval=timedelta(minutes=15),
+        update_interval=timedelta(minutes=DEFAULT_SCAN_INTERVAL),
+    )
+
+    # Load the schedule and the cached prices, the in-memory copies are
+    # authoritative from now on
+    await coordinator.async_load()
+
+    if coordinator.data is None:
+        # Nothing usable cached, wait for the first fetch
+        await coordinator.async_config_entry_first_refresh()
+    else:
+        # Serve the cached prices now and refresh them without blocking startup
+        entry.async_create_background_task(
+            hass, coordinator.async_refresh(), f"{DOMAIN} initial refresh"
+        )
+    coordinator.async_start_tick()
+
+    # Run the configured script whenever the scheduled mode changes
+    executor = PstrykModeExecutor(
+        hass,
+        coordinator,
+        {
+            mode: entry.options[option]
+            for mode, option in MODE_ACTION_OPTIONS.items()
+            if entry.options.get(option)
+        },
     )
+    entry.async_on_unload(executor.async_start())
 
-    # Fetch initial data
-    await coordinator.async_config_entry_first_refresh()
+    # Book the metered energy against the slot prices as readings arrive
+    entry.async_on_unload(coordinator.accounting.async_start())
 
     # Store coordinator
     hass.data[DOMAIN][entry.entry_id] = coordinator
 
+    # Reload when options change
+    entry.async_on_unload(entry.add_update_listener(async_reload_entry))
+
     # Setup platforms
     await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
 
-    # Register services
-    await async_setup_services(hass, coordinator)
-
     return True
 
 
@@ -59,29 +493,275 @@ async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     unload_ok = await hass.config_entries.async_unload_platforms(entry, PLATFORMS)
 
     if unload_ok:
-        hass.data[DOMAIN].pop(entry.entry_id)
+        coordinator = hass.data[DOMAIN].pop(entry.entry_id)
+        await coordinator.async_shutdown()
+
+        # Drop the client once no entry uses its key anymore
+        if not any(
+            other.api_client is coordinator.api_client
+            for other in hass.data[DOMAIN].values()
+        ):
+            hass.data[DATA_CLIENTS].pop(entry.data.get(CONF_API_KEY), None)
 
     return unload_ok
 
 
-async def async_setup_services(hass: HomeAssistant, coordinator: PstrykDataUpdateCoordinator) -> None:
+async def async_remove_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Remove the price archive, the price cache and the cost totals of a deleted entry."""
+    archive = PriceArchive(archive_path(hass, entry.entry_id))
+    await hass.async_add_executor_job(archive.remove)
+    for key in (STORAGE_KEY_PRICES, STORAGE_KEY_ACCOUNTING):
+        await Store(hass, STORAGE_VERSION, f"{key}.{entry.entry_id}").async_remove()
+
+
+async def async_reload_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Reload a config entry after its options changed."""
+    await hass.config_entries.async_reload(entry.entry_id)
+
+
+@callback
+def _async_get_coordinator(hass: HomeAssistant, call: ServiceCall) -> PstrykDataUpdateCoordinator:
+    """Return the coordinator a service call targets."""
+    coordinators: dict[str, PstrykDataUpdateCoordinator] = hass.data.get(DOMAIN, {})
+    entry_id = call.data.get(ATTR_CONFIG_ENTRY_ID)
+
+    if device_id := call.data.get(ATTR_DEVICE_ID):
+        device = dr.async_get(hass).async_get(device_id)
+        if device is None:
+            raise ServiceValidationError(f"Unknown device: {device_id}")
+        entry_id = next(
+            (config_entry for config_entry in device.config_entries if config_entry in coordinators),
+            None,
+        )
+        if entry_id is None:
+            raise ServiceValidationError(f"Device {device_id} is not a loaded Pstryk device")
+
+    if entry_id is not None:
+        if entry_id not in coordinators:
+            raise ServiceValidationError(f"Pstryk entry {entry_id} is not loaded")
+        return coordinators[entry_id]
+
+    if len(coordinators) != 1:
+        raise ServiceValidationError(
+            "Pass config_entry_id or device_id to choose one of the loaded Pstryk entries"
+            if coordinators
+            else "No Pstryk entry is loaded"
+        )
+    return next(iter(coordinators.values()))
+
+
+@callback
+def async_setup_services(hass: HomeAssistant) -> None:
     """Set up services for the Pstryk integration."""
 
     async def handle_set_schedule(call: ServiceCall) -> None:
         """Handle the set_schedule service call."""
+        coordinator = _async_get_coordinator(hass, call)
         hour = call.data.get("hour")
         mode = call.data.get("mode")
 
         await coordinator.async_set_schedule(hour, mode)
-        _LOGGER.info(f"Schedule set for hour {hour} with mode {mode}")
+        _LOGGER.info("Schedule set for hour %s with mode %s", hour, mode)
 
     async def handle_clear_schedule(call: ServiceCall) -> None:
         """Handle the clear_schedule service call."""
+        coordinator = _async_get_coordinator(hass, call)
         hour = call.data.get("hour")
 
         await coordinator.async_clear_schedule(hour)
-        _LOGGER.info(f"Schedule cleared for hour {hour}")
+        _LOGGER.info("Schedule cleared for hour %s", hour)
+
+    def bulk_hours(coordinator: PstrykDataUpdateCoordinator, call: ServiceCall) -> list[str]:
+        """Return the slots of a bulk call, from its list or its range."""
+        if ATTR_HOURS in call.data:
+            return call.data[ATTR_HOURS]
+        return coordinator.slot_keys(
+            parse_timestamp(call.data[ATTR_START]), parse_timestamp(call.data[ATTR_END])
+        )
+
+    async def handle_set_schedule_bulk(call: ServiceCall) -> None:
+        """Handle the set_schedule_bulk service call."""
+        coordinator = _async_get_coordinator(hass, call)
+        if ATTR_ENTRIES in call.data:
+            changes = {entry[ATTR_HOUR]: entry[ATTR_MODE] for entry in call.data[ATTR_ENTRIES]}
+        else:
+            changes = dict.fromkeys(bulk_hours(coordinator, call), call.data[ATTR_MODE])
+
+        await coordinator.async_update_schedule(changes)
+        _LOGGER.info("Schedule set for %s slots", len(changes))
+
+    async def handle_clear_schedule_bulk(call: ServiceCall) -> None:
+        """Handle the clear_schedule_bulk service call."""
+        coordinator = _async_get_coordinator(hass, call)
+        changes = dict.fromkeys(bulk_hours(coordinator, call))
+
+        await coordinator.async_update_schedule(changes)
+        _LOGGER.info("Schedule cleared for %s slots", len(changes))
+
+    async def handle_get_prices(call: ServiceCall) -> ServiceResponse:
+        """Handle the get_prices service call."""
+        coordinator = _async_get_coordinator(hass, call)
+        data = coordinator.data
+        return {
+            "prices": data["prices"],
+            "slot_length": data["series"].slot_seconds,
+            "current_price": data["current_price"],
+            "next_price": data["next_price"],
+            "average_price": data["average_price"],
+            "min_price": data["min_price"],
+            "max_price": data["max_price"],
+            "last_update": data["last_update"],
+        }
+
+    async def handle_get_schedule(call: ServiceCall) -> ServiceResponse:
+        """Handle the get_schedule service call."""
+        coordinator = _async_get_coordinator(hass, call)
+        return {
+            "schedule": await coordinator.async_get_schedule(),
+            "rules": coordinator.rules,
+            "current_mode": coordinator.data["current_mode"],
+        }
+
+    async def handle_add_rule(call: ServiceCall) -> ServiceResponse:
+        """Handle the add_rule service call."""
+        coordinator = _async_get_coordinator(hass, call)
+        if len(coordinator.rules) >= SCHEDULE_MAX_RULES:
+            raise ServiceValidationError(f"More than {SCHEDULE_MAX_RULES} rules")
+
+        # Rules are stored, keep them compact and JSON serialisable
+        rule: dict[str, Any] = {ATTR_MODE: call.data[ATTR_MODE]}
+        if ATTR_WEEKDAY in call.data:
+            rule[ATTR_WEEKDAY] = [day for day in WEEKDAYS if day in call.data[ATTR_WEEKDAY]]
+        for key in (ATTR_AFTER, ATTR_BEFORE):
+            if key in call.data:
+                rule[key] = call.data[key].isoformat()
+        for key in (ATTR_ABOVE, ATTR_BELOW):
+            if key in call.data:
+                rule[key] = call.data[key]
+
+        rule_id = await coordinator.async_add_rule(rule)
+        _LOGGER.info("Rule %s added with mode %s", rule_id, rule[ATTR_MODE])
+        return {ATTR_RULE_ID: rule_id}
+
+    async def handle_get_costs(call: ServiceCall) -> ServiceResponse:
+        """Handle the get_costs service call."""
+        accounting = _async_get_coordinator(hass, call).accounting
+        return {
+            "modes": accounting.mode_totals(),
+            "slots": accounting.slot_totals(call.data.get(ATTR_START), call.data.get(ATTR_END)),
+        }
+
+    async def handle_remove_rule(call: ServiceCall) -> None:
+        """Handle the remove_rule service call."""
+        coordinator = _async_get_coordinator(hass, call)
+        rule_id = call.data[ATTR_RULE_ID]
+        if not await coordinator.async_remove_rule(rule_id):
+            raise ServiceValidationError(f"Unknown rule: {rule_id}")
+        _LOGGER.info("Rule %s removed", rule_id)
+
+    async def handle_plan(call: ServiceCall) -> ServiceResponse:
+        """Handle the plan service call."""
+        coordinator = _async_get_coordinator(hass, call)
+        # Plans are stored for automatic runs, keep them JSON serialisable
+        plan = {
+            key: value
+            for key, value in call.data.items()
+            if key not in (ATTR_CONFIG_ENTRY_ID, ATTR_DEVICE_ID)
+        }
+        if ATTR_DEADLINE in plan:
+            plan[ATTR_DEADLINE] = plan[ATTR_DEADLINE].isoformat()
+
+        planned = await coordinator.async_plan(plan)
+        _LOGGER.info(
+            "Planned %s slots with the %s strategy", len(planned), plan[ATTR_STRATEGY]
+        )
+        return {"schedule": planned}
+
+    async def handle_get_price_history(call: ServiceCall) -> ServiceResponse:
+        """Handle the get_price_history service call."""
+        coordinator = _async_get_coordinator(hass, call)
+        return {
+            "prices": await coordinator.async_get_price_history(
+                call.data[ATTR_START], call.data[ATTR_END]
+            ),
+        }
+
+    async def handle_query_prices(call: ServiceCall) -> ServiceResponse:
+        """Handle the query_prices service call."""
+        coordinator = _async_get_coordinator(hass, call)
+        return coordinator.query_prices(call.data)
 
     # Register services
-    hass.services.async_register(DOMAIN, "set_schedule", handle_set_schedule)
-    hass.services.async_register(DOMAIN, "clear_schedule", handle_clear_schedule)
+    hass.services.async_register(
+        DOMAIN, SERVICE_SET_SCHEDULE, handle_set_schedule, schema=SET_SCHEDULE_SCHEMA
+    )
+    hass.services.async_register(
+        DOMAIN, SERVICE_CLEAR_SCHEDULE, handle_clear_schedule, schema=CLEAR_SCHEDULE_SCHEMA
+    )
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_SET_SCHEDULE_BULK,
+        handle_set_schedule_bulk,
+        schema=SET_SCHEDULE_BULK_SCHEMA,
+    )
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_CLEAR_SCHEDULE_BULK,
+        handle_clear_schedule_bulk,
+        schema=CLEAR_SCHEDULE_BULK_SCHEMA,
+    )
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_GET_PRICES,
+        handle_get_prices,
+        schema=TARGET_SCHEMA,
+        supports_response=SupportsResponse.ONLY,
+    )
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_GET_SCHEDULE,
+        handle_get_schedule,
+        schema=TARGET_SCHEMA,
+        supports_response=SupportsResponse.ONLY,
+    )
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_PLAN,
+        handle_plan,
+        schema=PLAN_SCHEMA,
+        supports_response=SupportsResponse.OPTIONAL,
+    )
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_GET_PRICE_HISTORY,
+        handle_get_price_history,
+        schema=GET_PRICE_HISTORY_SCHEMA,
+        supports_response=SupportsResponse.ONLY,
+    )
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_QUERY_PRICES,
+        handle_query_prices,
+        schema=QUERY_PRICES_SCHEMA,
+        supports_response=SupportsResponse.ONLY,
+    )
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_ADD_RULE,
+        handle_add_rule,
+        schema=ADD_RULE_SCHEMA,
+        supports_response=SupportsResponse.OPTIONAL,
+    )
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_REMOVE_RULE,
+        handle_remove_rule,
+        schema=REMOVE_RULE_SCHEMA,
+    )
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_GET_COSTS,
+        handle_get_costs,
+        schema=GET_COSTS_SCHEMA,
+        supports_response=SupportsResponse.ONLY,
+    )
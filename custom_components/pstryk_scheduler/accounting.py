@@ -0,0 +1,258 @@
+"""Cost accounting against energy meters for Pstryk Energy Scheduler."""
+from __future__ import annotations
+
+import logging
+from datetime import datetime
+from typing import TYPE_CHECKING, Any
+
+from homeassistant.const import STATE_UNAVAILABLE, STATE_UNKNOWN, UnitOfEnergy
+from homeassistant.core import CALLBACK_TYPE, Event, HomeAssistant, State, callback
+from homeassistant.helpers.dispatcher import async_dispatcher_send
+from homeassistant.helpers.event import async_track_state_change_event
+from homeassistant.helpers.storage import Store
+from homeassistant.util import dt as dt_util
+from homeassistant.util.unit_conversion import EnergyConverter
+
+from .const import (
+    ACCOUNTING_MAX_GAP,
+    ACCOUNTING_RESET_RATIO,
+    ACCOUNTING_SAVE_DELAY,
+    ACCOUNTING_SLOT_RETENTION,
+    DOMAIN,
+    STORAGE_KEY_ACCOUNTING,
+    STORAGE_VERSION,
+)
+from .prices import slot_key
+
+if TYPE_CHECKING:
+    from .coordinator import PstrykDataUpdateCoordinator
+
+_LOGGER = logging.getLogger(__name__)
+
+# Positions of the totals kept per slot, per mode and per period
+IMPORT = 0  # kWh bought
+EXPORT = 1  # kWh sold
+COST = 2  # paid for the energy bought
+REVENUE = 3  # earned for the energy sold
+TOTAL_FIELDS = ("import", "export", "cost", "revenue")
+
+PERIOD_DAY = "day"
+PERIOD_MONTH = "month"
+
+
+def _period_key(period: str, moment: datetime) -> str:
+    """Return the key of the local day or month containing a moment."""
+    day = dt_util.as_local(moment).date().isoformat()
+    return day if period == PERIOD_DAY else day[:7]
+
+
+def totals_as_dict(totals: list[float]) -> dict[str, float]:
+    """Return totals keyed by field name."""
+    return dict(zip(TOTAL_FIELDS, totals))
+
+
+class CostAccountant:
+    """Book the energy of the import and export meters against the slot prices.
+
+    Every reading adds the energy metered since the previous reading of the
+    same meter, split over the slots in between in proportion to time,
+    priced at each slot's price and credited to the slot's mode. Totals per
+    slot, per mode and for the current day and month are updated in place,
+    so nothing is ever recomputed from history.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        coordinator: PstrykDataUpdateCoordinator,
+        import_sensor: str | None,
+        export_sensor: str | None,
+    ) -> None:
+        """Initialize the accountant for the meters configured."""
+        self.hass = hass
+        self.coordinator = coordinator
+        self.meters = {
+            entity_id: kind
+            for kind, entity_id in ((IMPORT, import_sensor), (EXPORT, export_sensor))
+            if entity_id
+        }
+        entry_id = coordinator.config_entry.entry_id
+        self.signal = f"{DOMAIN}_costs_{entry_id}"
+        self._store = Store(hass, STORAGE_VERSION, f"{STORAGE_KEY_ACCOUNTING}.{entry_id}")
+        self._readings: dict[str, list[float]] = {}  # meter -> [kWh, timestamp]
+        self.slots: dict[str, list[float]] = {}
+        self.modes: dict[str, list[float]] = {}
+        self._periods: dict[str, list[Any]] = {}  # period -> [key, totals]
+        self._unsub: CALLBACK_TYPE | None = None
+
+    async def async_load(self) -> None:
+        """Restore the totals and the last reading of every meter."""
+        data = await self._store.async_load()
+        if data:
+            self._readings = {
+                entity_id: reading
+                for entity_id, reading in data.get("readings", {}).items()
+                if entity_id in self.meters
+            }
+            self.slots = data.get("slots", {})
+            self.modes = data.get("modes", {})
+            self._periods = data.get("periods", {})
+
+    @callback
+    def async_start(self) -> CALLBACK_TYPE:
+        """Follow the meters and return a callback stopping it.
+
+        Meters without a stored reading start counting from their current one.
+        """
+        now = dt_util.utcnow().timestamp()
+        for entity_id in self.meters:
+            if entity_id not in self._readings:
+                value = self._energy(self.hass.states.get(entity_id))
+                if value is not None:
+                    self._readings[entity_id] = [value, now]
+        if self.meters:
+            self._unsub = async_track_state_change_event(
+                self.hass, list(self.meters), self._async_handle_reading
+            )
+        return self.async_stop
+
+    @callback
+    def async_stop(self) -> None:
+        """Stop following the meters."""
+        if self._unsub is not None:
+            self._unsub()
+            self._unsub = None
+
+    async def async_save(self) -> None:
+        """Write the totals right away."""
+        if self.meters:
+            await self._store.async_save(self._data_to_save())
+
+    @callback
+    def _data_to_save(self) -> dict[str, Any]:
+        """Return the stored form of the totals."""
+        return {
+            "readings": self._readings,
+            "slots": self.slots,
+            "modes": self.modes,
+            "periods": self._periods,
+        }
+
+    @staticmethod
+    def _energy(state: State | None) -> float | None:
+        """Return the reading of a meter state in kWh, None when there is none."""
+        if state is None or state.state in (STATE_UNKNOWN, STATE_UNAVAILABLE):
+            return None
+        try:
+            value = float(state.state)
+        except ValueError:
+            return None
+        unit = state.attributes.get("unit_of_measurement", UnitOfEnergy.KILO_WATT_HOUR)
+        if unit not in EnergyConverter.VALID_UNITS:
+            return None
+        return EnergyConverter.convert(value, unit, UnitOfEnergy.KILO_WATT_HOUR)
+
+    @callback
+    def _async_handle_reading(self, event: Event) -> None:
+        """Book the energy metered since the previous reading.
+
+        Like a total_increasing sensor, a large drop is a meter reset while a
+        small one, from rounding or a republished state, only moves the
+        baseline.
+        """
+        entity_id = event.data["entity_id"]
+        state = event.data["new_state"]
+        value = self._energy(state)
+        if value is None:
+            return
+
+        moment = state.last_updated.timestamp()
+        previous = self._readings.get(entity_id)
+        self._readings[entity_id] = [value, moment]
+        if previous is not None:
+            energy = value - previous[0]
+            if value < previous[0] * ACCOUNTING_RESET_RATIO:
+                # The meter was reset, it counted up from zero since
+                energy = value
+            if energy > 0:
+                self._book(self.meters[entity_id], energy, previous[1], moment)
+                async_dispatcher_send(self.hass, self.signal)
+        self._store.async_delay_save(self._data_to_save, ACCOUNTING_SAVE_DELAY)
+
+    def _book(self, kind: int, energy: float, start: float, end: float) -> None:
+        """Add energy metered over [start, end) to the slots it spans.
+
+        Gaps longer than ACCOUNTING_MAX_GAP, such as downtime, are booked to
+        the slot of the reading as how the energy spread over them is unknown.
+        """
+        step = self.coordinator.series.slot_seconds
+        if end - start > ACCOUNTING_MAX_GAP.total_seconds() or end <= start:
+            self._add(kind, int(end) // step * step, energy)
+            return
+        slot = int(start) // step * step
+        while slot < end:
+            overlap = min(slot + step, end) - max(slot, start)
+            self._add(kind, slot, energy * overlap / (end - start))
+            slot += step
+
+    def _add(self, kind: int, slot: int, energy: float) -> None:
+        """Add energy to the totals of a slot, its mode and its day and month."""
+        moment = dt_util.utc_from_timestamp(slot)
+        price = self.coordinator.series.price_at(moment)
+        money = energy * price if price is not None else 0.0
+        money_kind = COST if kind == IMPORT else REVENUE
+        for totals in (
+            self.slots.setdefault(slot_key(moment), [0.0] * len(TOTAL_FIELDS)),
+            self.modes.setdefault(self.coordinator.mode_at(moment), [0.0] * len(TOTAL_FIELDS)),
+            *self._period_totals(moment),
+        ):
+            totals[kind] += energy
+            totals[money_kind] += money
+
+    def _period_totals(self, moment: datetime) -> list[list[float]]:
+        """Return the totals of the current day and month a slot counts towards.
+
+        A slot of a day or month that is already over, from a reading spanning
+        midnight, only counts towards the slot and mode totals.
+        """
+        totals = []
+        for period in (PERIOD_DAY, PERIOD_MONTH):
+            key = _period_key(period, moment)
+            current = self._periods.get(period)
+            if current is None or key > current[0]:
+                current = self._periods[period] = [key, [0.0] * len(TOTAL_FIELDS)]
+                if period == PERIOD_DAY:
+                    self._prune_slots(moment)
+            if key == current[0]:
+                totals.append(current[1])
+        return totals
+
+    def _prune_slots(self, moment: datetime) -> None:
+        """Drop the per-slot totals older than the retention, once a day."""
+        cutoff = slot_key(moment - ACCOUNTING_SLOT_RETENTION)
+        # Keys are ISO timestamps, so string order is chronological order
+        for key in [key for key in self.slots if key < cutoff]:
+            del self.slots[key]
+
+    def period_total(self, period: str, kind: int) -> float:
+        """Return a total of the current day or month, 0 until something is booked."""
+        current = self._periods.get(period)
+        if current is None or current[0] != _period_key(period, dt_util.utcnow()):
+            return 0.0
+        return current[1][kind]
+
+    def slot_totals(
+        self, start: datetime | None = None, end: datetime | None = None
+    ) -> dict[str, dict[str, float]]:
+        """Return the totals of the slots starting within [start, end)."""
+        first = slot_key(start) if start else ""
+        last = slot_key(end) if end else None
+        return {
+            key: totals_as_dict(totals)
+            for key, totals in sorted(self.slots.items())
+            if key >= first and (last is None or key < last)
+        }
+
+    def mode_totals(self) -> dict[str, dict[str, float]]:
+        """Return the totals of every mode."""
+        return {mode: totals_as_dict(totals) for mode, totals in self.modes.items()}
@@ -1,25 +1,136 @@
 """API client for Pstryk Energy."""
 from __future__ import annotations
 
+import asyncio
+import hashlib
+import json
 import logging
-from datetime import datetime, timedelta
+import random
+import time
+from collections.abc import Callable
+from datetime import UTC, datetime, tzinfo
 from typing import Any
 
 import aiohttp
 
-from .const import API_BASE_URL, API_TIMEOUT
+from .const import (
+    API_BASE_URL,
+    API_BREAKER_RESET,
+    API_BREAKER_THRESHOLD,
+    API_RETRIES,
+    API_RETRY_BASE_DELAY,
+    API_RETRY_MAX_DELAY,
+    API_TIMEOUT,
+)
+from .prices import PriceSeries
 
 _LOGGER = logging.getLogger(__name__)
 
+# Responses worth another attempt, anything else 4xx will fail again
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+
+class PstrykApiError(Exception):
+    """Error fetching data from the Pstryk API."""
+
+
+class PstrykCircuitOpenError(PstrykApiError):
+    """Requests are suspended after repeated failures."""
+
+
+class CircuitBreaker:
+    """Stop calling an API that keeps failing.
+
+    After ``threshold`` consecutive failures the circuit opens and requests
+    are refused for ``reset_timeout`` seconds. Then a single trial request is
+    let through: success closes the circuit, failure opens it again.
+    """
+
+    def __init__(
+        self,
+        threshold: int = API_BREAKER_THRESHOLD,
+        reset_timeout: float = API_BREAKER_RESET,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        """Initialize the breaker."""
+        self.threshold = threshold
+        self.reset_timeout = reset_timeout
+        self._clock = clock
+        self.failures = 0
+        self._opened_at: float | None = None
+
+    @property
+    def is_open(self) -> bool:
+        """Return whether requests are currently refused."""
+        return (
+            self._opened_at is not None
+            and self._clock() - self._opened_at < self.reset_timeout
+        )
+
+    @property
+    def retry_in(self) -> float:
+        """Return the seconds until a trial request is let through, 0 when closed."""
+        if self._opened_at is None:
+            return 0.0
+        return max(self.reset_timeout - (self._clock() - self._opened_at), 0.0)
+
+    @property
+    def is_half_open(self) -> bool:
+        """Return whether the open period is over and a trial request is due."""
+        return self._opened_at is not None and not self.is_open
+
+    def allow(self) -> bool:
+        """Return whether a request may be sent now."""
+        return not self.is_open
+
+    def record_success(self) -> None:
+        """Close the circuit."""
+        self.failures = 0
+        self._opened_at = None
+
+    def record_failure(self) -> None:
+        """Count a failure, opening the circuit at the threshold."""
+        self.failures += 1
+        if self.failures >= self.threshold:
+            self._opened_at = self._clock()
+
+
+def backoff_delay(
+    attempt: int,
+    rng: Callable[[], float] = random.random,
+    base: float = API_RETRY_BASE_DELAY,
+    maximum: float = API_RETRY_MAX_DELAY,
+) -> float:
+    """Return the delay before a retry, exponential with full jitter."""
+    return rng() * min(maximum, base * 2**attempt)
+
 
 class PstrykApiClient:
     """Client to interact with Pstryk API."""
 
-    def __init__(self, api_key: str, session: aiohttp.ClientSession) -> None:
+    def __init__(
+        self,
+        api_key: str,
+        session: aiohttp.ClientSession,
+        base_url: str = API_BASE_URL,
+        retries: int = API_RETRIES,
+        breaker: CircuitBreaker | None = None,
+        rng: Callable[[], float] = random.random,
+    ) -> None:
         """Initialize the API client."""
         self._api_key = api_key
         self._session = session
-        self._base_url = API_BASE_URL
+        self._base_url = base_url
+        self._retries = retries
+        self.breaker = breaker or CircuitBreaker()
+        self._rng = rng
+        self._pending: asyncio.Future[tuple[str, dict[str, Any]]] | None = None
+        self._etag: str | None = None
+        self._last_modified: str | None = None
+        self._digest: str | None = None
+        self._data: dict[str, Any] | None = None
+        # Size of the last response body, 0 when the prices were not modified
+        self.last_response_bytes: int | None = None
 
     async def async_get_prices(self) -> dict[str, Any]:
         """Get hourly electricity prices from Pstryk API.
@@ -34,77 +145,145 @@ class PstrykApiClient:
             ]
         }
         """
+        _, data = await self.async_fetch_prices()
+        return data
+
+    async def async_fetch_prices(self) -> tuple[str, dict[str, Any]]:
+        """Fetch prices, returning a digest of the payload and the decoded data.
+
+        The request is conditional on the last response, so unchanged prices
+        cost a 304 without a body. A body identical to the last one is not
+        decoded again either; in both cases the previous data is returned with
+        the same digest, letting callers skip their own processing.
+
+        Connection errors, timeouts and server errors are retried with
+        jittered exponential backoff. A fetch that fails for good counts
+        towards the circuit breaker, which refuses fetches while open.
+
+        Calls made while a fetch is in flight wait for that fetch instead of
+        sending their own request, so entries sharing the client refresh
+        with a single request.
+        """
+        if self._pending is not None:
+            # A cancelled waiter must not cancel the fetch for the others
+            return await asyncio.shield(self._pending)
+
+        pending = self._pending = asyncio.get_running_loop().create_future()
         try:
-            headers = {
-                "Authorization": f"Bearer {self._api_key}",
-                "Content-Type": "application/json",
-            }
-
-            url = f"{self._base_url}/prices"
-
-            async with self._session.get(
-                url,
-                headers=headers,
-                timeout=aiohttp.ClientTimeout(total=API_TIMEOUT),
-            ) as response:
-                response.raise_for_status()
-                data = await response.json()
-
-                _LOGGER.debug(f"Received price data: {data}")
-                return data
-
-        except aiohttp.ClientError as err:
-            _LOGGER.error(f"Error fetching prices from Pstryk API: {err}")
+            result = await self._async_fetch_with_retries()
+        except asyncio.CancelledError:
+            pending.set_exception(PstrykApiError("Price fetch was cancelled"))
             raise
         except Exception as err:
-            _LOGGER.error(f"Unexpected error fetching prices: {err}")
+            pending.set_exception(err)
             raise
+        else:
+            pending.set_result(result)
+            return result
+        finally:
+            self._pending = None
+            # Nobody may have been waiting, mark a failure as retrieved
+            pending.exception()
 
-    async def async_get_current_price(self) -> float | None:
-        """Get the current electricity price."""
-        try:
-            data = await self.async_get_prices()
-            prices = data.get("prices", [])
+    async def _async_fetch_with_retries(self) -> tuple[str, dict[str, Any]]:
+        """Fetch prices, retrying failed requests.
 
-            now = datetime.now()
-            current_hour = now.replace(minute=0, second=0, microsecond=0)
+        The trial request of a half-open circuit is sent once, without retries.
+        """
+        if not self.breaker.allow():
+            raise PstrykCircuitOpenError(
+                f"Pstryk API suspended after {self.breaker.failures} failed fetches"
+            )
 
-            for price_entry in prices:
-                hour_str = price_entry.get("hour")
-                price = price_entry.get("price")
+        retries = 0 if self.breaker.is_half_open else self._retries
+        attempt = 0
+        while True:
+            try:
+                result = await self._async_fetch_prices()
+            except (TimeoutError, aiohttp.ClientError) as err:
+                if attempt >= retries or not self._is_retryable(err):
+                    self.breaker.record_failure()
+                    _LOGGER.error("Error fetching prices from Pstryk API: %r", err)
+                    raise
+                delay = backoff_delay(attempt, self._rng)
+                attempt += 1
+                _LOGGER.debug(
+                    "Fetching prices failed (%s), retry %d in %.1fs", err, attempt, delay
+                )
+                await asyncio.sleep(delay)
+            except Exception as err:
+                self.breaker.record_failure()
+                _LOGGER.error("Unexpected error fetching prices: %s", err)
+                raise
+            else:
+                self.breaker.record_success()
+                return result
 
-                try:
-                    hour_dt = datetime.fromisoformat(hour_str.replace("Z", "+00:00"))
-                    # Compare without timezone info
-                    if hour_dt.replace(tzinfo=None) == current_hour:
-                        return float(price)
-                except (ValueError, AttributeError) as err:
-                    _LOGGER.warning(f"Error parsing hour {hour_str}: {err}")
-                    continue
+    @staticmethod
+    def _is_retryable(err: Exception) -> bool:
+        """Return whether a failed request is worth another attempt."""
+        if isinstance(err, aiohttp.ClientResponseError):
+            return err.status in RETRY_STATUSES
+        return True
 
-            return None
+    async def _async_fetch_prices(self) -> tuple[str, dict[str, Any]]:
+        """Send a single conditional price request."""
+        headers = {
+            "Authorization": f"Bearer {self._api_key}",
+            "Content-Type": "application/json",
+            "Accept-Encoding": "gzip, deflate",
+        }
+        if self._data is not None:
+            if self._etag:
+                headers["If-None-Match"] = self._etag
+            if self._last_modified:
+                headers["If-Modified-Since"] = self._last_modified
+
+        url = f"{self._base_url}/prices"
+
+        async with self._session.get(
+            url,
+            headers=headers,
+            timeout=aiohttp.ClientTimeout(total=API_TIMEOUT),
+        ) as response:
+            if response.status == 304 and self._data is not None:
+                _LOGGER.debug("Prices not modified since the last fetch")
+                self.last_response_bytes = 0
+                return self._digest, self._data
+
+            response.raise_for_status()
+            body = await response.read()
+            self.last_response_bytes = len(body)
+            self._etag = response.headers.get("ETag")
+            self._last_modified = response.headers.get("Last-Modified")
+
+        digest = hashlib.sha256(body).hexdigest()
+        if digest == self._digest and self._data is not None:
+            _LOGGER.debug("Received unchanged price data")
+            return self._digest, self._data
+
+        data = json.loads(body)
+        _LOGGER.debug("Received price data: %s", data)
+        self._digest = digest
+        self._data = data
+        return digest, data
+
+    async def async_get_current_price(self) -> float | None:
+        """Get the current electricity price."""
+        try:
+            data = await self.async_get_prices()
+            return self.parse_prices(data).price_at(datetime.now(UTC))
 
         except Exception as err:
-            _LOGGER.error(f"Error getting current price: {err}")
+            _LOGGER.error("Error getting current price: %s", err)
             return None
 
-    def parse_prices(self, data: dict[str, Any]) -> dict[str, float]:
-        """Parse API response into a dictionary of hour -> price."""
-        prices_dict = {}
-
-        prices = data.get("prices", [])
-        for entry in prices:
-            hour_str = entry.get("hour")
-            price = entry.get("price")
+    def parse_prices(
+        self, data: dict[str, Any], time_zone: tzinfo = UTC
+    ) -> PriceSeries:
+        """Parse API response into a price series.
 
-            try:
-                # Parse the hour string and use it as key
-                hour_dt = datetime.fromisoformat(hour_str.replace("Z", "+00:00"))
-                # Use ISO format as key
-                key = hour_dt.strftime("%Y-%m-%dT%H:00:00")
-                prices_dict[key] = float(price)
-            except (ValueError, AttributeError) as err:
-                _LOGGER.warning(f"Error parsing price entry {entry}: {err}")
-                continue
-
-        return prices_dict
+        The slot length is detected from the response. Days are split in
+        the given time zone when computing daily statistics.
+        """
+        return PriceSeries.from_api(data, time_zone=time_zone)
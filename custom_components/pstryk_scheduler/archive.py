@@ -0,0 +1,121 @@
+"""Append-only price archive for Pstryk Energy Scheduler."""
+from __future__ import annotations
+
+import math
+import os
+import struct
+from bisect import bisect_left
+from collections.abc import Iterable
+from typing import BinaryIO
+
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.storage import STORAGE_DIR
+
+from .const import PRICE_ARCHIVE_FILE
+from .prices import HOUR_SECONDS
+
+# Slot start in UTC epoch seconds and its price
+RECORD = struct.Struct("<qd")
+
+
+def archive_path(hass: HomeAssistant, entry_id: str) -> str:
+    """Return the path of the price archive of an entry."""
+    return hass.config.path(STORAGE_DIR, f"{PRICE_ARCHIVE_FILE}.{entry_id}")
+
+
+class _Timestamps:
+    """Sequence view of the record timestamps in an archive file, for bisect."""
+
+    def __init__(self, handle: BinaryIO, count: int) -> None:
+        """Initialize the view."""
+        self._handle = handle
+        self._count = count
+
+    def __len__(self) -> int:
+        """Return the number of records."""
+        return self._count
+
+    def __getitem__(self, index: int) -> int:
+        """Read the timestamp of a record."""
+        self._handle.seek(index * RECORD.size)
+        return RECORD.unpack(self._handle.read(RECORD.size))[0]
+
+
+class PriceArchive:
+    """Prices of every fetched slot in a file of fixed-width records.
+
+    Records are appended in chronological order and never rewritten, so a
+    range is located by binary search over the record index and read in one
+    go, whatever the size of the file. The methods do blocking I/O and are
+    meant to run in the executor.
+    """
+
+    def __init__(self, path: str) -> None:
+        """Initialize the archive stored at the given path."""
+        self.path = path
+
+    @staticmethod
+    def _count(handle: BinaryIO) -> int:
+        """Return the number of complete records in an open archive."""
+        return os.fstat(handle.fileno()).st_size // RECORD.size
+
+    def append(self, points: Iterable[tuple[int, float]]) -> list[tuple[int, float]]:
+        """Append the slots after the last archived one and return them.
+
+        Slots at or before the last archived slot are skipped, a price is
+        archived once and kept as first fetched.
+        """
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        with open(self.path, "a+b") as handle:
+            count = self._count(handle)
+            # Drop a record cut short by an interrupted write
+            handle.truncate(count * RECORD.size)
+            last = _Timestamps(handle, count)[count - 1] if count else None
+            added = [
+                (timestamp, price)
+                for timestamp, price in sorted(points)
+                if (last is None or timestamp > last) and not math.isnan(price)
+            ]
+            handle.write(b"".join(RECORD.pack(timestamp, price) for timestamp, price in added))
+        return added
+
+    def query(self, start: int, end: int) -> list[tuple[int, float]]:
+        """Return the archived slots starting within [start, end)."""
+        try:
+            with open(self.path, "rb") as handle:
+                timestamps = _Timestamps(handle, self._count(handle))
+                first = bisect_left(timestamps, start)
+                last = bisect_left(timestamps, end, lo=first)
+                handle.seek(first * RECORD.size)
+                data = handle.read((last - first) * RECORD.size)
+        except FileNotFoundError:
+            return []
+        return list(RECORD.iter_unpack(data))
+
+    def remove(self) -> None:
+        """Delete the archive."""
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+
+
+def hourly_statistics(points: Iterable[tuple[int, float]]) -> list[tuple[int, float, float, float]]:
+    """Aggregate chronological slot prices into hours of (start, mean, min, max).
+
+    Slots within an hour are equally long, so the mean is a plain average.
+    """
+    hours: list[tuple[int, float, float, float]] = []
+    current: int | None = None
+    values: list[float] = []
+    for timestamp, price in points:
+        hour = timestamp // HOUR_SECONDS * HOUR_SECONDS
+        if hour != current:
+            if values:
+                hours.append((current, math.fsum(values) / len(values), min(values), max(values)))
+            current = hour
+            values = []
+        values.append(price)
+    if values:
+        hours.append((current, math.fsum(values) / len(values), min(values), max(values)))
+    return hours
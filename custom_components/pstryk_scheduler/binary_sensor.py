@@ -0,0 +1,80 @@
+"""Binary sensor platform for Pstryk Energy Scheduler."""
+from __future__ import annotations
+
+import logging
+from typing import Any
+
+from homeassistant.components.binary_sensor import BinarySensorEntity
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import Platform
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers import entity_registry as er
+from homeassistant.helpers.entity_platform import AddEntitiesCallback
+
+from .const import (
+    ATTR_COUNT,
+    ATTR_THRESHOLD,
+    CONF_CHEAPEST_SLOTS,
+    DEFAULT_CHEAPEST_SLOTS,
+    DOMAIN,
+)
+from .coordinator import PstrykDataUpdateCoordinator
+from .entity import PstrykEntity
+
+_LOGGER = logging.getLogger(__name__)
+
+
+async def async_setup_entry(
+    hass: HomeAssistant,
+    entry: ConfigEntry,
+    async_add_entities: AddEntitiesCallback,
+) -> None:
+    """Set up Pstryk binary sensors from a config entry."""
+    coordinator = hass.data[DOMAIN][entry.entry_id]
+    counts = entry.options.get(CONF_CHEAPEST_SLOTS, DEFAULT_CHEAPEST_SLOTS)
+    sensors = [PstrykCheapestSlotsBinarySensor(coordinator, count) for count in counts]
+
+    # Drop the sensors of counts that were removed from the options
+    registry = er.async_get(hass)
+    unique_ids = {sensor.unique_id for sensor in sensors}
+    for registry_entry in er.async_entries_for_config_entry(registry, entry.entry_id):
+        if (
+            registry_entry.domain == Platform.BINARY_SENSOR
+            and registry_entry.unique_id not in unique_ids
+        ):
+            registry.async_remove(registry_entry.entity_id)
+
+    async_add_entities(sensors)
+
+
+class PstrykCheapestSlotsBinarySensor(PstrykEntity, BinarySensorEntity):
+    """On while the current slot is among the cheapest slots of the day.
+
+    Slots priced the same as the last selected one are included too. The
+    state follows the coordinator's slot timer, so it flips at boundaries.
+    """
+
+    def __init__(self, coordinator: PstrykDataUpdateCoordinator, count: int) -> None:
+        """Initialize the binary sensor."""
+        super().__init__(coordinator, f"cheapest_{count}_slots")
+        self._count = count
+        self._attr_unique_id = f"{coordinator.config_entry.entry_id}_cheapest_{count}_slots"
+        self._attr_name = f"Cheapest {count} Slots"
+        self._attr_icon = "mdi:cash-clock"
+
+    @property
+    def is_on(self) -> bool | None:
+        """Return whether the current slot is among the cheapest of the day."""
+        rank = self.coordinator.data.get("current_rank")
+        if rank is None:
+            return None
+        return rank <= self._count
+
+    @property
+    def extra_state_attributes(self) -> dict[str, Any]:
+        """Return the count and the highest price that still qualifies."""
+        today = self.coordinator.data.get("today_stats")
+        threshold = None
+        if today:
+            threshold = today.sorted_values[min(self._count, today.count) - 1]
+        return {ATTR_COUNT: self._count, ATTR_THRESHOLD: threshold}
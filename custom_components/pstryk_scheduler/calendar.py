@@ -0,0 +1,79 @@
+"""Calendar platform for Pstryk Energy Scheduler."""
+from __future__ import annotations
+
+import logging
+from datetime import datetime
+from typing import Any
+
+from homeassistant.components.calendar import CalendarEntity, CalendarEvent
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.entity_platform import AddEntitiesCallback
+from homeassistant.util import dt as dt_util
+
+from .const import DOMAIN
+from .coordinator import PstrykDataUpdateCoordinator
+from .entity import PstrykEntity
+from .timeline import Interval
+
+_LOGGER = logging.getLogger(__name__)
+
+
+async def async_setup_entry(
+    hass: HomeAssistant,
+    entry: ConfigEntry,
+    async_add_entities: AddEntitiesCallback,
+) -> None:
+    """Set up the Pstryk schedule calendar from a config entry."""
+    coordinator = hass.data[DOMAIN][entry.entry_id]
+    async_add_entities([PstrykScheduleCalendar(coordinator)])
+
+
+class PstrykScheduleCalendar(PstrykEntity, CalendarEntity):
+    """The schedule as events, one per run of consecutive slots in the same mode.
+
+    Events are read from the coordinator's schedule timeline, which is kept
+    up to date as the schedule and rules change, so a range query is a
+    binary search. Slots in Default mode are not shown, modes set by rules
+    are shown up to the end of the prices or a week ahead.
+    """
+
+    def __init__(self, coordinator: PstrykDataUpdateCoordinator) -> None:
+        """Initialize the calendar."""
+        super().__init__(coordinator, "schedule_calendar")
+        self._attr_unique_id = f"{coordinator.config_entry.entry_id}_schedule_calendar"
+        self._attr_name = "Schedule"
+        self._attr_icon = "mdi:calendar-clock"
+
+    def _event(self, interval: Interval) -> CalendarEvent:
+        """Return the event of a timeline interval."""
+        start, end, mode = interval
+        return CalendarEvent(
+            start=dt_util.utc_from_timestamp(start),
+            end=dt_util.utc_from_timestamp(end),
+            summary=mode,
+            uid=f"{self.coordinator.config_entry.entry_id}_{start}",
+        )
+
+    @property
+    def event(self) -> CalendarEvent | None:
+        """Return the current or next scheduled event."""
+        interval = self.coordinator.timeline.current_or_next(
+            int(dt_util.utcnow().timestamp())
+        )
+        return self._event(interval) if interval else None
+
+    async def async_get_events(
+        self, hass: HomeAssistant, start_date: datetime, end_date: datetime
+    ) -> list[CalendarEvent]:
+        """Return the events overlapping a range."""
+        return [
+            self._event(interval)
+            for interval in self.coordinator.timeline.between(
+                int(start_date.timestamp()), int(end_date.timestamp())
+            )
+        ]
+
+    def _state_fingerprint(self) -> tuple[Any, ...]:
+        """Return what makes up the written state of the calendar."""
+        return (self.available, self.event)
@@ -5,19 +5,37 @@ import logging
 from typing import Any
 
 import voluptuous as vol
-
 from homeassistant import config_entries
-from homeassistant.core import HomeAssistant
+from homeassistant.const import CONF_NAME
+from homeassistant.core import HomeAssistant, callback
 from homeassistant.data_entry_flow import FlowResult
+from homeassistant.helpers import selector
 from homeassistant.helpers.aiohttp_client import async_get_clientsession
 
 from .api import PstrykApiClient
-from .const import DOMAIN, CONF_API_KEY
+from .const import (
+    CONF_API_KEY,
+    CONF_ARCHIVE_SCHEDULE,
+    CONF_CHEAPEST_SLOTS,
+    CONF_EXPORT_SENSOR,
+    CONF_IMPORT_SENSOR,
+    CONF_SCHEDULE_RETENTION,
+    DEFAULT_ARCHIVE_SCHEDULE,
+    DEFAULT_CHEAPEST_SLOTS,
+    DEFAULT_NAME,
+    DEFAULT_SCHEDULE_RETENTION,
+    DOMAIN,
+    MODE_ACTION_OPTIONS,
+)
 
 _LOGGER = logging.getLogger(__name__)
 
+# Counts offered for the cheapest slots binary sensors, others can be typed in
+CHEAPEST_SLOTS_CHOICES = ["1", "2", "3", "4", "6", "8", "12"]
+
 STEP_USER_DATA_SCHEMA = vol.Schema(
     {
+        vol.Required(CONF_NAME, default=DEFAULT_NAME): str,
         vol.Required(CONF_API_KEY): str,
     }
 )
@@ -33,16 +51,16 @@ async def validate_input(hass: HomeAssistant, data: dict[str, Any]) -> dict[str,
     try:
         await api_client.async_get_prices()
     except Exception as err:
-        _LOGGER.error(f"Error validating API key: {err}")
+        _LOGGER.error("Error validating API key: %s", err)
         raise
 
-    return {"title": "Pstryk Energy Scheduler"}
+    return {"title": data.get(CONF_NAME, DEFAULT_NAME)}
 
 
 class ConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
     """Handle a config flow for Pstryk Energy Scheduler."""
 
-    VERSION = 1
+    VERSION = 2
 
     async def async_step_user(
         self, user_input: dict[str, Any] | None = None
@@ -62,3 +80,115 @@ class ConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
         return self.async_show_form(
             step_id="user", data_schema=STEP_USER_DATA_SCHEMA, errors=errors
         )
+
+    @staticmethod
+    @callback
+    def async_get_options_flow(
+        config_entry: config_entries.ConfigEntry,
+    ) -> config_entries.OptionsFlow:
+        """Get the options flow for this handler."""
+        return OptionsFlowHandler(config_entry)
+
+
+class OptionsFlowHandler(config_entries.OptionsFlow):
+    """Handle options for Pstryk Energy Scheduler."""
+
+    def __init__(self, config_entry: config_entries.ConfigEntry) -> None:
+        """Initialize options flow."""
+        self.config_entry = config_entry
+        self._options: dict[str, Any] = {}
+
+    async def async_step_init(
+        self, user_input: dict[str, Any] | None = None
+    ) -> FlowResult:
+        """Manage the options."""
+        errors: dict[str, str] = {}
+
+        if user_input is not None:
+            try:
+                counts = sorted({int(count) for count in user_input.get(CONF_CHEAPEST_SLOTS, [])})
+            except ValueError:
+                counts = [0]
+            if any(count < 1 for count in counts):
+                errors[CONF_CHEAPEST_SLOTS] = "invalid_slot_count"
+            else:
+                self._options.update(user_input)
+                self._options[CONF_CHEAPEST_SLOTS] = counts
+                return await self.async_step_actions()
+
+        options = self.config_entry.options
+        schema = vol.Schema(
+            {
+                vol.Optional(
+                    CONF_SCHEDULE_RETENTION,
+                    default=options.get(
+                        CONF_SCHEDULE_RETENTION, DEFAULT_SCHEDULE_RETENTION
+                    ),
+                ): vol.All(vol.Coerce(int), vol.Range(min=0, max=24 * 31)),
+                vol.Optional(
+                    CONF_ARCHIVE_SCHEDULE,
+                    default=options.get(CONF_ARCHIVE_SCHEDULE, DEFAULT_ARCHIVE_SCHEDULE),
+                ): bool,
+                vol.Optional(
+                    CONF_CHEAPEST_SLOTS,
+                    default=[
+                        str(count)
+                        for count in options.get(CONF_CHEAPEST_SLOTS, DEFAULT_CHEAPEST_SLOTS)
+                    ],
+                ): selector.SelectSelector(
+                    selector.SelectSelectorConfig(
+                        options=CHEAPEST_SLOTS_CHOICES,
+                        multiple=True,
+                        custom_value=True,
+                    )
+                ),
+            }
+        )
+
+        return self.async_show_form(step_id="init", data_schema=schema, errors=errors)
+
+    async def async_step_actions(
+        self, user_input: dict[str, Any] | None = None
+    ) -> FlowResult:
+        """Choose the script run when each mode starts."""
+        if user_input is not None:
+            self._options.update(user_input)
+            return await self.async_step_meters()
+
+        options = self.config_entry.options
+        script_selector = selector.EntitySelector(
+            selector.EntitySelectorConfig(domain="script")
+        )
+        # Suggested rather than default values, so a mapping can be removed
+        schema = vol.Schema(
+            {
+                vol.Optional(
+                    option, description={"suggested_value": options.get(option)}
+                ): script_selector
+                for option in MODE_ACTION_OPTIONS.values()
+            }
+        )
+
+        return self.async_show_form(step_id="actions", data_schema=schema)
+
+    async def async_step_meters(
+        self, user_input: dict[str, Any] | None = None
+    ) -> FlowResult:
+        """Choose the energy meters whose readings are costed."""
+        if user_input is not None:
+            return self.async_create_entry(title="", data={**self._options, **user_input})
+
+        options = self.config_entry.options
+        meter_selector = selector.EntitySelector(
+            selector.EntitySelectorConfig(domain="sensor", device_class="energy")
+        )
+        schema = vol.Schema(
+            {
+                vol.Optional(
+                    option, description={"suggested_value": options.get(option)}
+                ): meter_selector
+                for option in (CONF_IMPORT_SENSOR, CONF_EXPORT_SENSOR)
+            }
+        )
+
+        return self.async_show_form(step_id="meters", data_schema=schema)
@@ -1,17 +1,49 @@
 """Constants for the Pstryk Energy Scheduler integration."""
+from datetime import timedelta
 
 DOMAIN = "pstryk_scheduler"
+DATA_CLIENTS = f"{DOMAIN}_clients"  # hass.data key of the API clients per key
+DEFAULT_NAME = "Pstryk Energy Scheduler"
+LEGACY_DEVICE_ID = "pstryk_energy_scheduler"  # device identifier before version 2 entries
 
 # Configuration
 CONF_API_KEY = "api_key"
 CONF_REGION = "region"
+CONF_SCHEDULE_RETENTION = "schedule_retention"
+CONF_ARCHIVE_SCHEDULE = "archive_schedule"
+CONF_CHEAPEST_SLOTS = "cheapest_slots"
+CONF_IMPORT_SENSOR = "import_sensor"
+CONF_EXPORT_SENSOR = "export_sensor"
 
 # Defaults
-DEFAULT_SCAN_INTERVAL = 15  # minutes
+DEFAULT_SCAN_INTERVAL = 15  # minutes, used while expected prices are missing
+DEFAULT_SCHEDULE_RETENTION = 24  # hours of past schedule kept in the live schedule
+DEFAULT_ARCHIVE_SCHEDULE = False
+DEFAULT_CHEAPEST_SLOTS = [4]  # a binary sensor per count, on in the day's cheapest slots
+
+# Price publication
+PRICE_PUBLICATION_HOUR = 14  # local hour at which next-day prices are published
+MIN_SLOT_LENGTH = timedelta(minutes=15)  # finest slot a schedule entry may address
+
+# Price levels, prices within the band around the mean of the day are normal
+PRICE_LEVEL_CHEAP = "cheap"
+PRICE_LEVEL_NORMAL = "normal"
+PRICE_LEVEL_EXPENSIVE = "expensive"
+PRICE_LEVELS = [PRICE_LEVEL_CHEAP, PRICE_LEVEL_NORMAL, PRICE_LEVEL_EXPENSIVE]
+PRICE_LEVEL_BAND = 0.2  # share of the mean, as the 80%/120% colours of the card
+
+# Units of all prices and costs
+COST_UNIT = "€"
+PRICE_UNIT = f"{COST_UNIT}/kWh"
 
 # API
 API_BASE_URL = "https://api.pstryk.com/v1"
-API_TIMEOUT = 30
+API_TIMEOUT = 10  # seconds per attempt
+API_RETRIES = 2  # attempts after the first one
+API_RETRY_BASE_DELAY = 1.0  # seconds, doubled on every retry
+API_RETRY_MAX_DELAY = 10.0
+API_BREAKER_THRESHOLD = 3  # failed fetches before the circuit opens
+API_BREAKER_RESET = 1800  # seconds the circuit stays open, longer than the failure poll
 
 # Modes
 MODE_DEFAULT = "Default"
@@ -32,6 +64,20 @@ MODES = [
     MODE_BUY_CHARGE_CAR_AND_BATTERY,
 ]
 
+# Option holding the script run when each mode starts
+MODE_ACTION_OPTIONS = {
+    MODE_DEFAULT: "action_default",
+    MODE_BUY: "action_buy",
+    MODE_SELL: "action_sell",
+    MODE_SELL_ALL: "action_sell_all",
+    MODE_SELL_PV_ONLY: "action_sell_pv_only",
+    MODE_BUY_CHARGE_CAR: "action_buy_charge_car",
+    MODE_BUY_CHARGE_CAR_AND_BATTERY: "action_buy_charge_car_and_battery",
+}
+
+# Events
+EVENT_MODE_CHANGED = f"{DOMAIN}_mode_changed"
+
 # Attributes
 ATTR_HOURLY_PRICES = "hourly_prices"
 ATTR_SCHEDULE = "schedule"
@@ -40,11 +86,90 @@ ATTR_NEXT_PRICE = "next_price"
 ATTR_AVERAGE_PRICE = "average_price"
 ATTR_MIN_PRICE = "min_price"
 ATTR_MAX_PRICE = "max_price"
+ATTR_TODAY = "today"
+ATTR_TOMORROW = "tomorrow"
+ATTR_LAST_UPDATE = "last_update"
+ATTR_STALE = "stale"
+ATTR_SLOTS = "slots"
+ATTR_THRESHOLD = "threshold"
 
 # Services
 SERVICE_SET_SCHEDULE = "set_schedule"
 SERVICE_CLEAR_SCHEDULE = "clear_schedule"
+SERVICE_SET_SCHEDULE_BULK = "set_schedule_bulk"
+SERVICE_CLEAR_SCHEDULE_BULK = "clear_schedule_bulk"
+SERVICE_GET_PRICES = "get_prices"
+SERVICE_GET_SCHEDULE = "get_schedule"
+SERVICE_PLAN = "plan"
+SERVICE_GET_PRICE_HISTORY = "get_price_history"
+SERVICE_QUERY_PRICES = "query_prices"
+SERVICE_ADD_RULE = "add_rule"
+SERVICE_REMOVE_RULE = "remove_rule"
+SERVICE_GET_COSTS = "get_costs"
+
+# Service fields
+ATTR_CONFIG_ENTRY_ID = "config_entry_id"
+ATTR_HOUR = "hour"
+ATTR_HOURS = "hours"
+ATTR_MODE = "mode"
+ATTR_ENTRIES = "entries"
+ATTR_START = "start"
+ATTR_END = "end"
+ATTR_STRATEGY = "strategy"
+ATTR_COUNT = "count"
+ATTR_DEADLINE = "deadline"
+ATTR_CAPACITY = "capacity"
+ATTR_CHARGE_RATE = "charge_rate"
+ATTR_DISCHARGE_RATE = "discharge_rate"
+ATTR_EFFICIENCY = "efficiency"
+ATTR_SOC = "soc"
+ATTR_AUTO = "auto"
+ATTR_QUERY = "query"
+ATTR_DURATION = "duration"
+ATTR_RULES = "rules"
+ATTR_RULE_ID = "rule_id"
+ATTR_WEEKDAY = "weekday"
+ATTR_AFTER = "after"
+ATTR_BEFORE = "before"
+ATTR_ABOVE = "above"
+ATTR_BELOW = "below"
+
+# Planner
+STRATEGY_CHEAPEST = "cheapest"
+STRATEGY_BATTERY = "battery"
+DEFAULT_BATTERY_EFFICIENCY = 0.9  # round trip
+BATTERY_SOC_LEVELS = 100  # state of charge steps of the battery planner
+BATTERY_MAX_SOC_LEVELS = 2000  # finest grid, used when a rate moves less than a step per slot
+
+# Price queries
+QUERY_CHEAPEST_WINDOW = "cheapest_window"
+QUERY_EXPENSIVE_WINDOW = "expensive_window"
+QUERY_AVERAGE = "average"
+QUERY_CHEAPEST = "cheapest"
+QUERY_EXPENSIVE = "expensive"
+
+# Recurring rules, one-off schedule entries take precedence over them
+SCHEDULE_MAX_RULES = 100
+CALENDAR_RULE_HORIZON = timedelta(days=7)  # how far ahead the calendar shows rule modes
+
+# Upper bounds on what a single bulk call may touch
+BULK_SCHEDULE_MAX_SLOTS = 31 * 24 * 4
+BULK_SCHEDULE_MAX_RANGE = timedelta(days=31)
 
 # Storage
 STORAGE_KEY = "pstryk_scheduler_storage"
+STORAGE_KEY_PRICES = "pstryk_scheduler_prices"
+STORAGE_KEY_ACCOUNTING = "pstryk_scheduler_accounting"
 STORAGE_VERSION = 1
+SCHEDULE_SAVE_DELAY = 10  # seconds, coalesces bursts of schedule edits
+SCHEDULE_ARCHIVE_MAX_SEGMENTS = 1000
+
+# Price archive, one file of fixed-width records per entry in .storage
+PRICE_ARCHIVE_FILE = "pstryk_scheduler_price_archive"
+PRICE_HISTORY_MAX_RANGE = timedelta(days=366)  # longest range a single query may read
+
+# Cost accounting against the energy meters
+ACCOUNTING_SAVE_DELAY = 60  # seconds, coalesces the writes of frequent readings
+ACCOUNTING_MAX_GAP = timedelta(hours=1)  # longer gaps between readings are not spread
+ACCOUNTING_RESET_RATIO = 0.9  # a reading below this share of the previous one is a meter reset
+ACCOUNTING_SLOT_RETENTION = timedelta(days=62)  # per-slot totals kept, per-mode ones are kept for good
@@ -2,15 +2,80 @@
 from __future__ import annotations
 
 import logging
-from datetime import datetime, timedelta
+from array import array
+from datetime import datetime, time, timedelta
 from typing import Any
 
-from homeassistant.core import HomeAssistant
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.exceptions import HomeAssistantError
+from homeassistant.helpers.dispatcher import async_dispatcher_send
+from homeassistant.helpers.event import async_track_point_in_utc_time
 from homeassistant.helpers.storage import Store
 from homeassistant.helpers.update_coordinator import DataUpdateCoordinator, UpdateFailed
+from homeassistant.util import dt as dt_util
+from homeassistant.util.ulid import ulid_now
 
+from .accounting import CostAccountant
 from .api import PstrykApiClient
-from .const import DOMAIN, STORAGE_KEY, STORAGE_VERSION, MODE_DEFAULT
+from .archive import PriceArchive, archive_path, hourly_statistics
+from .const import (
+    ATTR_AUTO,
+    ATTR_CAPACITY,
+    ATTR_CHARGE_RATE,
+    ATTR_COUNT,
+    ATTR_DEADLINE,
+    ATTR_DISCHARGE_RATE,
+    ATTR_DURATION,
+    ATTR_EFFICIENCY,
+    ATTR_END,
+    ATTR_MODE,
+    ATTR_QUERY,
+    ATTR_RULE_ID,
+    ATTR_SOC,
+    ATTR_START,
+    ATTR_STRATEGY,
+    CALENDAR_RULE_HORIZON,
+    CONF_ARCHIVE_SCHEDULE,
+    CONF_EXPORT_SENSOR,
+    CONF_IMPORT_SENSOR,
+    CONF_SCHEDULE_RETENTION,
+    DEFAULT_ARCHIVE_SCHEDULE,
+    DEFAULT_SCAN_INTERVAL,
+    DEFAULT_SCHEDULE_RETENTION,
+    DOMAIN,
+    MODE_DEFAULT,
+    PRICE_LEVEL_BAND,
+    PRICE_LEVEL_CHEAP,
+    PRICE_LEVEL_EXPENSIVE,
+    PRICE_LEVEL_NORMAL,
+    PRICE_PUBLICATION_HOUR,
+    PRICE_UNIT,
+    QUERY_AVERAGE,
+    QUERY_CHEAPEST,
+    QUERY_CHEAPEST_WINDOW,
+    QUERY_EXPENSIVE_WINDOW,
+    SCHEDULE_ARCHIVE_MAX_SEGMENTS,
+    SCHEDULE_SAVE_DELAY,
+    STORAGE_KEY,
+    STORAGE_KEY_PRICES,
+    STORAGE_VERSION,
+    STRATEGY_BATTERY,
+)
+from .metrics import RuntimeMetrics, timed
+from .planner import Battery, plan_battery, plan_cheapest
+from .prices import (
+    DEFAULT_SLOT_SECONDS,
+    HOUR_SECONDS,
+    PriceSeries,
+    PriceStats,
+    floor_to_slot,
+    hour_key,
+    parse_timestamp,
+    slot_key,
+)
+from .rules import ScheduleRules
+from .timeline import ScheduleTimeline
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -21,6 +86,7 @@ class PstrykDataUpdateCoordinator(DataUpdateCoordinator):
     def __init__(
         self,
         hass: HomeAssistant,
+        entry: ConfigEntry,
         api_client: PstrykApiClient,
         update_interval: timedelta,
     ) -> None:
@@ -28,85 +94,771 @@ class PstrykDataUpdateCoordinator(DataUpdateCoordinator):
         super().__init__(
             hass,
             _LOGGER,
-            name=DOMAIN,
+            name=f"{DOMAIN} {entry.title}",
             update_interval=update_interval,
+            always_update=False,
         )
+        self.config_entry = entry
         self.api_client = api_client
-        self._store = Store(hass, STORAGE_VERSION, STORAGE_KEY)
+        self._store = Store(hass, STORAGE_VERSION, f"{STORAGE_KEY}.{entry.entry_id}")
+        self._price_store = Store(
+            hass, STORAGE_VERSION, f"{STORAGE_KEY_PRICES}.{entry.entry_id}"
+        )
+        self.archive = PriceArchive(archive_path(hass, entry.entry_id))
         self._schedule: dict[str, str] = {}
-        self._prices: dict[str, float] = {}
+        self._rules = ScheduleRules([], dt_util.DEFAULT_TIME_ZONE)
+        self._archive: list[list[str]] = []
+        self._auto_plan: dict[str, Any] | None = None
+        self._planned_until: int | None = None
+        self._schedule_retention = timedelta(
+            hours=entry.options.get(CONF_SCHEDULE_RETENTION, DEFAULT_SCHEDULE_RETENTION)
+        )
+        self._archive_schedule = entry.options.get(
+            CONF_ARCHIVE_SCHEDULE, DEFAULT_ARCHIVE_SCHEDULE
+        )
+        self._series = PriceSeries(0, DEFAULT_SLOT_SECONDS, array("d"))
+        self.timeline = ScheduleTimeline(DEFAULT_SLOT_SECONDS, self.mode_at)
+        self._timeline_until: datetime | None = None
+        self._price_digest: str | None = None
+        self._stale = False
+        self._last_update: datetime | None = None
+        self._unsub_tick: CALLBACK_TYPE | None = None
+        self.metrics = RuntimeMetrics()
+        self._schedule_dirty = False
+        self.accounting = CostAccountant(
+            hass,
+            self,
+            entry.options.get(CONF_IMPORT_SENSOR),
+            entry.options.get(CONF_EXPORT_SENSOR),
+        )
 
     async def _async_update_data(self) -> dict[str, Any]:
         """Fetch data from API."""
         try:
             # Fetch prices from API
-            data = await self.api_client.async_get_prices()
-            self._prices = self.api_client.parse_prices(data)
+            with timed() as fetch_time:
+                digest, data = await self.api_client.async_fetch_prices()
+            self.metrics.fetch_latency = fetch_time[0]
+            self.metrics.payload_bytes = self.api_client.last_response_bytes
+            self.metrics.fetches += 1
+
+            if digest == self._price_digest and self.data is not None:
+                # Same payload as last time, keep the derived data as is so
+                # the entities are not written
+                self.metrics.cache_hits += 1
+                self._async_refresh_done(success=True)
+                if not self._stale:
+                    return self.data
+                self._stale = False
+                return self._build_data()
+
+            previous_slot_seconds = self._series.slot_seconds
+            with timed() as parse_time:
+                self._series = self.api_client.parse_prices(
+                    data, time_zone=dt_util.DEFAULT_TIME_ZONE
+                )
+            self.metrics.parse_time = parse_time[0]
+            if self._series.slot_seconds != previous_slot_seconds and self._unsub_tick:
+                # The feed changed its resolution, follow the new boundaries
+                self._unsub_tick()
+                self._async_schedule_tick()
+            self._async_rebuild_timeline()
+            self._last_update = dt_util.utcnow()
+            self._stale = False
+            self._async_run_auto_plan()
+        except Exception as err:
+            self._async_refresh_done(success=False)
+            if self.data is not None and self._has_future_prices():
+                # Keep serving the cached prices that still lie ahead, so the
+                # entities stay available and mode automations keep running
+                _LOGGER.warning("Error updating data, serving cached prices: %s", err)
+                self._stale = True
+                return self._build_data()
+            _LOGGER.error("Error updating data: %s", err)
+            raise UpdateFailed(f"Error communicating with API: {err}")
 
-            # Load schedule from storage
-            await self._async_load_schedule()
+        # Storage errors are not API failures, the prices are fresh either way
+        if await self._async_persist_prices(digest):
+            self._price_digest = digest
+        self._async_refresh_done(success=True)
+        return self._build_data()
 
-            # Get current hour schedule
-            current_hour = datetime.now().replace(minute=0, second=0, microsecond=0)
-            current_hour_str = current_hour.strftime("%Y-%m-%dT%H:00:00")
-            current_mode = self._schedule.get(current_hour_str, MODE_DEFAULT)
+    async def _async_persist_prices(self, digest: str) -> bool:
+        """Save and archive freshly fetched prices, returning whether it worked.
 
-            # Calculate statistics
-            price_values = list(self._prices.values())
-            avg_price = sum(price_values) / len(price_values) if price_values else 0
-            min_price = min(price_values) if price_values else 0
-            max_price = max(price_values) if price_values else 0
+        The digest of prices that could not be written is not kept, so the
+        next fetch processes and writes them again.
+        """
+        try:
+            await self._async_save_prices(digest)
+            await self._async_archive_prices()
+        except (OSError, HomeAssistantError) as err:
+            _LOGGER.error("Error saving fetched prices: %s", err)
+            return False
+        return True
 
-            # Get current and next price
-            current_price = self._prices.get(current_hour_str)
-            next_hour_str = (current_hour + timedelta(hours=1)).strftime("%Y-%m-%dT%H:00:00")
-            next_price = self._prices.get(next_hour_str)
+    @callback
+    def _async_refresh_done(self, success: bool) -> None:
+        """Count a refresh, choose when to fetch next and publish the metrics."""
+        if success:
+            self.metrics.refresh_successes += 1
+            self.update_interval = self._next_fetch_interval()
+        else:
+            self.metrics.refresh_failures += 1
+            # Wait for the circuit to let a trial request through rather
+            # than poll a suspended API
+            self.update_interval = max(
+                timedelta(minutes=DEFAULT_SCAN_INTERVAL),
+                timedelta(seconds=self.api_client.breaker.retry_in),
+            )
+        self.metrics.next_fetch = dt_util.utcnow() + self.update_interval
+        self._async_publish_metrics()
 
-            return {
-                "prices": self._prices,
-                "schedule": self._schedule,
-                "current_mode": current_mode,
-                "current_price": current_price,
-                "next_price": next_price,
-                "average_price": avg_price,
-                "min_price": min_price,
-                "max_price": max_price,
-                "last_update": datetime.now().isoformat(),
-            }
+    @callback
+    def _async_publish_metrics(self) -> None:
+        """Tell the diagnostic sensors that the metrics changed."""
+        async_dispatcher_send(self.hass, self.metrics_signal)
 
-        except Exception as err:
-            _LOGGER.error(f"Error updating data: {err}")
-            raise UpdateFailed(f"Error communicating with API: {err}")
+    @property
+    def metrics_signal(self) -> str:
+        """Return the dispatcher signal sent when the metrics change."""
+        return f"{DOMAIN}_metrics_{self.config_entry.entry_id}"
+
+    @property
+    def shutdown_signal(self) -> str:
+        """Return the dispatcher signal sent when the coordinator shuts down."""
+        return f"{DOMAIN}_shutdown_{self.config_entry.entry_id}"
+
+    @property
+    def series(self) -> PriceSeries:
+        """Return the cached prices."""
+        return self._series
+
+    def _has_future_prices(self) -> bool:
+        """Return whether the cached prices cover the current slot or later."""
+        end = self._series.end
+        return end is not None and end > dt_util.utcnow()
+
+    def _current_slot(self) -> datetime:
+        """Return the UTC start of the current slot."""
+        return floor_to_slot(dt_util.utcnow(), self._series.slot_seconds)
+
+    def _build_data(self) -> dict[str, Any]:
+        """Derive the per-hour fields from cached prices and schedule."""
+        series = self._series
+        now = dt_util.utcnow()
+        stats = series.stats
+        today = dt_util.now().date()
+
+        current_price = series.price_at(now)
+        today_stats = series.day_stats(today)
+
+        return {
+            "series": series,
+            "prices": series.prices,
+            **self._build_schedule_data(),
+            **self._build_rank_data(current_price, today_stats),
+            "current_price": current_price,
+            "next_price": series.price_at(now + series.slot_length),
+            "average_price": stats.mean if stats else 0,
+            "min_price": stats.min if stats else 0,
+            "max_price": stats.max if stats else 0,
+            "today_stats": today_stats,
+            "tomorrow_stats": series.day_stats(today + timedelta(days=1)),
+            "last_update": self._last_update.isoformat() if self._last_update else None,
+            "stale": self._stale,
+        }
+
+    @staticmethod
+    def _build_rank_data(price: float | None, stats: PriceStats | None) -> dict[str, Any]:
+        """Rank the current price among the prices of the local day.
+
+        The sorted prices of the day are computed once per fetch, so ranking
+        at every slot boundary is a binary search.
+        """
+        if price is None or stats is None:
+            return {"current_rank": None, "current_percentile": None, "current_level": None}
+
+        band = abs(stats.mean) * PRICE_LEVEL_BAND
+        if price < stats.mean - band:
+            level = PRICE_LEVEL_CHEAP
+        elif price > stats.mean + band:
+            level = PRICE_LEVEL_EXPENSIVE
+        else:
+            level = PRICE_LEVEL_NORMAL
+        return {
+            "current_rank": stats.rank(price),
+            "current_percentile": stats.percent_rank(price),
+            "current_level": level,
+        }
+
+    def _build_schedule_data(self) -> dict[str, Any]:
+        """Derive the schedule fields, rebuilt on every schedule or rule edit."""
+        return {
+            "schedule": dict(self._schedule),
+            "rules": self._rules.rules,
+            "modes": self._slot_modes(),
+            "current_mode": self.mode_at(dt_util.utcnow()),
+        }
+
+    def _slot_modes(self) -> dict[str, str]:
+        """Return the resolved mode of every priced slot not in Default mode.
+
+        Unlike the schedule this includes the slots set by rules and by the
+        entry on their full hour, as the executor will act on them.
+        """
+        modes = {}
+        for key in self._series.prices:
+            mode = self._mode_for_key(key, parse_timestamp(key))
+            if mode != MODE_DEFAULT:
+                modes[key] = mode
+        return modes
+
+    def _mode_for_key(self, key: str, start: datetime | None = None) -> str:
+        """Return the mode of the slot with the given key.
+
+        An entry on a full hour also covers the slots of that hour without an
+        entry of their own, so hourly schedules keep working with shorter
+        slots and an hour can be refined slot by slot. Slots without an entry
+        take the mode of the first rule matching them.
+        """
+        mode = self._schedule.get(key)
+        if mode is None:
+            mode = self._schedule.get(hour_key(key))
+        if mode is None and self._rules:
+            if start is None:
+                start = parse_timestamp(key)
+            mode = self._rules.mode_at(start, self._series.price_at(start))
+        return mode or MODE_DEFAULT
+
+    def mode_at(self, moment: datetime) -> str:
+        """Return the mode of the slot containing the given moment."""
+        start = floor_to_slot(moment, self._series.slot_seconds)
+        return self._mode_for_key(slot_key(start), start)
+
+    def next_mode_change(self, after: datetime) -> tuple[datetime, str] | None:
+        """Return the start and mode of the next slot whose mode differs.
+
+        The mode can only change where an entry starts or where its cover
+        ends, where the window of a rule starts or ends, and at the slots of
+        the known prices while price rules exist, so only those boundaries
+        are looked at. Rules repeat weekly, so a week of their boundaries is
+        enough. None means the mode stays as it is for the rest of the
+        schedule.
+        """
+        series = self._series
+        step = series.slot_seconds
+        current = self.mode_at(after)
+        boundaries: set[datetime] = set()
+        for key in self._schedule:
+            start = parse_timestamp(key)
+            length = HOUR_SECONDS if hour_key(key) == key else step
+            for offset in (0, step, length):
+                boundaries.add(floor_to_slot(start + timedelta(seconds=offset), step))
+        for moment in self._rules.boundaries(after, after + timedelta(days=7, seconds=step)):
+            boundaries.add(floor_to_slot(moment, step))
+        if self._rules.has_price_rules:
+            first, last = series.slot_range(after)
+            # The end of the prices too, where price rules stop matching
+            boundaries.update(series.slot_start(index) for index in range(first, last + 1))
+
+        for moment in sorted(moment for moment in boundaries if moment > after):
+            mode = self.mode_at(moment)
+            if mode != current:
+                return moment, mode
+        return None
+
+    @callback
+    def async_start_tick(self) -> None:
+        """Start recomputing the current hour fields at every slot boundary."""
+        self._async_schedule_tick()
+
+    @callback
+    def _async_schedule_tick(self) -> None:
+        """Arm the timer for the next slot boundary."""
+        boundary = self._current_slot() + self._series.slot_length
+        self._unsub_tick = async_track_point_in_utc_time(
+            self.hass, self._async_handle_tick, boundary
+        )
+
+    @callback
+    def _async_handle_tick(self, _now: datetime) -> None:
+        """Re-derive the current hour fields from cached data."""
+        self._unsub_tick = None
+        self._async_schedule_tick()
+        self._async_prune_schedule()
+        self._async_extend_timeline()
+        if self.data is not None:
+            self._async_publish()
+
+    @callback
+    def _async_publish(self) -> None:
+        """Push locally derived data to the entities.
+
+        Unlike async_set_updated_data this leaves the price fetch timer alone,
+        which may be hours away.
+        """
+        self.data = self._build_data()
+        self.async_update_listeners()
+
+    @callback
+    def _async_publish_schedule(self) -> None:
+        """Push schedule edits to the entities without fetching prices."""
+        if self.data is None:
+            return
+        self.data = {
+            **self.data,
+            **self._build_schedule_data(),
+        }
+        self.async_update_listeners()
+
+    async def async_shutdown(self) -> None:
+        """Cancel the slot timer, flush the schedule and totals and stop refreshing."""
+        if self._unsub_tick is not None:
+            self._unsub_tick()
+            self._unsub_tick = None
+        async_dispatcher_send(self.hass, self.shutdown_signal)
+        await self.async_flush_schedule()
+        await self.accounting.async_save()
+        await super().async_shutdown()
+
+    def _next_fetch_interval(self) -> timedelta:
+        """Return the delay until prices are worth fetching again.
+
+        Day-ahead prices are published once a day, so there is nothing new to
+        fetch while the cache already holds tomorrow. Until then we wait for
+        the publication hour and poll at the default interval once it passed.
+        """
+        now = dt_util.now()
+        retry = timedelta(minutes=DEFAULT_SCAN_INTERVAL)
+        covered_until = self._series.end
+
+        if covered_until is None or covered_until <= now + self._series.slot_length:
+            return retry
+
+        today = dt_util.start_of_local_day(now)
+        publication = today.replace(hour=PRICE_PUBLICATION_HOUR)
+
+        if covered_until >= dt_util.start_of_local_day(today.date() + timedelta(days=2)):
+            # Tomorrow is covered, the next publication is tomorrow's
+            return publication + timedelta(days=1) - now
+
+        if now < publication:
+            return publication - now
+
+        return retry
 
     async def async_set_schedule(self, hour: str, mode: str) -> None:
         """Set schedule for a specific hour."""
         self._schedule[hour] = mode
-        await self._async_save_schedule()
-        await self.async_request_refresh()
+        self.timeline.update([hour])
+        self._async_schedule_save()
+        self._async_publish_schedule()
 
     async def async_clear_schedule(self, hour: str) -> None:
         """Clear schedule for a specific hour."""
         if hour in self._schedule:
             del self._schedule[hour]
-            await self._async_save_schedule()
-            await self.async_request_refresh()
+            self.timeline.update([hour])
+            self._async_schedule_save()
+            self._async_publish_schedule()
+
+    async def async_update_schedule(self, changes: dict[str, str | None]) -> None:
+        """Apply several schedule changes at once, a None mode clears the hour."""
+        self._apply_schedule_changes(changes)
+        self._async_schedule_save()
+        self._async_publish_schedule()
+
+    def _apply_schedule_changes(self, changes: dict[str, str | None]) -> None:
+        """Write schedule changes to the in-memory schedule."""
+        for hour, mode in changes.items():
+            if mode is None:
+                self._schedule.pop(hour, None)
+            else:
+                self._schedule[hour] = mode
+        self.timeline.update(changes)
+
+    @callback
+    def _async_rebuild_timeline(self) -> None:
+        """Resolve the calendar timeline again, after the rules or prices changed.
+
+        It covers the hours with schedule entries and, while there are
+        rules, every hour from the retained past to the end of the prices or
+        CALENDAR_RULE_HORIZON ahead, whichever is later.
+        """
+        keys = list(self._schedule)
+        self._timeline_until = None
+        if self._rules:
+            now = dt_util.utcnow()
+            until = max(now + CALENDAR_RULE_HORIZON, self._series.end or now)
+            keys.extend(self.slot_keys(self._current_slot() - self._schedule_retention, until))
+            self._timeline_until = until
+        self.timeline.rebuild(keys, self._series.slot_seconds)
+
+    @callback
+    def _async_extend_timeline(self) -> None:
+        """Resolve the hours the rule horizon of the timeline moved over."""
+        if self._timeline_until is None:
+            return
+        until = dt_util.utcnow() + CALENDAR_RULE_HORIZON
+        if until > self._timeline_until:
+            self.timeline.update(self.slot_keys(self._timeline_until, until))
+            self._timeline_until = until
+
+    @property
+    def rules(self) -> list[dict[str, Any]]:
+        """Return the recurring rules, in the order they are matched."""
+        return self._rules.rules
+
+    async def async_add_rule(self, rule: dict[str, Any]) -> str:
+        """Add a rule after the existing ones and return its id."""
+        rule = {ATTR_RULE_ID: ulid_now(), **rule}
+        self._set_rules([*self._rules.rules, rule])
+        return rule[ATTR_RULE_ID]
+
+    async def async_remove_rule(self, rule_id: str) -> bool:
+        """Remove a rule, returning whether it existed."""
+        rules = [rule for rule in self._rules.rules if rule[ATTR_RULE_ID] != rule_id]
+        if len(rules) == len(self._rules.rules):
+            return False
+        self._set_rules(rules)
+        return True
+
+    @callback
+    def _set_rules(self, rules: list[dict[str, Any]]) -> None:
+        """Replace the rules, rebuilding their index."""
+        self._rules = ScheduleRules(rules, dt_util.DEFAULT_TIME_ZONE)
+        self._async_rebuild_timeline()
+        self._async_schedule_save()
+        self._async_publish_schedule()
+
+    async def async_plan(self, plan: dict[str, Any]) -> dict[str, str]:
+        """Fill the schedule from the cached prices and return the planned modes.
+
+        The plan replaces the schedule from the current slot to the end of its
+        window. An automatic plan is kept and run again whenever the fetched
+        prices reach further, any other plan stops it.
+        """
+        changes = self._plan_changes(plan)
+        if plan.get(ATTR_AUTO):
+            self._auto_plan = plan
+            end = self._series.end
+            self._planned_until = int(end.timestamp()) if end else None
+        else:
+            self._auto_plan = None
+            self._planned_until = None
+
+        await self.async_update_schedule(changes)
+        return {hour: mode for hour, mode in changes.items() if mode is not None}
+
+    def _plan_changes(self, plan: dict[str, Any]) -> dict[str, str | None]:
+        """Run a planner over the cached prices, from the current slot on."""
+        series = self._series
+        end = None
+        if ATTR_DEADLINE in plan:
+            end = self._next_deadline(dt_util.parse_time(plan[ATTR_DEADLINE]))
+        first, last = series.slot_range(self._current_slot(), end)
+
+        if plan[ATTR_STRATEGY] == STRATEGY_BATTERY:
+            battery = Battery(
+                capacity=plan[ATTR_CAPACITY],
+                charge_rate=plan[ATTR_CHARGE_RATE],
+                discharge_rate=plan[ATTR_DISCHARGE_RATE],
+                efficiency=plan[ATTR_EFFICIENCY],
+                soc=plan[ATTR_SOC],
+            )
+            modes = plan_battery(series, first, last, battery)
+        else:
+            modes = plan_cheapest(series, first, last, plan[ATTR_COUNT], plan[ATTR_MODE])
+
+        changes = {
+            slot_key(series.slot_start(first + offset)): None if mode == MODE_DEFAULT else mode
+            for offset, mode in enumerate(modes)
+        }
+        # A cleared slot would fall back to the entry on its full hour
+        for key, mode in changes.items():
+            hour = hour_key(key)
+            if mode is None and hour != key and changes.get(hour, self._schedule.get(hour)):
+                changes[key] = MODE_DEFAULT
+        return changes
+
+    def query_prices(self, query: dict[str, Any]) -> dict[str, Any]:
+        """Answer a price query over the cached prices.
+
+        The window is [start, end), from the current slot unless a start is
+        given and to the end of the known prices unless an end or deadline
+        is given. Answers are memoised by the price series, which is only
+        replaced when new prices are fetched.
+        """
+        series = self._series
+        end = query.get(ATTR_END)
+        if ATTR_DEADLINE in query:
+            end = self._next_deadline(query[ATTR_DEADLINE])
+        first, last = series.slot_range(query.get(ATTR_START, self._current_slot()), end)
+        kind = query[ATTR_QUERY]
+
+        if kind in (QUERY_CHEAPEST_WINDOW, QUERY_EXPENSIVE_WINDOW):
+            slots = max(-(-query[ATTR_DURATION] // series.slot_length), 1)
+            start = series.best_window(
+                first, last, slots, cheapest=kind == QUERY_CHEAPEST_WINDOW
+            )
+            if start is None:
+                return {"start": None, "end": None, "average": None}
+            return {
+                "start": series.slot_start(start).isoformat(),
+                "end": series.slot_start(start + slots).isoformat(),
+                "average": series.range_mean(start, start + slots),
+            }
+
+        if kind == QUERY_AVERAGE:
+            return {
+                "average": series.range_mean(first, last),
+                "slots": series.covered_slots(first, last),
+            }
+
+        indexes = series.extreme_slots(
+            first, last, query[ATTR_COUNT], cheapest=kind == QUERY_CHEAPEST
+        )
+        return {
+            "slots": [
+                {"start": series.slot_start(index).isoformat(), "price": series.values[index]}
+                for index in indexes
+            ]
+        }
+
+    @staticmethod
+    def _next_deadline(deadline: time) -> datetime:
+        """Return the next occurrence of a local time of day."""
+        now = dt_util.now()
+        moment = datetime.combine(now.date(), deadline, now.tzinfo)
+        if moment <= now:
+            moment = datetime.combine(now.date() + timedelta(days=1), deadline, now.tzinfo)
+        return moment
+
+    @callback
+    def _async_run_auto_plan(self) -> None:
+        """Run the automatic plan again when the prices reach further than before."""
+        end = self._series.end
+        if self._auto_plan is None or end is None:
+            return
+        if self._planned_until is not None and int(end.timestamp()) <= self._planned_until:
+            return
+
+        changes = self._plan_changes(self._auto_plan)
+        self._planned_until = int(end.timestamp())
+        self._apply_schedule_changes(changes)
+        self._async_schedule_save()
+        _LOGGER.info(
+            "Planned %s slots with the %s strategy",
+            len(changes),
+            self._auto_plan[ATTR_STRATEGY],
+        )
 
     async def async_get_schedule(self) -> dict[str, str]:
         """Get the current schedule."""
         return self._schedule.copy()
 
     async def async_get_mode_for_hour(self, hour: str) -> str:
-        """Get the mode for a specific hour."""
-        return self._schedule.get(hour, MODE_DEFAULT)
+        """Get the mode for a specific slot."""
+        return self._mode_for_key(hour)
+
+    def slot_keys(self, start: datetime, end: datetime) -> list[str]:
+        """Return the keys of the slots from start (inclusive) to end (exclusive).
+
+        Slots have the length of the current price series.
+        """
+        step = self._series.slot_seconds
+        first = int(floor_to_slot(start, step).timestamp())
+        return [
+            slot_key(datetime.fromtimestamp(timestamp, dt_util.UTC))
+            for timestamp in range(first, int(end.timestamp()), step)
+        ]
+
+    async def async_load(self) -> None:
+        """Load persisted state, the in-memory copy is authoritative afterwards."""
+        await self._async_load_schedule()
+        self._async_prune_schedule()
+        await self._async_load_prices()
+        await self.accounting.async_load()
+
+    async def _async_load_prices(self) -> None:
+        """Restore the last fetched prices.
+
+        When they still cover the future the coordinator gets data right away,
+        so the entities are available before the first fetch completes.
+        """
+        data = await self._price_store.async_load()
+        if not data:
+            return
+
+        try:
+            series = PriceSeries.from_dict(
+                data["series"], time_zone=dt_util.DEFAULT_TIME_ZONE
+            )
+            last_update = dt_util.parse_datetime(data["last_update"])
+        except (KeyError, TypeError, ValueError) as err:
+            _LOGGER.warning("Ignoring invalid price cache: %s", err)
+            return
+
+        self._series = series
+        self._async_rebuild_timeline()
+        self._price_digest = data.get("digest")
+        self._last_update = last_update
+        if self._has_future_prices():
+            self.data = self._build_data()
+            self.update_interval = self._next_fetch_interval()
+            _LOGGER.debug("Restored %s cached price slots", len(series))
+
+    async def _async_save_prices(self, digest: str) -> None:
+        """Save the fetched prices, written only when they changed."""
+        await self._price_store.async_save(
+            {
+                "series": self._series.as_dict(),
+                "digest": digest,
+                "last_update": self._last_update.isoformat() if self._last_update else None,
+            }
+        )
+
+    @property
+    def statistic_id(self) -> str:
+        """Return the id of the long-term price statistics of the entry."""
+        return f"{DOMAIN}:price_{self.config_entry.entry_id.lower()}"
+
+    async def _async_archive_prices(self) -> None:
+        """Append newly fetched slots to the archive and import their hours."""
+        series = self._series
+        points = [
+            (series.start + index * series.slot_seconds, value)
+            for index, value in series.items()
+        ]
+        added = await self.hass.async_add_executor_job(self.archive.append, points)
+        if not added or "recorder" not in self.hass.config.components:
+            return
+        # Re-read whole hours, the first one may have been archived in part
+        first = added[0][0] // HOUR_SECONDS * HOUR_SECONDS
+        hours = hourly_statistics(
+            await self.hass.async_add_executor_job(
+                self.archive.query, first, added[-1][0] + 1
+            )
+        )
+
+        _LOGGER.debug("Archived %s price slots", len(added))
+        # Imported here as the recorder is optional, loading it pulls in its requirements
+        from homeassistant.components.recorder.models import (
+            StatisticData,
+            StatisticMetaData,
+        )
+        from homeassistant.components.recorder.statistics import (
+            async_add_external_statistics,
+        )
+
+        async_add_external_statistics(
+            self.hass,
+            StatisticMetaData(
+                has_mean=True,
+                has_sum=False,
+                name=f"{self.config_entry.title} price",
+                source=DOMAIN,
+                statistic_id=self.statistic_id,
+                unit_of_measurement=PRICE_UNIT,
+            ),
+            [
+                StatisticData(
+                    start=datetime.fromtimestamp(start, dt_util.UTC),
+                    mean=mean,
+                    min=minimum,
+                    max=maximum,
+                )
+                for start, mean, minimum, maximum in hours
+            ],
+        )
+
+    async def async_get_price_history(
+        self, start: datetime, end: datetime
+    ) -> dict[str, float]:
+        """Return the archived prices of the slots starting within [start, end)."""
+        points = await self.hass.async_add_executor_job(
+            self.archive.query, int(start.timestamp()), int(end.timestamp())
+        )
+        return {
+            slot_key(datetime.fromtimestamp(timestamp, dt_util.UTC)): price
+            for timestamp, price in points
+        }
 
     async def _async_load_schedule(self) -> None:
         """Load schedule from storage."""
         data = await self._store.async_load()
         if data:
             self._schedule = data.get("schedule", {})
-            _LOGGER.debug(f"Loaded schedule: {self._schedule}")
+            self._rules = ScheduleRules(data.get("rules", []), dt_util.DEFAULT_TIME_ZONE)
+            self._archive = data.get("archive", [])
+            self._auto_plan = data.get("plan")
+            self._planned_until = data.get("planned_until")
+            self._async_rebuild_timeline()
+            _LOGGER.debug("Loaded schedule: %s", self._schedule)
+
+    @callback
+    def _async_prune_schedule(self) -> None:
+        """Drop schedule entries older than the retention window."""
+        cutoff = slot_key(self._current_slot() - self._schedule_retention)
+        # Keys are ISO timestamps, so string order is chronological order
+        expired = sorted(hour for hour in self._schedule if hour < cutoff)
+        if not expired:
+            return
+
+        for index, hour in enumerate(expired):
+            mode = self._schedule.pop(hour)
+            if self._archive_schedule:
+                following = expired[index + 1] if index + 1 < len(expired) else None
+                self._archive_hour(hour, mode, following)
+        self.timeline.update(expired)
+
+        _LOGGER.debug("Pruned %s expired schedule entries", len(expired))
+        self._async_schedule_save()
+
+    def _archive_hour(self, hour: str, mode: str, following: str | None) -> None:
+        """Append an expired entry to the run-length encoded archive.
+
+        An entry on a full hour lasts the hour, others one slot, either ending
+        early at the following entry.
+        """
+        length = HOUR_SECONDS if hour_key(hour) == hour else self._series.slot_seconds
+        end = slot_key(parse_timestamp(hour) + timedelta(seconds=length))
+        if following is not None:
+            end = min(end, following)
+        if self._archive:
+            last = self._archive[-1]
+            if last[1] == hour and last[2] == mode:
+                last[1] = end
+                return
+        self._archive.append([hour, end, mode])
+        del self._archive[:-SCHEDULE_ARCHIVE_MAX_SEGMENTS]
+
+    @callback
+    def _async_schedule_save(self) -> None:
+        """Save the schedule after SCHEDULE_SAVE_DELAY, coalescing later edits.
+
+        The store writes a pending save when Home Assistant stops as well.
+        """
+        self._schedule_dirty = True
+        self._store.async_delay_save(self._schedule_data_to_save, SCHEDULE_SAVE_DELAY)
+
+    async def async_flush_schedule(self) -> None:
+        """Save a pending schedule change right away, replacing the delayed save."""
+        if self._schedule_dirty:
+            await self._store.async_save(self._schedule_data_to_save())
 
-    async def _async_save_schedule(self) -> None:
-        """Save schedule to storage."""
-        await self._store.async_save({"schedule": self._schedule})
-        _LOGGER.debug(f"Saved schedule: {self._schedule}")
+    @callback
+    def _schedule_data_to_save(self) -> dict[str, Any]:
+        """Return the stored form of the schedule, called for every write."""
+        self._schedule_dirty = False
+        self.metrics.schedule_saves += 1
+        self._async_publish_metrics()
+        _LOGGER.debug("Saving schedule: %s", self._schedule)
+        return {
+            "schedule": self._schedule,
+            "rules": self._rules.rules,
+            "archive": self._archive,
+            "plan": self._auto_plan,
+            "planned_until": self._planned_until,
+        }
@@ -0,0 +1,53 @@
+"""Diagnostics support for Pstryk Energy Scheduler."""
+from __future__ import annotations
+
+from typing import Any
+
+from homeassistant.components.diagnostics import async_redact_data
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant
+
+from .const import CONF_API_KEY, DOMAIN
+from .coordinator import PstrykDataUpdateCoordinator
+
+TO_REDACT = {CONF_API_KEY}
+
+
+async def async_get_config_entry_diagnostics(
+    hass: HomeAssistant, entry: ConfigEntry
+) -> dict[str, Any]:
+    """Return diagnostics for a config entry."""
+    coordinator: PstrykDataUpdateCoordinator = hass.data[DOMAIN][entry.entry_id]
+    series = coordinator.data["series"] if coordinator.data else None
+    breaker = coordinator.api_client.breaker
+
+    return {
+        "entry": async_redact_data(entry.as_dict(), TO_REDACT),
+        "metrics": coordinator.metrics.as_dict(),
+        "coordinator": {
+            "last_update_success": coordinator.last_update_success,
+            "update_interval": str(coordinator.update_interval),
+            "stale": coordinator.data.get("stale") if coordinator.data else None,
+            "last_update": coordinator.data.get("last_update") if coordinator.data else None,
+        },
+        "api": {
+            "circuit_open": breaker.is_open,
+            "consecutive_failures": breaker.failures,
+            "last_response_bytes": coordinator.api_client.last_response_bytes,
+        },
+        "prices": {
+            "slots": len(series),
+            "slot_seconds": series.slot_seconds,
+            "start": series.slot_start(0).isoformat() if len(series) else None,
+            "end": series.end.isoformat() if series.end else None,
+        }
+        if series is not None
+        else None,
+        "schedule": await coordinator.async_get_schedule(),
+        "rules": coordinator.rules,
+        "accounting": {
+            "meters": list(coordinator.accounting.meters),
+            "slots": len(coordinator.accounting.slots),
+            "modes": coordinator.accounting.mode_totals(),
+        },
+    }
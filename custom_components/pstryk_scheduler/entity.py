@@ -0,0 +1,44 @@
+"""Base entity for Pstryk Energy Scheduler."""
+from __future__ import annotations
+
+from typing import Any
+
+from homeassistant.core import callback
+from homeassistant.helpers.update_coordinator import CoordinatorEntity
+
+from .const import DOMAIN
+from .coordinator import PstrykDataUpdateCoordinator
+
+
+class PstrykEntity(CoordinatorEntity[PstrykDataUpdateCoordinator]):
+    """Base class for the entities of a Pstryk entry."""
+
+    def __init__(self, coordinator: PstrykDataUpdateCoordinator, entity_type: str) -> None:
+        """Initialize the entity."""
+        super().__init__(coordinator)
+        self._entity_type = entity_type
+        self._attr_has_entity_name = True
+        self._written_state: tuple[Any, ...] | None = None
+
+    @property
+    def device_info(self) -> dict[str, Any]:
+        """Return device information."""
+        return {
+            "identifiers": {(DOMAIN, self.coordinator.config_entry.entry_id)},
+            "name": self.coordinator.config_entry.title,
+            "manufacturer": "Pstryk",
+            "model": "Energy Scheduler",
+        }
+
+    def _state_fingerprint(self) -> tuple[Any, ...]:
+        """Return what makes up the written state of the entity."""
+        return (self.available, self.state, self.extra_state_attributes)
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """Write the state only when it semantically changed."""
+        fingerprint = self._state_fingerprint()
+        if fingerprint == self._written_state:
+            return
+        self._written_state = fingerprint
+        self.async_write_ha_state()
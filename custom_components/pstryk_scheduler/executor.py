@@ -0,0 +1,146 @@
+"""Mode executor for Pstryk Energy Scheduler."""
+from __future__ import annotations
+
+import logging
+from datetime import datetime
+
+from homeassistant.const import ATTR_ENTITY_ID, SERVICE_TURN_ON
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.exceptions import HomeAssistantError
+from homeassistant.helpers.event import async_track_point_in_utc_time
+from homeassistant.util import dt as dt_util
+
+from .const import ATTR_CONFIG_ENTRY_ID, DOMAIN, EVENT_MODE_CHANGED
+from .coordinator import PstrykDataUpdateCoordinator
+
+_LOGGER = logging.getLogger(__name__)
+
+SCRIPT_DOMAIN = "script"
+
+
+class PstrykModeExecutor:
+    """Run the action mapped to a mode when the scheduled mode changes.
+
+    A single timer is armed for the next slot whose mode differs from the
+    current one, and armed again whenever the coordinator publishes a change,
+    so slot boundaries where the mode stays the same cost nothing.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        coordinator: PstrykDataUpdateCoordinator,
+        actions: dict[str, str],
+    ) -> None:
+        """Initialize the executor with the script entity to run per mode."""
+        self.hass = hass
+        self.coordinator = coordinator
+        self._actions = actions
+        self._mode: str | None = None
+        self._unsub_timer: CALLBACK_TYPE | None = None
+        self._unsub_listener: CALLBACK_TYPE | None = None
+
+    @property
+    def mode(self) -> str | None:
+        """Return the mode the executor last acted on."""
+        return self._mode
+
+    @callback
+    def async_start(self) -> CALLBACK_TYPE:
+        """Start following the schedule and return a callback stopping it.
+
+        The mode in force at start is taken as it is, its action only runs
+        when the schedule changes it.
+        """
+        self._mode = self.coordinator.mode_at(dt_util.utcnow())
+        self._unsub_listener = self.coordinator.async_add_listener(
+            self._async_handle_update
+        )
+        self._async_arm()
+        return self.async_stop
+
+    @callback
+    def async_stop(self) -> None:
+        """Stop following the schedule."""
+        if self._unsub_listener is not None:
+            self._unsub_listener()
+            self._unsub_listener = None
+        if self._unsub_timer is not None:
+            self._unsub_timer()
+            self._unsub_timer = None
+
+    @callback
+    def _async_handle_update(self) -> None:
+        """Check the mode again after the coordinator published new data."""
+        self._async_evaluate()
+
+    @callback
+    def _async_handle_transition(self, _now: datetime) -> None:
+        """Apply the mode starting at the armed transition."""
+        self._unsub_timer = None
+        self._async_evaluate()
+
+    @callback
+    def _async_evaluate(self) -> None:
+        """Act on a changed mode and arm the timer for the next transition."""
+        mode = self.coordinator.mode_at(dt_util.utcnow())
+        if mode != self._mode:
+            previous = self._mode
+            self._mode = mode
+            self._async_mode_changed(previous, mode)
+        self._async_arm()
+
+    @callback
+    def _async_arm(self) -> None:
+        """Arm the timer for the next slot with a different mode."""
+        if self._unsub_timer is not None:
+            self._unsub_timer()
+            self._unsub_timer = None
+
+        change = self.coordinator.next_mode_change(dt_util.utcnow())
+        if change is None:
+            return
+        moment, mode = change
+        _LOGGER.debug("Next mode change to %s at %s", mode, moment.isoformat())
+        self._unsub_timer = async_track_point_in_utc_time(
+            self.hass, self._async_handle_transition, moment
+        )
+
+    @callback
+    def _async_mode_changed(self, previous: str | None, mode: str) -> None:
+        """Announce the new mode and run its action."""
+        entry = self.coordinator.config_entry
+        _LOGGER.info("Mode of %s changed from %s to %s", entry.title, previous, mode)
+        self.hass.bus.async_fire(
+            EVENT_MODE_CHANGED,
+            {
+                ATTR_CONFIG_ENTRY_ID: entry.entry_id,
+                "mode": mode,
+                "previous_mode": previous,
+            },
+        )
+
+        script = self._actions.get(mode)
+        if script:
+            entry.async_create_background_task(
+                self.hass,
+                self._async_run_action(script, previous, mode),
+                f"{DOMAIN} {mode} action",
+            )
+
+    async def _async_run_action(
+        self, script: str, previous: str | None, mode: str
+    ) -> None:
+        """Start the script mapped to a mode, passing both modes as variables."""
+        try:
+            await self.hass.services.async_call(
+                SCRIPT_DOMAIN,
+                SERVICE_TURN_ON,
+                {
+                    ATTR_ENTITY_ID: script,
+                    "variables": {"mode": mode, "previous_mode": previous},
+                },
+                blocking=True,
+            )
+        except HomeAssistantError as err:
+            _LOGGER.error("Error running %s for mode %s: %s", script, mode, err)
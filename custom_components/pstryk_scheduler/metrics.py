@@ -0,0 +1,52 @@
+"""Runtime metrics for Pstryk Energy Scheduler."""
+from __future__ import annotations
+
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+from datetime import datetime
+from typing import Any
+
+
+@contextmanager
+def timed() -> Iterator[list[float]]:
+    """Measure the block, the elapsed milliseconds are appended on exit."""
+    elapsed: list[float] = []
+    start = time.perf_counter()
+    try:
+        yield elapsed
+    finally:
+        elapsed.append((time.perf_counter() - start) * 1000)
+
+
+@dataclass
+class RuntimeMetrics:
+    """Counters and timings of the refresh and save paths of an entry.
+
+    They are kept in memory only and start over when the entry is loaded.
+    """
+
+    fetch_latency: float | None = None  # ms of the last fetch, retries included
+    payload_bytes: int | None = None  # body size of the last response, 0 for a 304
+    parse_time: float | None = None  # ms to parse the last changed payload
+    refresh_successes: int = 0
+    refresh_failures: int = 0
+    fetches: int = 0  # successful fetches
+    cache_hits: int = 0  # successful fetches that returned the prices already held
+    schedule_saves: int = 0  # schedule writes, each coalescing a burst of edits
+    next_fetch: datetime | None = None
+
+    @property
+    def cache_hit_ratio(self) -> float | None:
+        """Return the share of fetches that found the prices unchanged, in percent."""
+        if not self.fetches:
+            return None
+        return self.cache_hits / self.fetches * 100
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the metrics in a JSON serialisable form."""
+        data = asdict(self)
+        data["cache_hit_ratio"] = self.cache_hit_ratio
+        data["next_fetch"] = self.next_fetch.isoformat() if self.next_fetch else None
+        return data
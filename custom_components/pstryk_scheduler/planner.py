@@ -0,0 +1,143 @@
+"""Schedule planning for Pstryk Energy Scheduler.
+
+The planners are pure functions over a price series: they return one mode per
+slot of the planned window and leave applying it to the coordinator.
+"""
+from __future__ import annotations
+
+import heapq
+import math
+from dataclasses import dataclass
+
+from .const import (
+    BATTERY_MAX_SOC_LEVELS,
+    BATTERY_SOC_LEVELS,
+    MODE_BUY,
+    MODE_DEFAULT,
+    MODE_SELL,
+)
+from .prices import PriceSeries
+
+# Keep the battery idle unless acting is better by more than this
+_COST_EPSILON = 1e-9
+
+# Slack for rates that are a whole number of steps up to float error
+_STEP_EPSILON = 1e-9
+
+
+@dataclass(frozen=True)
+class Battery:
+    """Battery parameters for arbitrage planning, energies in kWh and rates in kW."""
+
+    capacity: float
+    charge_rate: float
+    discharge_rate: float
+    efficiency: float
+    soc: float = 0.0
+
+
+def plan_cheapest(
+    series: PriceSeries, first: int, last: int, count: int, mode: str
+) -> list[str]:
+    """Assign a mode to the cheapest slots in [first, last).
+
+    Returns one mode per slot of the window, MODE_DEFAULT for the slots that
+    were not selected and for slots without a price.
+    """
+    candidates = (
+        (series.values[index], index)
+        for index in range(first, last)
+        if not math.isnan(series.values[index])
+    )
+    chosen = {index for _, index in heapq.nsmallest(count, candidates)}
+    return [mode if index in chosen else MODE_DEFAULT for index in range(first, last)]
+
+
+def _rate_step(energy: float, unit: float) -> int:
+    """Return the whole steps of charge a slot at a rate moves, at least one for any rate."""
+    if energy <= 0:
+        return 0
+    return max(math.floor(energy / unit + _STEP_EPSILON), 1)
+
+
+def plan_battery(
+    series: PriceSeries,
+    first: int,
+    last: int,
+    battery: Battery,
+    levels: int = BATTERY_SOC_LEVELS,
+) -> list[str]:
+    """Plan buying and selling for a battery over the slots in [first, last).
+
+    Dynamic programming over the state of charge, discretised into ``levels``
+    steps, or finer when a rate moves less than a step per slot: working
+    backwards from the end of the window, each state keeps the cheapest cost
+    of reaching the end holding at least the starting charge. A slot either
+    charges or discharges at the full rate (clipped at empty and full) or
+    idles, so a plan costs O(slots * levels). Rates are floored to whole
+    steps so a plan moves no more energy than the battery can, short of a
+    rate below one step of the finest grid. The
+    round-trip efficiency is split evenly between charging and discharging,
+    and both use the slot price as there is no separate feed-in price.
+    """
+    if first >= last or battery.capacity <= 0:
+        return [MODE_DEFAULT] * max(last - first, 0)
+
+    hours = series.slot_seconds / 3600
+    charge_energy = battery.charge_rate * hours
+    discharge_energy = battery.discharge_rate * hours
+    smallest = min(
+        (energy for energy in (charge_energy, discharge_energy) if energy > 0), default=0
+    )
+    if 0 < smallest < battery.capacity / levels:
+        levels = min(
+            math.ceil(battery.capacity / smallest - _STEP_EPSILON), BATTERY_MAX_SOC_LEVELS
+        )
+    unit = battery.capacity / levels
+    charge_step = _rate_step(charge_energy, unit)
+    discharge_step = _rate_step(discharge_energy, unit)
+    leg_efficiency = math.sqrt(battery.efficiency)
+    start_level = min(round(battery.soc / unit), levels)
+
+    # cost[level] is the cheapest cost from the current slot to the end
+    cost = [0.0 if level >= start_level else math.inf for level in range(levels + 1)]
+    moves: list[list[int]] = []
+
+    for index in range(last - 1, first - 1, -1):
+        price = series.values[index]
+        slot_cost = list(cost)
+        slot_move = list(range(levels + 1))
+
+        if not math.isnan(price):
+            for level in range(levels + 1):
+                if charge_step:
+                    target = min(level + charge_step, levels)
+                    bought = (target - level) * unit / leg_efficiency
+                    total = bought * price + cost[target]
+                    if total < slot_cost[level] - _COST_EPSILON:
+                        slot_cost[level] = total
+                        slot_move[level] = target
+                if discharge_step:
+                    target = max(level - discharge_step, 0)
+                    sold = (level - target) * unit * leg_efficiency
+                    total = cost[target] - sold * price
+                    if total < slot_cost[level] - _COST_EPSILON:
+                        slot_cost[level] = total
+                        slot_move[level] = target
+
+        cost = slot_cost
+        moves.append(slot_move)
+
+    moves.reverse()
+    modes: list[str] = []
+    level = start_level
+    for slot_move in moves:
+        target = slot_move[level]
+        if target > level:
+            modes.append(MODE_BUY)
+        elif target < level:
+            modes.append(MODE_SELL)
+        else:
+            modes.append(MODE_DEFAULT)
+        level = target
+    return modes
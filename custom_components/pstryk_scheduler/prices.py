@@ -0,0 +1,375 @@
+"""Price series for Pstryk Energy Scheduler."""
+from __future__ import annotations
+
+import heapq
+import logging
+import math
+from array import array
+from bisect import bisect_left
+from collections import OrderedDict
+from collections.abc import Callable, Iterator
+from dataclasses import dataclass
+from datetime import UTC, date, datetime, timedelta, tzinfo
+from functools import cached_property, reduce
+from itertools import pairwise
+from typing import Any
+
+_LOGGER = logging.getLogger(__name__)
+
+# Prices and schedule entries are keyed by the UTC start of their slot
+SLOT_KEY_FORMAT = "%Y-%m-%dT%H:%M:00"
+
+HOUR_SECONDS = 3600
+
+# Slot length assumed when the feed does not reveal one
+DEFAULT_SLOT_SECONDS = HOUR_SECONDS
+
+# Longest an entry may last, the API publishes hourly or finer prices
+MAX_ENTRY_SECONDS = HOUR_SECONDS
+
+# Window and extreme slot answers kept per series, least recently used dropped
+MAX_CACHED_QUERIES = 128
+
+
+def parse_timestamp(value: str) -> datetime:
+    """Parse an ISO timestamp into an aware UTC datetime, naive values are UTC."""
+    moment = datetime.fromisoformat(value)
+    if moment.tzinfo is None:
+        return moment.replace(tzinfo=UTC)
+    return moment.astimezone(UTC)
+
+
+def slot_key(moment: datetime) -> str:
+    """Return the key of the slot starting at the given moment."""
+    if moment.tzinfo is not None:
+        moment = moment.astimezone(UTC)
+    return moment.strftime(SLOT_KEY_FORMAT)
+
+
+def hour_key(key: str) -> str:
+    """Return the key of the full hour containing a slot key."""
+    # Keys are fixed width, "YYYY-MM-DDTHH:" is followed by the minutes
+    return key[:14] + "00:00"
+
+
+def floor_to_slot(moment: datetime, slot_seconds: int) -> datetime:
+    """Return the start of the slot containing the given aware moment."""
+    timestamp = int(moment.timestamp()) // slot_seconds * slot_seconds
+    return datetime.fromtimestamp(timestamp, UTC)
+
+
+def detect_slot_seconds(timestamps: Iterator[int]) -> int:
+    """Return the slot length of a feed from the start times of its entries."""
+    ordered = sorted(set(timestamps))
+    step = reduce(math.gcd, (b - a for a, b in pairwise(ordered)), 0)
+    return step or DEFAULT_SLOT_SECONDS
+
+
+def entry_lengths(timestamps: list[int]) -> list[int]:
+    """Return how long each entry of a feed lasts, from its sorted start times.
+
+    An entry lasts as long as the shorter of the steps to its neighbours, so
+    an hourly entry next to quarter-hour ones still covers its whole hour,
+    and never past the start of the next entry or MAX_ENTRY_SECONDS, so a
+    gap in the feed stays uncovered.
+    """
+    steps = [b - a for a, b in pairwise(timestamps)]
+    lengths = []
+    for index in range(len(timestamps)):
+        neighbours = steps[max(index - 1, 0) : index + 1]
+        lengths.append(min(neighbours + [MAX_ENTRY_SECONDS]))
+    return lengths
+
+
+@dataclass(frozen=True)
+class PriceStats:
+    """Statistics over a set of slot prices."""
+
+    min: float
+    max: float
+    mean: float
+    count: int
+    sorted_values: array
+
+    @classmethod
+    def from_values(cls, values: Iterator[float]) -> PriceStats | None:
+        """Build statistics from prices, None when there are none."""
+        ordered = array("d", sorted(values))
+        if not ordered:
+            return None
+        return cls(
+            min=ordered[0],
+            max=ordered[-1],
+            mean=math.fsum(ordered) / len(ordered),
+            count=len(ordered),
+            sorted_values=ordered,
+        )
+
+    def percentile(self, percent: float) -> float:
+        """Return the price at the given percentile (0-100), interpolated."""
+        position = (self.count - 1) * min(max(percent, 0), 100) / 100
+        lower = int(position)
+        upper = min(lower + 1, self.count - 1)
+        fraction = position - lower
+        return self.sorted_values[lower] * (1 - fraction) + self.sorted_values[upper] * fraction
+
+    def rank(self, price: float) -> int:
+        """Return the 1-based rank of a price, 1 being the cheapest."""
+        return bisect_left(self.sorted_values, price) + 1
+
+    def percent_rank(self, price: float) -> float:
+        """Return where a price ranks from 0 (cheapest) to 100 (most expensive)."""
+        if self.count == 1:
+            return 0.0
+        return (self.rank(price) - 1) / (self.count - 1) * 100
+
+
+class PriceSeries:
+    """Prices for consecutive, equally long slots.
+
+    Slot ``i`` starts at ``start + i * slot_seconds`` (epoch seconds) and its
+    price is ``values[i]``; NaN marks a slot the feed did not cover. Lookups
+    are index arithmetic and statistics are computed once per instance, which
+    is rebuilt on every fetch.
+    """
+
+    def __init__(
+        self,
+        start: int,
+        slot_seconds: int,
+        values: array,
+        time_zone: tzinfo = UTC,
+    ) -> None:
+        """Initialize the series."""
+        self.start = start
+        self.slot_seconds = slot_seconds
+        self.values = values
+        self.time_zone = time_zone
+        self._day_stats: dict[date, PriceStats | None] = {}
+        self._queries: OrderedDict[tuple[Any, ...], Any] = OrderedDict()
+
+    @classmethod
+    def from_api(
+        cls,
+        data: dict[str, Any],
+        slot_seconds: int | None = None,
+        time_zone: tzinfo = UTC,
+    ) -> PriceSeries:
+        """Build a series from a /prices API response.
+
+        Without an explicit slot length it is detected from the feed as the
+        largest step that divides the distance between every two entries, so
+        hourly and quarter-hourly feeds (with gaps) are both handled. Each
+        entry's price fills every slot of its own length, so in a feed moving
+        from hourly to quarter-hourly prices an hour still has a price in all
+        four of its quarter-hour slots.
+        """
+        prices: dict[int, float] = {}
+        for entry in data.get("prices", []):
+            try:
+                timestamp = int(parse_timestamp(entry["hour"]).timestamp())
+                prices[timestamp] = float(entry["price"])
+            except (KeyError, TypeError, ValueError, AttributeError) as err:
+                _LOGGER.warning("Error parsing price entry %s: %s", entry, err)
+
+        if slot_seconds is None:
+            slot_seconds = detect_slot_seconds(iter(prices))
+        if not prices:
+            return cls(0, slot_seconds, array("d"), time_zone)
+
+        timestamps = sorted(prices)
+        lengths = entry_lengths(timestamps)
+        start = timestamps[0] // slot_seconds * slot_seconds
+        end = timestamps[-1] + lengths[-1]
+        values = array("d", [math.nan]) * max(-(-(end - start) // slot_seconds), 1)
+        for timestamp, length in zip(timestamps, lengths):
+            first = (timestamp - start) // slot_seconds
+            last = max(-(-(timestamp + length - start) // slot_seconds), first + 1)
+            values[first:last] = array("d", [prices[timestamp]]) * (last - first)
+
+        return cls(start, slot_seconds, values, time_zone)
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any], time_zone: tzinfo = UTC) -> PriceSeries:
+        """Restore a series saved with as_dict."""
+        values = array(
+            "d", (math.nan if value is None else float(value) for value in data["values"])
+        )
+        return cls(int(data["start"]), int(data["slot_seconds"]), values, time_zone)
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return a JSON serialisable form of the series, gaps become None."""
+        return {
+            "start": self.start,
+            "slot_seconds": self.slot_seconds,
+            "values": [None if math.isnan(value) else value for value in self.values],
+        }
+
+    def __len__(self) -> int:
+        """Return the number of slots."""
+        return len(self.values)
+
+    @property
+    def slot_length(self) -> timedelta:
+        """Return the length of a slot."""
+        return timedelta(seconds=self.slot_seconds)
+
+    @property
+    def end(self) -> datetime | None:
+        """Return the end of the last slot, None for an empty series."""
+        if not self.values:
+            return None
+        return self.slot_start(len(self.values))
+
+    def slot_start(self, index: int) -> datetime:
+        """Return the start of the slot at the given index."""
+        return datetime.fromtimestamp(self.start + index * self.slot_seconds, UTC)
+
+    def index_at(self, moment: datetime) -> int | None:
+        """Return the index of the slot containing the given moment."""
+        index = (int(moment.timestamp()) - self.start) // self.slot_seconds
+        if 0 <= index < len(self.values):
+            return index
+        return None
+
+    def price(self, index: int) -> float | None:
+        """Return the price of a slot, None if it is not covered."""
+        if 0 <= index < len(self.values):
+            value = self.values[index]
+            if not math.isnan(value):
+                return value
+        return None
+
+    def price_at(self, moment: datetime) -> float | None:
+        """Return the price of the slot containing the given moment."""
+        index = self.index_at(moment)
+        return None if index is None else self.price(index)
+
+    def items(self) -> Iterator[tuple[int, float]]:
+        """Iterate over the indexes and prices of covered slots."""
+        for index, value in enumerate(self.values):
+            if not math.isnan(value):
+                yield index, value
+
+    @cached_property
+    def prices(self) -> dict[str, float]:
+        """Return prices keyed by slot key."""
+        return {slot_key(self.slot_start(index)): value for index, value in self.items()}
+
+    @cached_property
+    def stats(self) -> PriceStats | None:
+        """Return statistics over the whole series."""
+        return PriceStats.from_values(value for _, value in self.items())
+
+    @cached_property
+    def _prefix(self) -> tuple[array, array]:
+        """Return prefix sums of the prices and of the number of covered slots."""
+        sums = array("d", [0.0])
+        counts = array("q", [0])
+        total = 0.0
+        covered = 0
+        for value in self.values:
+            if not math.isnan(value):
+                total += value
+                covered += 1
+            sums.append(total)
+            counts.append(covered)
+        return sums, counts
+
+    def covered_slots(self, first: int, last: int) -> int:
+        """Return the number of slots with a price in [first, last)."""
+        counts = self._prefix[1]
+        return counts[last] - counts[first]
+
+    def range_mean(self, first: int, last: int) -> float | None:
+        """Return the mean price of the covered slots in [first, last)."""
+        sums, counts = self._prefix
+        covered = counts[last] - counts[first]
+        if not covered:
+            return None
+        return (sums[last] - sums[first]) / covered
+
+    def _cached_query(self, key: tuple[Any, ...], compute: Callable[[], Any]) -> Any:
+        """Return a query answer, computing it on a miss and evicting the oldest."""
+        if key in self._queries:
+            self._queries.move_to_end(key)
+            return self._queries[key]
+        result = self._queries[key] = compute()
+        if len(self._queries) > MAX_CACHED_QUERIES:
+            self._queries.popitem(last=False)
+        return result
+
+    def best_window(
+        self, first: int, last: int, slots: int, cheapest: bool = True
+    ) -> int | None:
+        """Return the first index of the cheapest (or dearest) run of slots in [first, last).
+
+        Only runs whose slots all have a price qualify, the earliest wins a
+        tie. A miss scans every start in the range, each window summed from
+        the prefix sums; the last MAX_CACHED_QUERIES answers are kept.
+        """
+
+        def scan() -> int | None:
+            sums, counts = self._prefix
+            best: int | None = None
+            best_total = 0.0
+            for start in range(first, last - slots + 1):
+                end = start + slots
+                if counts[end] - counts[start] != slots:
+                    continue
+                total = sums[end] - sums[start]
+                if best is None or (total < best_total if cheapest else total > best_total):
+                    best = start
+                    best_total = total
+            return best
+
+        return self._cached_query(("window", first, last, slots, cheapest), scan)
+
+    def extreme_slots(
+        self, first: int, last: int, count: int, cheapest: bool = True
+    ) -> list[int]:
+        """Return the indexes of the cheapest (or dearest) slots in [first, last), best first."""
+
+        def select() -> list[int]:
+            candidates = (
+                (value if cheapest else -value, index)
+                for index in range(first, last)
+                if not math.isnan(value := self.values[index])
+            )
+            return [index for _, index in heapq.nsmallest(count, candidates)]
+
+        return self._cached_query(("extremes", first, last, count, cheapest), select)
+
+    def slot_range(
+        self, start: datetime | None = None, end: datetime | None = None
+    ) -> tuple[int, int]:
+        """Return the index range [first, last) of the slots lying within [start, end)."""
+        size = len(self.values)
+        first = 0
+        last = size
+        if start is not None:
+            first = -(-(int(start.timestamp()) - self.start) // self.slot_seconds)
+        if end is not None:
+            last = (int(end.timestamp()) - self.start) // self.slot_seconds
+        first = min(max(first, 0), size)
+        return first, min(max(last, first), size)
+
+    def day_range(self, day: date) -> tuple[int, int]:
+        """Return the index range [first, last) of the slots of a local day."""
+        midnight = datetime.combine(day, datetime.min.time(), self.time_zone)
+        next_midnight = datetime.combine(
+            day + timedelta(days=1), datetime.min.time(), self.time_zone
+        )
+        first = -(-(int(midnight.timestamp()) - self.start) // self.slot_seconds)
+        last = -(-(int(next_midnight.timestamp()) - self.start) // self.slot_seconds)
+        size = len(self.values)
+        return min(max(first, 0), size), min(max(last, 0), size)
+
+    def day_stats(self, day: date) -> PriceStats | None:
+        """Return statistics over the slots of a local day."""
+        if day not in self._day_stats:
+            first, last = self.day_range(day)
+            self._day_stats[day] = PriceStats.from_values(
+                value for value in self.values[first:last] if not math.isnan(value)
+            )
+        return self._day_stats[day]
@@ -0,0 +1,140 @@
+"""Recurring schedule rules for Pstryk Energy Scheduler.
+
+A rule sets a mode on some days of the week, within a time of day window
+and, optionally, only while the slot price is above or below a threshold.
+Rules are stored as they were given and resolved for a slot when asked,
+instead of being written out as schedule entries.
+"""
+from __future__ import annotations
+
+from array import array
+from collections.abc import Iterator
+from datetime import datetime, time, timedelta, tzinfo
+from itertools import pairwise
+from typing import Any
+
+from homeassistant.const import WEEKDAYS
+
+from .const import (
+    ATTR_ABOVE,
+    ATTR_AFTER,
+    ATTR_BEFORE,
+    ATTR_BELOW,
+    ATTR_MODE,
+    ATTR_WEEKDAY,
+)
+
+MINUTES_PER_DAY = 24 * 60
+MINUTES_PER_WEEK = 7 * MINUTES_PER_DAY
+
+
+def _minute_of_day(value: str) -> int:
+    """Return the minute of the day of a time given as HH:MM[:SS]."""
+    moment = time.fromisoformat(value)
+    return moment.hour * 60 + moment.minute
+
+
+def rule_ranges(rule: dict[str, Any]) -> Iterator[tuple[int, int]]:
+    """Yield the [start, end) minutes of the week a rule applies to.
+
+    A window whose end is not after its start runs past midnight into the
+    next day, wrapping from Sunday to Monday.
+    """
+    start = _minute_of_day(rule[ATTR_AFTER]) if ATTR_AFTER in rule else 0
+    end = _minute_of_day(rule[ATTR_BEFORE]) if ATTR_BEFORE in rule else MINUTES_PER_DAY
+    if end <= start:
+        end += MINUTES_PER_DAY
+    for day in rule.get(ATTR_WEEKDAY, WEEKDAYS):
+        first = WEEKDAYS.index(day) * MINUTES_PER_DAY + start
+        last = first + end - start
+        if last > MINUTES_PER_WEEK:
+            yield first, MINUTES_PER_WEEK
+            yield 0, last - MINUTES_PER_WEEK
+        else:
+            yield first, last
+
+
+def _price_matches(rule: dict[str, Any], price: float | None) -> bool:
+    """Return whether a slot price meets the thresholds of a rule."""
+    if ATTR_ABOVE in rule and (price is None or price <= rule[ATTR_ABOVE]):
+        return False
+    return not (ATTR_BELOW in rule and (price is None or price >= rule[ATTR_BELOW]))
+
+
+class ScheduleRules:
+    """Ordered rules with an index of the rules applying at each minute of the week.
+
+    The index is built once when the rules change: every minute of the week
+    points to the tuple of rules whose days and window cover it, in the
+    order they were added. Resolving a slot is a lookup in that index and a
+    price comparison per rule found, the first matching rule wins.
+    """
+
+    def __init__(self, rules: list[dict[str, Any]], time_zone: tzinfo) -> None:
+        """Initialize the rules and build their index."""
+        self.rules = rules
+        self.time_zone = time_zone
+        self.has_price_rules = any(
+            ATTR_ABOVE in rule or ATTR_BELOW in rule for rule in rules
+        )
+
+        ranges = [
+            (index, start, end)
+            for index, rule in enumerate(rules)
+            for start, end in rule_ranges(rule)
+        ]
+        points = sorted(
+            {0, MINUTES_PER_WEEK}.union(*((start, end) for _, start, end in ranges))
+        )
+        positions: dict[tuple[int, ...], int] = {(): 0}
+        self._index = array("H", bytes(2 * MINUTES_PER_WEEK))
+        for start, end in pairwise(points):
+            covering = tuple(
+                sorted({index for index, first, last in ranges if first <= start < last})
+            )
+            position = positions.setdefault(covering, len(positions))
+            self._index[start:end] = array("H", [position]) * (end - start)
+        self._covering = list(positions)
+        # Minutes of the week where the applying rules may change
+        self.edges = points[:-1] if rules else []
+
+    def __bool__(self) -> bool:
+        """Return whether there are any rules."""
+        return bool(self.rules)
+
+    def __len__(self) -> int:
+        """Return the number of rules."""
+        return len(self.rules)
+
+    def _minute_of_week(self, moment: datetime) -> int:
+        """Return the local minute of the week of a moment."""
+        local = moment.astimezone(self.time_zone)
+        return local.weekday() * MINUTES_PER_DAY + local.hour * 60 + local.minute
+
+    def mode_at(self, moment: datetime, price: float | None) -> str | None:
+        """Return the mode the rules set for a slot start and its price, if any."""
+        for index in self._covering[self._index[self._minute_of_week(moment)]]:
+            rule = self.rules[index]
+            if _price_matches(rule, price):
+                return rule[ATTR_MODE]
+        return None
+
+    def boundaries(self, start: datetime, end: datetime) -> Iterator[datetime]:
+        """Yield the moments in [start, end) where the applying rules may change."""
+        if not self.edges:
+            return
+        local = start.astimezone(self.time_zone)
+        day = local.date() - timedelta(days=local.weekday())
+        while True:
+            for edge in self.edges:
+                days, minute = divmod(edge, MINUTES_PER_DAY)
+                moment = datetime.combine(
+                    day + timedelta(days=days),
+                    time(minute // 60, minute % 60),
+                    self.time_zone,
+                )
+                if moment >= end:
+                    return
+                if moment >= start:
+                    yield moment
+            day += timedelta(days=7)
@@ -1,31 +1,53 @@
 """Sensor platform for Pstryk Energy Scheduler."""
 from __future__ import annotations
 
-from datetime import datetime
 import logging
+from collections.abc import Callable
+from dataclasses import dataclass
+from datetime import datetime
 from typing import Any
 
 from homeassistant.components.sensor import (
+    SensorDeviceClass,
     SensorEntity,
+    SensorEntityDescription,
     SensorStateClass,
-    SensorDeviceClass,
 )
 from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import (
+    PERCENTAGE,
+    EntityCategory,
+    UnitOfInformation,
+    UnitOfTime,
+)
 from homeassistant.core import HomeAssistant
+from homeassistant.helpers.dispatcher import async_dispatcher_connect
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
-from homeassistant.helpers.update_coordinator import CoordinatorEntity
+from homeassistant.util import dt as dt_util
 
+from .accounting import COST, EXPORT, IMPORT, PERIOD_DAY, PERIOD_MONTH, REVENUE
 from .const import (
-    DOMAIN,
-    ATTR_HOURLY_PRICES,
-    ATTR_SCHEDULE,
-    ATTR_CURRENT_PRICE,
-    ATTR_NEXT_PRICE,
     ATTR_AVERAGE_PRICE,
-    ATTR_MIN_PRICE,
+    ATTR_CURRENT_PRICE,
+    ATTR_HOURLY_PRICES,
+    ATTR_LAST_UPDATE,
     ATTR_MAX_PRICE,
+    ATTR_MIN_PRICE,
+    ATTR_NEXT_PRICE,
+    ATTR_RULES,
+    ATTR_SCHEDULE,
+    ATTR_SLOTS,
+    ATTR_STALE,
+    ATTR_TODAY,
+    ATTR_TOMORROW,
+    COST_UNIT,
+    DOMAIN,
+    PRICE_LEVELS,
+    PRICE_UNIT,
 )
 from .coordinator import PstrykDataUpdateCoordinator
+from .entity import PstrykEntity
+from .metrics import RuntimeMetrics
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -47,28 +69,162 @@ async def async_setup_entry(
         PstrykCurrentModeSensor(coordinator),
         PstrykPriceDataSensor(coordinator),
         PstrykScheduleSensor(coordinator),
+        PstrykPriceRankSensor(coordinator),
+        PstrykPricePercentileSensor(coordinator),
+        PstrykPriceLevelSensor(coordinator),
+        *(
+            PstrykDiagnosticSensor(coordinator, description)
+            for description in DIAGNOSTIC_SENSORS
+        ),
+        *(
+            PstrykCostSensor(coordinator, description)
+            for description in COST_SENSORS
+            if description.meter in coordinator.accounting.meters.values()
+        ),
     ]
 
     async_add_entities(sensors)
 
 
-class PstrykSensorBase(CoordinatorEntity, SensorEntity):
+@dataclass(frozen=True, kw_only=True)
+class PstrykDiagnosticSensorEntityDescription(SensorEntityDescription):
+    """Describes a sensor reporting one of the runtime metrics."""
+
+    value_fn: Callable[[RuntimeMetrics], Any]
+
+
+DIAGNOSTIC_SENSORS: tuple[PstrykDiagnosticSensorEntityDescription, ...] = (
+    PstrykDiagnosticSensorEntityDescription(
+        key="fetch_latency",
+        name="Fetch Latency",
+        native_unit_of_measurement=UnitOfTime.MILLISECONDS,
+        device_class=SensorDeviceClass.DURATION,
+        state_class=SensorStateClass.MEASUREMENT,
+        suggested_display_precision=0,
+        value_fn=lambda metrics: metrics.fetch_latency,
+    ),
+    PstrykDiagnosticSensorEntityDescription(
+        key="payload_size",
+        name="Payload Size",
+        native_unit_of_measurement=UnitOfInformation.BYTES,
+        device_class=SensorDeviceClass.DATA_SIZE,
+        state_class=SensorStateClass.MEASUREMENT,
+        value_fn=lambda metrics: metrics.payload_bytes,
+    ),
+    PstrykDiagnosticSensorEntityDescription(
+        key="parse_time",
+        name="Parse Time",
+        native_unit_of_measurement=UnitOfTime.MILLISECONDS,
+        device_class=SensorDeviceClass.DURATION,
+        state_class=SensorStateClass.MEASUREMENT,
+        suggested_display_precision=1,
+        value_fn=lambda metrics: metrics.parse_time,
+    ),
+    PstrykDiagnosticSensorEntityDescription(
+        key="schedule_saves",
+        name="Schedule Saves",
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        icon="mdi:content-save",
+        value_fn=lambda metrics: metrics.schedule_saves,
+    ),
+    PstrykDiagnosticSensorEntityDescription(
+        key="refresh_successes",
+        name="Successful Refreshes",
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        icon="mdi:check-circle-outline",
+        value_fn=lambda metrics: metrics.refresh_successes,
+    ),
+    PstrykDiagnosticSensorEntityDescription(
+        key="refresh_failures",
+        name="Failed Refreshes",
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        icon="mdi:alert-circle-outline",
+        value_fn=lambda metrics: metrics.refresh_failures,
+    ),
+    PstrykDiagnosticSensorEntityDescription(
+        key="cache_hit_ratio",
+        name="Cache Hit Ratio",
+        native_unit_of_measurement=PERCENTAGE,
+        state_class=SensorStateClass.MEASUREMENT,
+        suggested_display_precision=0,
+        icon="mdi:cached",
+        value_fn=lambda metrics: metrics.cache_hit_ratio,
+    ),
+    PstrykDiagnosticSensorEntityDescription(
+        key="next_fetch",
+        name="Next Fetch",
+        device_class=SensorDeviceClass.TIMESTAMP,
+        value_fn=lambda metrics: metrics.next_fetch,
+    ),
+)
+
+
+@dataclass(frozen=True, kw_only=True)
+class PstrykCostSensorEntityDescription(SensorEntityDescription):
+    """Describes a sensor totalling the cost or revenue of a period."""
+
+    period: str
+    total: int
+    meter: int  # the meter that must be configured for the sensor to exist
+
+
+COST_SENSORS: tuple[PstrykCostSensorEntityDescription, ...] = (
+    PstrykCostSensorEntityDescription(
+        key="cost_today",
+        name="Energy Cost Today",
+        icon="mdi:cash-minus",
+        period=PERIOD_DAY,
+        total=COST,
+        meter=IMPORT,
+    ),
+    PstrykCostSensorEntityDescription(
+        key="cost_this_month",
+        name="Energy Cost This Month",
+        icon="mdi:cash-minus",
+        period=PERIOD_MONTH,
+        total=COST,
+        meter=IMPORT,
+    ),
+    PstrykCostSensorEntityDescription(
+        key="revenue_today",
+        name="Energy Revenue Today",
+        icon="mdi:cash-plus",
+        period=PERIOD_DAY,
+        total=REVENUE,
+        meter=EXPORT,
+    ),
+    PstrykCostSensorEntityDescription(
+        key="revenue_this_month",
+        name="Energy Revenue This Month",
+        icon="mdi:cash-plus",
+        period=PERIOD_MONTH,
+        total=REVENUE,
+        meter=EXPORT,
+    ),
+)
+
+
+class PstrykSensorBase(PstrykEntity, SensorEntity):
     """Base class for Pstryk sensors."""
 
-    def __init__(self, coordinator: PstrykDataUpdateCoordinator, sensor_type: str) -> None:
-        """Initialize the sensor."""
-        super().__init__(coordinator)
-        self._sensor_type = sensor_type
-        self._attr_has_entity_name = True
+    def _state_fingerprint(self) -> tuple[Any, ...]:
+        """Return what makes up the written state of the sensor."""
+        return (self.available, self.native_value, self.extra_state_attributes)
+
+
+class PstrykDailyStatSensor(PstrykSensorBase):
+    """Base class for sensors exposing a price statistic per day."""
+
+    _stat: str
 
     @property
-    def device_info(self) -> dict[str, Any]:
-        """Return device information."""
+    def extra_state_attributes(self) -> dict[str, Any]:
+        """Return the statistic for today and tomorrow."""
+        today = self.coordinator.data.get("today_stats")
+        tomorrow = self.coordinator.data.get("tomorrow_stats")
         return {
-            "identifiers": {(DOMAIN, "pstryk_energy_scheduler")},
-            "name": "Pstryk Energy Scheduler",
-            "manufacturer": "Pstryk",
-            "model": "Energy Scheduler",
+            ATTR_TODAY: getattr(today, self._stat) if today else None,
+            ATTR_TOMORROW: getattr(tomorrow, self._stat) if tomorrow else None,
         }
 
 
@@ -78,9 +234,9 @@ class PstrykCurrentPriceSensor(PstrykSensorBase):
     def __init__(self, coordinator: PstrykDataUpdateCoordinator) -> None:
         """Initialize the sensor."""
         super().__init__(coordinator, "current_price")
-        self._attr_unique_id = f"{DOMAIN}_current_price"
+        self._attr_unique_id = f"{coordinator.config_entry.entry_id}_current_price"
         self._attr_name = "Current Price"
-        self._attr_native_unit_of_measurement = "€/kWh"
+        self._attr_native_unit_of_measurement = PRICE_UNIT
         self._attr_device_class = SensorDeviceClass.MONETARY
         self._attr_state_class = SensorStateClass.MEASUREMENT
 
@@ -89,16 +245,21 @@ class PstrykCurrentPriceSensor(PstrykSensorBase):
         """Return the state of the sensor."""
         return self.coordinator.data.get(ATTR_CURRENT_PRICE)
 
+    @property
+    def extra_state_attributes(self) -> dict[str, Any]:
+        """Return whether the price comes from a cache the API failed to refresh."""
+        return {ATTR_STALE: self.coordinator.data.get("stale", False)}
+
 
 class PstrykNextPriceSensor(PstrykSensorBase):
-    """Sensor for next hour electricity price."""
+    """Sensor for the price of the next slot."""
 
     def __init__(self, coordinator: PstrykDataUpdateCoordinator) -> None:
         """Initialize the sensor."""
         super().__init__(coordinator, "next_price")
-        self._attr_unique_id = f"{DOMAIN}_next_price"
-        self._attr_name = "Next Hour Price"
-        self._attr_native_unit_of_measurement = "€/kWh"
+        self._attr_unique_id = f"{coordinator.config_entry.entry_id}_next_price"
+        self._attr_name = "Next Slot Price"
+        self._attr_native_unit_of_measurement = PRICE_UNIT
         self._attr_device_class = SensorDeviceClass.MONETARY
         self._attr_state_class = SensorStateClass.MEASUREMENT
 
@@ -108,15 +269,17 @@ class PstrykNextPriceSensor(PstrykSensorBase):
         return self.coordinator.data.get(ATTR_NEXT_PRICE)
 
 
-class PstrykAveragePriceSensor(PstrykSensorBase):
+class PstrykAveragePriceSensor(PstrykDailyStatSensor):
     """Sensor for average electricity price."""
 
+    _stat = "mean"
+
     def __init__(self, coordinator: PstrykDataUpdateCoordinator) -> None:
         """Initialize the sensor."""
         super().__init__(coordinator, "average_price")
-        self._attr_unique_id = f"{DOMAIN}_average_price"
+        self._attr_unique_id = f"{coordinator.config_entry.entry_id}_average_price"
         self._attr_name = "Average Price"
-        self._attr_native_unit_of_measurement = "€/kWh"
+        self._attr_native_unit_of_measurement = PRICE_UNIT
         self._attr_device_class = SensorDeviceClass.MONETARY
         self._attr_state_class = SensorStateClass.MEASUREMENT
 
@@ -126,15 +289,17 @@ class PstrykAveragePriceSensor(PstrykSensorBase):
         return self.coordinator.data.get(ATTR_AVERAGE_PRICE)
 
 
-class PstrykMinPriceSensor(PstrykSensorBase):
+class PstrykMinPriceSensor(PstrykDailyStatSensor):
     """Sensor for minimum electricity price."""
 
+    _stat = "min"
+
     def __init__(self, coordinator: PstrykDataUpdateCoordinator) -> None:
         """Initialize the sensor."""
         super().__init__(coordinator, "min_price")
-        self._attr_unique_id = f"{DOMAIN}_min_price"
+        self._attr_unique_id = f"{coordinator.config_entry.entry_id}_min_price"
         self._attr_name = "Minimum Price"
-        self._attr_native_unit_of_measurement = "€/kWh"
+        self._attr_native_unit_of_measurement = PRICE_UNIT
         self._attr_device_class = SensorDeviceClass.MONETARY
         self._attr_state_class = SensorStateClass.MEASUREMENT
 
@@ -144,15 +309,17 @@ class PstrykMinPriceSensor(PstrykSensorBase):
         return self.coordinator.data.get(ATTR_MIN_PRICE)
 
 
-class PstrykMaxPriceSensor(PstrykSensorBase):
+class PstrykMaxPriceSensor(PstrykDailyStatSensor):
     """Sensor for maximum electricity price."""
 
+    _stat = "max"
+
     def __init__(self, coordinator: PstrykDataUpdateCoordinator) -> None:
         """Initialize the sensor."""
         super().__init__(coordinator, "max_price")
-        self._attr_unique_id = f"{DOMAIN}_max_price"
+        self._attr_unique_id = f"{coordinator.config_entry.entry_id}_max_price"
         self._attr_name = "Maximum Price"
-        self._attr_native_unit_of_measurement = "€/kWh"
+        self._attr_native_unit_of_measurement = PRICE_UNIT
         self._attr_device_class = SensorDeviceClass.MONETARY
         self._attr_state_class = SensorStateClass.MEASUREMENT
 
@@ -168,7 +335,7 @@ class PstrykCurrentModeSensor(PstrykSensorBase):
     def __init__(self, coordinator: PstrykDataUpdateCoordinator) -> None:
         """Initialize the sensor."""
         super().__init__(coordinator, "current_mode")
-        self._attr_unique_id = f"{DOMAIN}_current_mode"
+        self._attr_unique_id = f"{coordinator.config_entry.entry_id}_current_mode"
         self._attr_name = "Current Mode"
         self._attr_icon = "mdi:power-settings"
 
@@ -181,10 +348,12 @@ class PstrykCurrentModeSensor(PstrykSensorBase):
 class PstrykPriceDataSensor(PstrykSensorBase):
     """Sensor containing all hourly price data."""
 
+    _unrecorded_attributes = frozenset({ATTR_HOURLY_PRICES, ATTR_LAST_UPDATE})
+
     def __init__(self, coordinator: PstrykDataUpdateCoordinator) -> None:
         """Initialize the sensor."""
         super().__init__(coordinator, "price_data")
-        self._attr_unique_id = f"{DOMAIN}_price_data"
+        self._attr_unique_id = f"{coordinator.config_entry.entry_id}_price_data"
         self._attr_name = "Price Data"
         self._attr_icon = "mdi:chart-line"
 
@@ -199,17 +368,32 @@ class PstrykPriceDataSensor(PstrykSensorBase):
         prices = self.coordinator.data.get("prices", {})
         return {
             ATTR_HOURLY_PRICES: prices,
-            "last_update": self.coordinator.data.get("last_update"),
+            ATTR_LAST_UPDATE: self.coordinator.data.get("last_update"),
+            ATTR_STALE: self.coordinator.data.get("stale", False),
         }
 
+    def _state_fingerprint(self) -> tuple[Any, ...]:
+        """Return what makes up the written state of the sensor.
+
+        A new price series is built for every fetch that changed prices, so
+        its identity stands in for comparing the full price map.
+        """
+        return (
+            self.available,
+            self.coordinator.data.get("series"),
+            self.coordinator.data.get("stale"),
+        )
+
 
 class PstrykScheduleSensor(PstrykSensorBase):
     """Sensor containing schedule data."""
 
+    _unrecorded_attributes = frozenset({ATTR_SCHEDULE, ATTR_RULES})
+
     def __init__(self, coordinator: PstrykDataUpdateCoordinator) -> None:
         """Initialize the sensor."""
         super().__init__(coordinator, "schedule")
-        self._attr_unique_id = f"{DOMAIN}_schedule"
+        self._attr_unique_id = f"{coordinator.config_entry.entry_id}_schedule"
         self._attr_name = "Schedule"
         self._attr_icon = "mdi:calendar-clock"
 
@@ -217,11 +401,166 @@ class PstrykScheduleSensor(PstrykSensorBase):
     def native_value(self) -> str:
         """Return the state of the sensor."""
         schedule = self.coordinator.data.get("schedule", {})
-        return f"{len(schedule)} hours scheduled"
+        return f"{len(schedule)} slots scheduled"
 
     @property
     def extra_state_attributes(self) -> dict[str, Any]:
         """Return the state attributes."""
         return {
             ATTR_SCHEDULE: self.coordinator.data.get("schedule", {}),
+            ATTR_RULES: self.coordinator.data.get("rules", []),
         }
+
+
+class PstrykPriceRankSensor(PstrykSensorBase):
+    """Sensor ranking the current price among the prices of the day."""
+
+    def __init__(self, coordinator: PstrykDataUpdateCoordinator) -> None:
+        """Initialize the sensor."""
+        super().__init__(coordinator, "price_rank")
+        self._attr_unique_id = f"{coordinator.config_entry.entry_id}_price_rank"
+        self._attr_name = "Price Rank"
+        self._attr_icon = "mdi:podium"
+
+    @property
+    def native_value(self) -> int | None:
+        """Return the rank of the current slot, 1 being the cheapest of the day."""
+        return self.coordinator.data.get("current_rank")
+
+    @property
+    def extra_state_attributes(self) -> dict[str, Any]:
+        """Return the number of priced slots of the day."""
+        today = self.coordinator.data.get("today_stats")
+        return {ATTR_SLOTS: today.count if today else None}
+
+
+class PstrykPricePercentileSensor(PstrykSensorBase):
+    """Sensor placing the current price between the day's cheapest and dearest."""
+
+    def __init__(self, coordinator: PstrykDataUpdateCoordinator) -> None:
+        """Initialize the sensor."""
+        super().__init__(coordinator, "price_percentile")
+        self._attr_unique_id = f"{coordinator.config_entry.entry_id}_price_percentile"
+        self._attr_name = "Price Percentile"
+        self._attr_native_unit_of_measurement = PERCENTAGE
+        self._attr_state_class = SensorStateClass.MEASUREMENT
+        self._attr_suggested_display_precision = 0
+        self._attr_icon = "mdi:percent"
+
+    @property
+    def native_value(self) -> float | None:
+        """Return the percentile of the current price, 0 being the cheapest."""
+        return self.coordinator.data.get("current_percentile")
+
+
+class PstrykPriceLevelSensor(PstrykSensorBase):
+    """Sensor classifying the current price against the mean of the day."""
+
+    def __init__(self, coordinator: PstrykDataUpdateCoordinator) -> None:
+        """Initialize the sensor."""
+        super().__init__(coordinator, "price_level")
+        self._attr_unique_id = f"{coordinator.config_entry.entry_id}_price_level"
+        self._attr_name = "Price Level"
+        self._attr_device_class = SensorDeviceClass.ENUM
+        self._attr_options = PRICE_LEVELS
+        self._attr_icon = "mdi:cash-multiple"
+
+    @property
+    def native_value(self) -> str | None:
+        """Return cheap, normal or expensive."""
+        return self.coordinator.data.get("current_level")
+
+
+class PstrykDiagnosticSensor(PstrykSensorBase):
+    """Sensor reporting a runtime metric, disabled by default."""
+
+    entity_description: PstrykDiagnosticSensorEntityDescription
+
+    _attr_entity_category = EntityCategory.DIAGNOSTIC
+    _attr_entity_registry_enabled_default = False
+
+    def __init__(
+        self,
+        coordinator: PstrykDataUpdateCoordinator,
+        description: PstrykDiagnosticSensorEntityDescription,
+    ) -> None:
+        """Initialize the sensor."""
+        super().__init__(coordinator, description.key)
+        self.entity_description = description
+        self._attr_unique_id = f"{coordinator.config_entry.entry_id}_{description.key}"
+
+    @property
+    def available(self) -> bool:
+        """Return True, the metrics are known even when fetching fails."""
+        return True
+
+    @property
+    def native_value(self) -> Any:
+        """Return the state of the sensor."""
+        return self.entity_description.value_fn(self.coordinator.metrics)
+
+    async def async_added_to_hass(self) -> None:
+        """Follow the metrics, which also change without new data."""
+        await super().async_added_to_hass()
+        self.async_on_remove(
+            async_dispatcher_connect(
+                self.hass, self.coordinator.metrics_signal, self._handle_coordinator_update
+            )
+        )
+
+
+class PstrykCostSensor(PstrykSensorBase):
+    """Sensor totalling what the metered energy of the current day or month cost or earned.
+
+    The total is kept up to date by the accountant as readings arrive and
+    starts over with every local day or month, marked by last_reset.
+    """
+
+    entity_description: PstrykCostSensorEntityDescription
+
+    _attr_device_class = SensorDeviceClass.MONETARY
+    _attr_state_class = SensorStateClass.TOTAL
+    _attr_native_unit_of_measurement = COST_UNIT
+    _attr_suggested_display_precision = 2
+
+    def __init__(
+        self,
+        coordinator: PstrykDataUpdateCoordinator,
+        description: PstrykCostSensorEntityDescription,
+    ) -> None:
+        """Initialize the sensor."""
+        super().__init__(coordinator, description.key)
+        self.entity_description = description
+        self._attr_unique_id = f"{coordinator.config_entry.entry_id}_{description.key}"
+
+    @property
+    def available(self) -> bool:
+        """Return True, the totals are known even when fetching fails."""
+        return True
+
+    @property
+    def native_value(self) -> float:
+        """Return the total of the current period."""
+        description = self.entity_description
+        return self.coordinator.accounting.period_total(description.period, description.total)
+
+    @property
+    def last_reset(self) -> datetime:
+        """Return the start of the current period."""
+        start = dt_util.start_of_local_day()
+        if self.entity_description.period == PERIOD_MONTH:
+            start = start.replace(day=1)
+        return start
+
+    def _state_fingerprint(self) -> tuple[Any, ...]:
+        """Return what makes up the written state of the sensor."""
+        return (self.native_value, self.last_reset)
+
+    async def async_added_to_hass(self) -> None:
+        """Follow the totals, which change with the meter readings."""
+        await super().async_added_to_hass()
+        self.async_on_remove(
+            async_dispatcher_connect(
+                self.hass, self.coordinator.accounting.signal, self._handle_coordinator_update
+            )
+        )
@@ -0,0 +1,106 @@
+"""Run-length merged view of the schedule for Pstryk Energy Scheduler."""
+from __future__ import annotations
+
+from bisect import bisect_left, bisect_right
+from collections.abc import Callable, Iterable
+from datetime import UTC, datetime
+
+from .const import MODE_DEFAULT
+from .prices import HOUR_SECONDS, hour_key, parse_timestamp
+
+# Start and end in UTC epoch seconds and the mode of a merged interval
+Interval = tuple[int, int, str]
+
+
+class ScheduleTimeline:
+    """Sorted, non-overlapping intervals of consecutive slots with the same mode.
+
+    The mode of each slot comes from ``resolve``, which takes the start of
+    the slot, so entries, hour cover and rules are resolved in one place.
+    The intervals are kept in step with the schedule: a change to an entry
+    only recomputes the hour holding it and splices the result in, merging
+    with the neighbouring intervals. Slots in Default mode are left out, so
+    every interval is one event. Range lookups are binary searches.
+    """
+
+    def __init__(self, slot_seconds: int, resolve: Callable[[datetime], str]) -> None:
+        """Initialize an empty timeline for slots of the given length."""
+        self.slot_seconds = slot_seconds
+        self._resolve = resolve
+        self._starts: list[int] = []
+        self._ends: list[int] = []
+        self._modes: list[str] = []
+
+    def __len__(self) -> int:
+        """Return the number of intervals."""
+        return len(self._starts)
+
+    def rebuild(self, keys: Iterable[str], slot_seconds: int) -> None:
+        """Recompute the timeline from scratch over the hours holding the given keys."""
+        self.slot_seconds = slot_seconds
+        self._starts, self._ends, self._modes = [], [], []
+        self.update(keys)
+
+    def update(self, keys: Iterable[str]) -> None:
+        """Bring the hours holding the given changed keys up to date."""
+        for hour in sorted({hour_key(key) for key in keys}):
+            start = int(parse_timestamp(hour).timestamp())
+            self._splice(start, start + HOUR_SECONDS, self._hour_intervals(start))
+
+    def _hour_intervals(self, hour: int) -> list[Interval]:
+        """Return the merged intervals of the slots of an hour."""
+        step = min(self.slot_seconds, HOUR_SECONDS)
+        intervals: list[Interval] = []
+        for start in range(hour, hour + HOUR_SECONDS, step):
+            mode = self._resolve(datetime.fromtimestamp(start, UTC))
+            if mode == MODE_DEFAULT:
+                continue
+            if intervals and intervals[-1][1] == start and intervals[-1][2] == mode:
+                intervals[-1] = (intervals[-1][0], start + step, mode)
+            else:
+                intervals.append((start, start + step, mode))
+        return intervals
+
+    def _splice(self, first: int, last: int, intervals: list[Interval]) -> None:
+        """Replace what the timeline holds within [first, last) with the given intervals."""
+        low = bisect_right(self._ends, first)
+        high = bisect_left(self._starts, last)
+        replacement: list[Interval] = []
+        # Keep the parts of cut intervals lying outside the range
+        if low < high and self._starts[low] < first:
+            replacement.append((self._starts[low], first, self._modes[low]))
+        replacement.extend(intervals)
+        if low < high and self._ends[high - 1] > last:
+            replacement.append((last, self._ends[high - 1], self._modes[high - 1]))
+
+        # Take in the neighbours the new intervals may merge with
+        if low > 0 and self._ends[low - 1] == first:
+            low -= 1
+            replacement.insert(0, (self._starts[low], self._ends[low], self._modes[low]))
+        if high < len(self._starts) and self._starts[high] == last:
+            replacement.append((self._starts[high], self._ends[high], self._modes[high]))
+            high += 1
+
+        merged: list[Interval] = []
+        for interval in replacement:
+            if merged and merged[-1][1] == interval[0] and merged[-1][2] == interval[2]:
+                merged[-1] = (merged[-1][0], interval[1], interval[2])
+            else:
+                merged.append(interval)
+
+        self._starts[low:high] = [start for start, _, _ in merged]
+        self._ends[low:high] = [end for _, end, _ in merged]
+        self._modes[low:high] = [mode for _, _, mode in merged]
+
+    def between(self, start: int, end: int) -> list[Interval]:
+        """Return the intervals overlapping [start, end)."""
+        low = bisect_right(self._ends, start)
+        high = bisect_left(self._starts, end, lo=low)
+        return list(zip(self._starts[low:high], self._ends[low:high], self._modes[low:high]))
+
+    def current_or_next(self, moment: int) -> Interval | None:
+        """Return the interval containing a moment, or else the next one."""
+        index = bisect_right(self._ends, moment)
+        if index == len(self._starts):
+            return None
+        return self._starts[index], self._ends[index], self._modes[index]
@@ -0,0 +1,236 @@
+"""WebSocket API for Pstryk Energy Scheduler."""
+from __future__ import annotations
+
+import logging
+from typing import Any
+
+import voluptuous as vol
+from homeassistant.components import websocket_api
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.dispatcher import async_dispatcher_connect
+from homeassistant.util import dt as dt_util
+
+from .const import DOMAIN, PRICE_HISTORY_MAX_RANGE
+from .coordinator import PstrykDataUpdateCoordinator
+
+_LOGGER = logging.getLogger(__name__)
+
+# Summary fields pushed whenever one of them changes
+INFO_FIELDS = (
+    "current_mode",
+    "current_price",
+    "next_price",
+    "average_price",
+    "min_price",
+    "max_price",
+    "last_update",
+    "stale",
+)
+
+
+@callback
+def async_register_websocket_commands(hass: HomeAssistant) -> None:
+    """Register the WebSocket commands."""
+    websocket_api.async_register_command(hass, ws_get_data)
+    websocket_api.async_register_command(hass, ws_subscribe)
+    websocket_api.async_register_command(hass, ws_get_history)
+
+
+@callback
+def _async_get_coordinator(
+    hass: HomeAssistant, connection: websocket_api.ActiveConnection, msg: dict[str, Any]
+) -> PstrykDataUpdateCoordinator | None:
+    """Return the coordinator a command targets, sending an error when there is none.
+
+    Without an entry id the only loaded entry is used, as for the services.
+    """
+    coordinators: dict[str, PstrykDataUpdateCoordinator] = hass.data.get(DOMAIN, {})
+    if (entry_id := msg.get("entry_id")) is not None:
+        if entry_id not in coordinators:
+            connection.send_error(
+                msg["id"], websocket_api.ERR_NOT_FOUND, f"Pstryk entry {entry_id} is not loaded"
+            )
+            return None
+        return coordinators[entry_id]
+
+    if len(coordinators) != 1:
+        if coordinators:
+            connection.send_error(
+                msg["id"],
+                websocket_api.ERR_INVALID_FORMAT,
+                "Pass entry_id to choose one of the loaded Pstryk entries",
+            )
+        else:
+            connection.send_error(
+                msg["id"], websocket_api.ERR_NOT_FOUND, "No Pstryk entry is loaded"
+            )
+        return None
+    return next(iter(coordinators.values()))
+
+
+def _snapshot(data: dict[str, Any]) -> dict[str, Any]:
+    """Return the data sent to the frontend."""
+    return {
+        "slot_length": data["series"].slot_seconds,
+        "prices": data["prices"],
+        "schedule": data["schedule"],
+        "modes": data["modes"],
+        "info": {field: data.get(field) for field in INFO_FIELDS},
+    }
+
+
+def _diff_map(old: dict[str, Any], new: dict[str, Any]) -> tuple[dict[str, Any], list[str]]:
+    """Return the changed or added items and the removed keys."""
+    changed = {key: value for key, value in new.items() if old.get(key) != value}
+    removed = [key for key in old if key not in new]
+    return changed, removed
+
+
+def _diff(old_data: dict[str, Any], new_data: dict[str, Any]) -> dict[str, Any]:
+    """Return the changes between two coordinator data snapshots."""
+    diff: dict[str, Any] = {}
+
+    # A new series object is only built when prices were fetched
+    if old_data["series"] is not new_data["series"]:
+        changed, removed = _diff_map(old_data["prices"], new_data["prices"])
+        if changed or removed:
+            diff["prices"] = changed
+            diff["prices_removed"] = removed
+        if old_data["series"].slot_seconds != new_data["series"].slot_seconds:
+            diff["slot_length"] = new_data["series"].slot_seconds
+
+    if old_data["schedule"] != new_data["schedule"]:
+        changed, removed = _diff_map(old_data["schedule"], new_data["schedule"])
+        diff["schedule"] = changed
+        diff["schedule_removed"] = removed
+
+    # Resolved modes change with the schedule, the rules and the prices
+    if old_data["modes"] != new_data["modes"]:
+        changed, removed = _diff_map(old_data["modes"], new_data["modes"])
+        diff["modes"] = changed
+        diff["modes_removed"] = removed
+
+    info = {
+        field: new_data.get(field)
+        for field in INFO_FIELDS
+        if old_data.get(field) != new_data.get(field)
+    }
+    if info:
+        diff["info"] = info
+
+    return diff
+
+
+@websocket_api.websocket_command(
+    {
+        vol.Required("type"): f"{DOMAIN}/data",
+        vol.Optional("entry_id"): str,
+    }
+)
+@callback
+def ws_get_data(
+    hass: HomeAssistant, connection: websocket_api.ActiveConnection, msg: dict[str, Any]
+) -> None:
+    """Return the price series and schedule once."""
+    if (coordinator := _async_get_coordinator(hass, connection, msg)) is None:
+        return
+    if coordinator.data is None:
+        connection.send_error(msg["id"], websocket_api.ERR_NOT_FOUND, "No data available")
+        return
+
+    connection.send_result(msg["id"], _snapshot(coordinator.data))
+
+
+@websocket_api.websocket_command(
+    {
+        vol.Required("type"): f"{DOMAIN}/subscribe",
+        vol.Optional("entry_id"): str,
+    }
+)
+@callback
+def ws_subscribe(
+    hass: HomeAssistant, connection: websocket_api.ActiveConnection, msg: dict[str, Any]
+) -> None:
+    """Send the full data once, then only the slots that changed.
+
+    When the entry unloads, as on a reload after an options change, an
+    ``unloaded`` event ends the updates so the card subscribes again.
+    """
+    if (coordinator := _async_get_coordinator(hass, connection, msg)) is None:
+        return
+    if coordinator.data is None:
+        connection.send_error(msg["id"], websocket_api.ERR_NOT_FOUND, "No data available")
+        return
+
+    last_data = coordinator.data
+
+    @callback
+    def forward_changes() -> None:
+        """Send the changes since the last message."""
+        nonlocal last_data
+        data = coordinator.data
+        if data is None or data is last_data:
+            return
+        diff = _diff(last_data, data)
+        last_data = data
+        if diff:
+            connection.send_message(websocket_api.event_message(msg["id"], diff))
+
+    unsubs = [coordinator.async_add_listener(forward_changes)]
+
+    @callback
+    def unsubscribe() -> None:
+        """Stop forwarding changes, a no-op once stopped."""
+        while unsubs:
+            unsubs.pop()()
+
+    @callback
+    def entry_unloaded() -> None:
+        """Tell the card the coordinator it follows is gone."""
+        unsubscribe()
+        connection.send_message(websocket_api.event_message(msg["id"], {"unloaded": True}))
+
+    unsubs.append(
+        async_dispatcher_connect(hass, coordinator.shutdown_signal, entry_unloaded)
+    )
+    connection.subscriptions[msg["id"]] = unsubscribe
+    connection.send_result(msg["id"])
+    connection.send_message(
+        websocket_api.event_message(msg["id"], {"full": True, **_snapshot(last_data)})
+    )
+
+
+@websocket_api.websocket_command(
+    {
+        vol.Required("type"): f"{DOMAIN}/history",
+        vol.Optional("entry_id"): str,
+        vol.Required("start"): str,
+        vol.Required("end"): str,
+    }
+)
+@websocket_api.async_response
+async def ws_get_history(
+    hass: HomeAssistant, connection: websocket_api.ActiveConnection, msg: dict[str, Any]
+) -> None:
+    """Return the archived prices of a time range."""
+    if (coordinator := _async_get_coordinator(hass, connection, msg)) is None:
+        return
+
+    start = dt_util.parse_datetime(msg["start"])
+    end = dt_util.parse_datetime(msg["end"])
+    if start is None or end is None or start.tzinfo is None or end.tzinfo is None:
+        connection.send_error(
+            msg["id"], websocket_api.ERR_INVALID_FORMAT, "Start and end need a time zone"
+        )
+        return
+    if not start < end <= start + PRICE_HISTORY_MAX_RANGE:
+        connection.send_error(
+            msg["id"],
+            websocket_api.ERR_INVALID_FORMAT,
+            f"End must be after start and at most {PRICE_HISTORY_MAX_RANGE.days} days later",
+        )
+        return
+
+    connection.send_result(
+        msg["id"], {"prices": await coordinator.async_get_price_history(start, end)}
+    )
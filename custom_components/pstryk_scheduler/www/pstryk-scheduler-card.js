@@ -5,6 +5,16 @@ class PstrykSchedulerCard extends HTMLElement {
     this._config = {};
     this._hass = null;
     this._selectedHour = null;
+    this._prices = {};
+    this._schedule = {};
+    this._modes = {};
+    this._info = {};
+    this._slotLength = 3600;
+    this._loaded = false;
+    this._unsubscribe = null;
+    this._subscribing = false;
+    this._resubscribeAttempts = 0;
+    this._useAttributes = false;
   }
 
   setConfig(config) {
@@ -12,30 +22,171 @@ class PstrykSchedulerCard extends HTMLElement {
       throw new Error('You need to define an entity (price_data sensor)');
     }
     this._config = config;
+    this._chart = null;
+    this._entityStamp = null;
     this.render();
   }
 
   set hass(hass) {
+    // Home Assistant sets hass on every state change in the instance, only
+    // the card's own entities are worth a render
     this._hass = hass;
+    this._subscribe();
+    if (this._entitiesChanged()) {
+      this.render();
+    }
+  }
+
+  _scheduleEntityId() {
+    return this._config.schedule_entity || 'sensor.pstryk_scheduler_schedule';
+  }
+
+  _entitiesChanged() {
+    const stamp = [this._config.entity, this._scheduleEntityId()]
+      .map((entityId) => this._hass.states[entityId]?.last_updated)
+      .join('|');
+    if (stamp === this._entityStamp) {
+      return false;
+    }
+    this._entityStamp = stamp;
+    return true;
+  }
+
+  connectedCallback() {
+    this._subscribe();
+  }
+
+  disconnectedCallback() {
+    if (this._unsubscribe) {
+      this._unsubscribe();
+      this._unsubscribe = null;
+    }
+  }
+
+  async _subscribe() {
+    if (!this._hass || !this.isConnected || this._unsubscribe || this._subscribing || this._useAttributes) {
+      return;
+    }
+
+    // Prices and schedule come over a WebSocket subscription that only sends
+    // the slots that changed, instead of the full maps in entity attributes
+    this._subscribing = true;
+    const message = { type: 'pstryk_scheduler/subscribe' };
+    if (this._config.entry_id) {
+      message.entry_id = this._config.entry_id;
+    }
+
+    try {
+      this._unsubscribe = await this._hass.connection.subscribeMessage(
+        (event) => this._handleUpdate(event),
+        message
+      );
+      this._resubscribeAttempts = 0;
+    } catch (err) {
+      if (this._resubscribeAttempts > 0 && this._resubscribeAttempts < 10) {
+        // The entry may still be setting up after a reload
+        this._resubscribeAttempts += 1;
+        setTimeout(() => this._subscribe(), 1000);
+      } else {
+        console.warn('Pstryk scheduler subscription failed, using entity attributes', err);
+        this._useAttributes = true;
+        this.render();
+      }
+    } finally {
+      this._subscribing = false;
+    }
+  }
+
+  async _resubscribe() {
+    // The entry unloaded, usually to reload after an options change. Drop
+    // the ended subscription and follow the entry once it is back, keeping
+    // the last data on screen meanwhile
+    const unsubscribe = this._unsubscribe;
+    this._unsubscribe = null;
+    if (unsubscribe) {
+      await unsubscribe();
+    }
+    this._resubscribeAttempts = 1;
+    this._subscribe();
+  }
+
+  _handleUpdate(event) {
+    if (event.unloaded) {
+      this._resubscribe();
+      return;
+    }
+    if (event.full) {
+      this._prices = { ...event.prices };
+      this._schedule = { ...event.schedule };
+      this._modes = { ...event.modes };
+      this._info = { ...event.info };
+      this._slotLength = event.slot_length;
+      this._loaded = true;
+    } else {
+      if (event.prices) {
+        Object.assign(this._prices, event.prices);
+        (event.prices_removed || []).forEach((key) => delete this._prices[key]);
+      }
+      if (event.schedule) {
+        Object.assign(this._schedule, event.schedule);
+        (event.schedule_removed || []).forEach((key) => delete this._schedule[key]);
+      }
+      if (event.modes) {
+        Object.assign(this._modes, event.modes);
+        (event.modes_removed || []).forEach((key) => delete this._modes[key]);
+      }
+      if (event.info) {
+        Object.assign(this._info, event.info);
+      }
+      if (event.slot_length) {
+        this._slotLength = event.slot_length;
+      }
+    }
     this.render();
   }
 
+  _getData() {
+    if (!this._useAttributes) {
+      return this._loaded
+        ? { prices: this._prices, schedule: this._schedule, modes: this._modes, info: this._info }
+        : null;
+    }
+
+    const entity = this._hass.states[this._config.entity];
+    if (!entity) {
+      return null;
+    }
+    const scheduleEntity = this._hass.states[this._scheduleEntityId()];
+    return {
+      prices: entity.attributes.hourly_prices || {},
+      schedule: scheduleEntity?.attributes.schedule || {},
+      modes: null,
+      info: entity.attributes,
+    };
+  }
+
   render() {
     if (!this._hass || !this._config.entity) {
       return;
     }
 
-    const entity = this._hass.states[this._config.entity];
-    const scheduleEntity = this._hass.states[this._config.schedule_entity || 'sensor.pstryk_scheduler_schedule'];
+    const data = this._getData();
 
-    if (!entity) {
-      this.shadowRoot.innerHTML = `<ha-card><div style="padding: 16px;">Entity not found: ${this._config.entity}</div></ha-card>`;
+    if (!data) {
+      const message = this._useAttributes ? `Entity not found: ${this._config.entity}` : 'Loading...';
+      this.shadowRoot.innerHTML = `<ha-card><div style="padding: 16px;">${message}</div></ha-card>`;
+      this._chart = null;
       return;
     }
 
-    const prices = entity.attributes.hourly_prices || {};
-    const schedule = scheduleEntity?.attributes.schedule || {};
+    if (!this._chart) {
+      this._renderSkeleton();
+    }
+    this._updateInfo(data.info);
+    this._updateBars(data);
+  }
 
+  _renderSkeleton() {
     this.shadowRoot.innerHTML = `
       <style>
         ha-card {
@@ -225,26 +376,24 @@ class PstrykSchedulerCard extends HTMLElement {
         <div class="info-box">
           <div class="info-item">
             <div class="info-label">Current Price</div>
-            <div class="info-value">${this._formatPrice(entity.attributes.current_price)} €/kWh</div>
+            <div class="info-value" data-info="current_price"></div>
           </div>
           <div class="info-item">
             <div class="info-label">Average Price</div>
-            <div class="info-value">${this._formatPrice(entity.attributes.average_price)} €/kWh</div>
+            <div class="info-value" data-info="average_price"></div>
           </div>
           <div class="info-item">
             <div class="info-label">Min Price</div>
-            <div class="info-value">${this._formatPrice(entity.attributes.min_price)} €/kWh</div>
+            <div class="info-value" data-info="min_price"></div>
           </div>
           <div class="info-item">
             <div class="info-label">Max Price</div>
-            <div class="info-value">${this._formatPrice(entity.attributes.max_price)} €/kWh</div>
+            <div class="info-value" data-info="max_price"></div>
           </div>
         </div>
 
         <div class="chart-container">
-          <div class="bar-chart">
-            ${this._renderBars(prices, schedule)}
-          </div>
+          <div class="bar-chart" id="bar-chart"></div>
         </div>
 
         <div class="legend">
@@ -295,21 +444,74 @@ class PstrykSchedulerCard extends HTMLElement {
       </div>
     `;
 
+    this._chart = this.shadowRoot.getElementById('bar-chart');
+    this._infoValues = this.shadowRoot.querySelectorAll('[data-info]');
+    this._bars = new Map();
+    this._barOrder = '';
     this._attachEventListeners();
   }
 
-  _renderBars(prices, schedule) {
-    const priceEntries = Object.entries(prices).sort((a, b) => a[0].localeCompare(b[0]));
+  _updateInfo(info) {
+    this._infoValues.forEach((element) => {
+      const text = `${this._formatPrice(info[element.dataset.info])} €/kWh`;
+      if (element.textContent !== text) {
+        element.textContent = text;
+      }
+    });
+  }
+
+  _createBar(key) {
+    const wrapper = document.createElement('div');
+    wrapper.className = 'bar-wrapper';
+    wrapper.dataset.hour = key;
+
+    const badge = document.createElement('div');
+    badge.className = 'mode-badge';
+    const label = document.createElement('div');
+    label.className = 'price-label';
+    const bar = document.createElement('div');
+    const hourLabel = document.createElement('div');
+    hourLabel.className = 'hour-label';
+
+    // Keys are UTC slot starts without an offset, with slots shorter than
+    // an hour only the full hours are labelled to keep the axis readable
+    const date = new Date(key + 'Z');
+    if (date.getMinutes() === 0) {
+      hourLabel.textContent = date.getHours().toString().padStart(2, '0') + ':00';
+    }
+
+    wrapper.append(badge, label, bar, hourLabel);
+    return { wrapper, badge, label, bar, signature: null };
+  }
+
+  _updateBars(data) {
+    const priceEntries = Object.entries(data.prices).sort((a, b) => a[0].localeCompare(b[0]));
+
+    // Only touch the bar elements themselves when the set of slots changed,
+    // reusing the elements of slots that are still shown
+    const order = priceEntries.map(([key]) => key).join(',');
+    if (order !== this._barOrder) {
+      const bars = new Map();
+      const fragment = document.createDocumentFragment();
+      priceEntries.forEach(([key]) => {
+        const bar = this._bars.get(key) || this._createBar(key);
+        bars.set(key, bar);
+        fragment.appendChild(bar.wrapper);
+      });
+      this._chart.replaceChildren(fragment);
+      this._bars = bars;
+      this._barOrder = order;
+    }
+
     const priceValues = priceEntries.map(([_, price]) => price);
     const minPrice = Math.min(...priceValues);
     const maxPrice = Math.max(...priceValues);
     const avgPrice = priceValues.reduce((a, b) => a + b, 0) / priceValues.length;
 
-    const currentHour = new Date();
-    currentHour.setMinutes(0, 0, 0);
-    const currentHourStr = this._formatHourKey(currentHour);
+    const slotMs = this._slotSeconds(priceEntries) * 1000;
+    const currentHourStr = this._formatHourKey(new Date(Math.floor(Date.now() / slotMs) * slotMs));
 
-    return priceEntries.map(([hour, price]) => {
+    priceEntries.forEach(([hour, price]) => {
       const heightPercent = ((price - minPrice) / (maxPrice - minPrice)) * 100 || 50;
 
       let priceClass = 'medium-price';
@@ -319,35 +521,38 @@ class PstrykSchedulerCard extends HTMLElement {
         priceClass = 'high-price';
       }
 
-      const isScheduled = schedule[hour] && schedule[hour] !== 'Default';
+      const mode = this._modeFor(data, hour);
+      const isScheduled = mode && mode !== 'Default';
       const isCurrentHour = hour === currentHourStr;
 
       const barClasses = ['bar', priceClass];
       if (isScheduled) barClasses.push('scheduled');
       if (isCurrentHour) barClasses.push('current-hour');
+      const className = barClasses.join(' ');
+
+      // Patch only the bars whose price, mode or highlighting changed
+      const bar = this._bars.get(hour);
+      const signature = `${className}|${heightPercent}|${price}|${isScheduled ? mode : ''}`;
+      if (bar.signature === signature) {
+        return;
+      }
+      bar.signature = signature;
 
-      const date = new Date(hour);
-      const hourLabel = date.getHours().toString().padStart(2, '0') + ':00';
+      bar.bar.className = className;
+      bar.bar.style.height = `${heightPercent}%`;
+      bar.label.textContent = `${this._formatPrice(price)}€`;
 
-      let modeBadge = '';
       if (isScheduled) {
-        const mode = schedule[hour];
-        const shortMode = mode.replace('Buy (Charge car and charge battery)', 'Buy+Car+Batt')
-                              .replace('Buy (Charge car)', 'Buy+Car')
-                              .replace('Sell (PV Only)', 'Sell PV')
-                              .replace('Sell (All)', 'Sell All');
-        modeBadge = `<div class="mode-badge">${shortMode}</div>`;
+        bar.badge.textContent = mode.replace('Buy (Charge car and charge battery)', 'Buy+Car+Batt')
+                                    .replace('Buy (Charge car)', 'Buy+Car')
+                                    .replace('Sell (PV Only)', 'Sell PV')
+                                    .replace('Sell (All)', 'Sell All');
+        bar.badge.style.display = '';
+      } else {
+        bar.badge.textContent = '';
+        bar.badge.style.display = 'none';
       }
-
-      return `
-        <div class="bar-wrapper" data-hour="${hour}">
-          ${modeBadge}
-          <div class="price-label">${this._formatPrice(price)}€</div>
-          <div class="${barClasses.join(' ')}" style="height: ${heightPercent}%;"></div>
-          <div class="hour-label">${hourLabel}</div>
-        </div>
-      `;
-    }).join('');
+    });
   }
 
   _formatPrice(price) {
@@ -356,11 +561,40 @@ class PstrykSchedulerCard extends HTMLElement {
   }
 
   _formatHourKey(date) {
-    return date.toISOString().slice(0, 13) + ':00:00';
+    return date.toISOString().slice(0, 16) + ':00';
+  }
+
+  _serviceTarget() {
+    // Needed when several Pstryk entries are loaded
+    return this._config.entry_id ? { config_entry_id: this._config.entry_id } : {};
+  }
+
+  _modeFor(data, key) {
+    // The subscription sends the modes as resolved by the integration,
+    // including those set by rules
+    if (data.modes) {
+      return data.modes[key];
+    }
+    // An entry on a full hour also covers the slots of that hour without one
+    return data.schedule[key] || data.schedule[key.slice(0, 14) + '00:00'];
+  }
+
+  _slotSeconds(priceEntries) {
+    if (!this._useAttributes) {
+      return this._slotLength;
+    }
+    // Entity attributes carry no slot length, take the shortest step
+    let step = Infinity;
+    for (let i = 1; i < priceEntries.length; i++) {
+      const diff = (Date.parse(priceEntries[i][0] + 'Z') - Date.parse(priceEntries[i - 1][0] + 'Z')) / 1000;
+      if (diff > 0 && diff < step) {
+        step = diff;
+      }
+    }
+    return Number.isFinite(step) ? step : 3600;
   }
 
   _attachEventListeners() {
-    const bars = this.shadowRoot.querySelectorAll('.bar-wrapper');
     const modal = this.shadowRoot.getElementById('mode-modal');
     const saveBtn = this.shadowRoot.getElementById('save-btn');
     const clearBtn = this.shadowRoot.getElementById('clear-btn');
@@ -368,20 +602,22 @@ class PstrykSchedulerCard extends HTMLElement {
     const modeSelect = this.shadowRoot.getElementById('mode-select');
     const hourDisplay = this.shadowRoot.getElementById('selected-hour-display');
 
-    bars.forEach(bar => {
-      bar.addEventListener('click', (e) => {
-        this._selectedHour = bar.dataset.hour;
-        const scheduleEntity = this._hass.states[this._config.schedule_entity || 'sensor.pstryk_scheduler_schedule'];
-        const schedule = scheduleEntity?.attributes.schedule || {};
-        const currentMode = schedule[this._selectedHour] || 'Default';
+    // One delegated listener, bars come and go without rebinding
+    this._chart.addEventListener('click', (e) => {
+      const bar = e.target.closest('.bar-wrapper');
+      if (!bar) {
+        return;
+      }
+      this._selectedHour = bar.dataset.hour;
+      const data = this._getData();
+      const currentMode = (data && this._modeFor(data, this._selectedHour)) || 'Default';
 
-        modeSelect.value = currentMode;
+      modeSelect.value = currentMode;
 
-        const date = new Date(this._selectedHour);
-        hourDisplay.textContent = `Hour: ${date.toLocaleString()}`;
+      const date = new Date(this._selectedHour + 'Z');
+      hourDisplay.textContent = `Hour: ${date.toLocaleString()}`;
 
-        modal.classList.add('show');
-      });
+      modal.classList.add('show');
     });
 
     cancelBtn.addEventListener('click', () => {
@@ -391,6 +627,7 @@ class PstrykSchedulerCard extends HTMLElement {
     saveBtn.addEventListener('click', () => {
       const mode = modeSelect.value;
       this._hass.callService('pstryk_scheduler', 'set_schedule', {
+        ...this._serviceTarget(),
         hour: this._selectedHour,
         mode: mode
       });
@@ -399,6 +636,7 @@ class PstrykSchedulerCard extends HTMLElement {
 
     clearBtn.addEventListener('click', () => {
       this._hass.callService('pstryk_scheduler', 'clear_schedule', {
+        ...this._serviceTarget(),
         hour: this._selectedHour
       });
       modal.classList.remove('show');
@@ -0,0 +1 @@
+"""Tests for the Pstryk Energy Scheduler integration."""
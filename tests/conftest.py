@@ -0,0 +1,65 @@
+"""Fixtures for Pstryk Energy Scheduler tests."""
+from __future__ import annotations
+
+from datetime import UTC, datetime, timedelta
+from typing import Any
+
+import pytest
+from homeassistant.core import HomeAssistant
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+from pytest_homeassistant_custom_component.test_util.aiohttp import AiohttpClientMocker
+
+from custom_components.pstryk_scheduler.const import API_BASE_URL, CONF_API_KEY, DOMAIN
+
+pytest_plugins = "pytest_homeassistant_custom_component"
+
+API_URL = f"{API_BASE_URL}/prices"
+
+
+@pytest.fixture(autouse=True)
+def auto_enable_custom_integrations(enable_custom_integrations):
+    """Load the integration from custom_components in every test."""
+    yield
+
+
+def make_prices(
+    start: datetime, count: int, step: timedelta, first: float = 0.1
+) -> list[dict[str, Any]]:
+    """Return /prices entries rising by 0.01 per entry."""
+    return [
+        {
+            "hour": (start + index * step).strftime("%Y-%m-%dT%H:%M:%SZ"),
+            "price": round(first + index * 0.01, 4),
+        }
+        for index in range(count)
+    ]
+
+
+def utc_midnight() -> datetime:
+    """Return today's UTC midnight."""
+    return datetime.now(UTC).replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+async def async_setup_integration(
+    hass: HomeAssistant,
+    aioclient_mock: AiohttpClientMocker,
+    prices: list[dict[str, Any]] | None = None,
+    title: str = "Pstryk",
+    api_key: str = "test",
+    options: dict[str, Any] | None = None,
+) -> MockConfigEntry:
+    """Set up an entry whose API answers with the given prices, two days by default."""
+    if prices is None:
+        prices = make_prices(utc_midnight(), 48, timedelta(hours=1))
+    aioclient_mock.get(API_URL, json={"prices": prices})
+    entry = MockConfigEntry(
+        domain=DOMAIN,
+        data={CONF_API_KEY: api_key},
+        options=options or {},
+        title=title,
+        version=2,
+    )
+    entry.add_to_hass(hass)
+    assert await hass.config_entries.async_setup(entry.entry_id)
+    await hass.async_block_till_done()
+    return entry
@@ -0,0 +1,117 @@
+"""Tests for the cost accounting against the energy meters."""
+from __future__ import annotations
+
+from datetime import UTC, datetime, timedelta
+
+import pytest
+from homeassistant.core import HomeAssistant
+
+from custom_components.pstryk_scheduler.accounting import (
+    COST,
+    EXPORT,
+    IMPORT,
+    PERIOD_DAY,
+    PERIOD_MONTH,
+    CostAccountant,
+)
+from custom_components.pstryk_scheduler.const import (
+    CONF_IMPORT_SENSOR,
+    DOMAIN,
+    MODE_BUY,
+    MODE_DEFAULT,
+)
+
+from .conftest import async_setup_integration, make_prices
+
+METER = "sensor.grid_import"
+MIDNIGHT = datetime(2026, 10, 19, tzinfo=UTC)
+HOUR = timedelta(hours=1)
+
+
+def _ts(hours: float) -> float:
+    """Return the timestamp of a moment some hours after MIDNIGHT."""
+    return (MIDNIGHT + timedelta(hours=hours)).timestamp()
+
+
+@pytest.fixture
+async def accountant(hass: HomeAssistant, aioclient_mock, freezer) -> CostAccountant:
+    """Return the accountant of an entry following METER, Buy set at 01:00."""
+    freezer.move_to(MIDNIGHT + timedelta(minutes=30))
+    await hass.config.async_update(time_zone="UTC")
+    hass.states.async_set(METER, "12345.678", {"unit_of_measurement": "kWh"})
+    entry = await async_setup_integration(
+        hass, aioclient_mock, make_prices(MIDNIGHT, 48, HOUR), options={CONF_IMPORT_SENSOR: METER}
+    )
+    await hass.services.async_call(
+        DOMAIN, "set_schedule", {"hour": "2026-10-19T01:00:00", "mode": MODE_BUY}, blocking=True
+    )
+    return hass.data[DOMAIN][entry.entry_id].accounting
+
+
+def _totals(accountant: CostAccountant) -> dict[str, tuple[float, ...]]:
+    """Return the slot totals rounded for comparison."""
+    return {
+        key: tuple(round(value, 6) for value in totals.values())
+        for key, totals in accountant.slot_totals().items()
+    }
+
+
+async def test_book_splits_across_slots(accountant: CostAccountant) -> None:
+    """Energy over two slots is split by time and priced per slot and mode."""
+    accountant._book(IMPORT, 2.0, _ts(0.5), _ts(1.5))
+
+    assert _totals(accountant) == {
+        "2026-10-19T00:00:00": (1.0, 0.0, 0.1, 0.0),
+        "2026-10-19T01:00:00": (1.0, 0.0, 0.11, 0.0),
+    }
+    modes = accountant.mode_totals()
+    assert modes[MODE_DEFAULT]["cost"] == pytest.approx(0.1)
+    assert modes[MODE_BUY]["cost"] == pytest.approx(0.11)
+    assert accountant.period_total(PERIOD_DAY, IMPORT) == pytest.approx(2.0)
+
+
+async def test_book_long_gap_goes_to_the_reading(accountant: CostAccountant) -> None:
+    """Energy over a gap longer than the horizon is booked to the reading's slot."""
+    accountant._book(EXPORT, 3.0, _ts(0), _ts(2.5))
+
+    assert _totals(accountant) == {"2026-10-19T02:00:00": (0.0, 3.0, 0.0, 0.36)}
+    assert accountant.mode_totals() == {
+        MODE_DEFAULT: {"import": 0.0, "export": 3.0, "cost": 0.0, "revenue": pytest.approx(0.36)}
+    }
+
+
+async def test_add_totals_per_day_and_month(accountant: CostAccountant, freezer) -> None:
+    """A new day starts its own total, the month keeps adding up."""
+    accountant._add(IMPORT, int(_ts(1)), 1.0)
+    freezer.move_to(MIDNIGHT + timedelta(days=1, minutes=30))
+    accountant._add(IMPORT, int(_ts(24)), 2.0)
+
+    assert accountant.period_total(PERIOD_DAY, IMPORT) == pytest.approx(2.0)
+    assert accountant.period_total(PERIOD_DAY, COST) == pytest.approx(2.0 * 0.34)
+    assert accountant.period_total(PERIOD_MONTH, IMPORT) == pytest.approx(3.0)
+    assert accountant.mode_totals()[MODE_BUY]["import"] == pytest.approx(1.0)
+    assert accountant.mode_totals()[MODE_DEFAULT]["import"] == pytest.approx(2.0)
+
+
+async def test_small_dip_moves_the_baseline(
+    hass: HomeAssistant, accountant: CostAccountant
+) -> None:
+    """A reading slightly below the last one books nothing."""
+    hass.states.async_set(METER, "12345.677", {"unit_of_measurement": "kWh"})
+    await hass.async_block_till_done()
+    assert accountant.slot_totals() == {}
+
+    hass.states.async_set(METER, "12345.777", {"unit_of_measurement": "kWh"})
+    await hass.async_block_till_done()
+    assert accountant.period_total(PERIOD_DAY, IMPORT) == pytest.approx(0.1)
+
+
+async def test_meter_reset_books_the_new_count(
+    hass: HomeAssistant, accountant: CostAccountant
+) -> None:
+    """A reading far below the last one counts up from zero."""
+    hass.states.async_set(METER, "5", {"unit_of_measurement": "kWh"})
+    await hass.async_block_till_done()
+
+    assert accountant.period_total(PERIOD_DAY, IMPORT) == pytest.approx(5.0)
+    assert _totals(accountant) == {"2026-10-19T00:00:00": (5.0, 0.0, 0.5, 0.0)}
@@ -0,0 +1,199 @@
+"""Tests for price fetch retries, the circuit breaker and stale prices.
+
+The API client is pointed at the local stand-in of the Pstryk API from
+the benchmarks, whose error rate decides which requests fail.
+"""
+from __future__ import annotations
+
+from collections.abc import AsyncIterator
+from datetime import timedelta
+from unittest.mock import patch
+
+import aiohttp
+import pytest
+from homeassistant.core import HomeAssistant
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+from benchmarks.fake_api import FakeApiConfig, FakePstrykApi
+from custom_components.pstryk_scheduler.api import (
+    CircuitBreaker,
+    PstrykApiClient,
+    PstrykCircuitOpenError,
+)
+from custom_components.pstryk_scheduler.const import CONF_API_KEY, DATA_CLIENTS, DOMAIN
+
+API_KEY = "test"
+
+
+class FakeClock:
+    """Monotonic clock moved by hand."""
+
+    def __init__(self) -> None:
+        """Start at zero."""
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        """Return the current time."""
+        return self.now
+
+
+@pytest.fixture
+async def fake_api(socket_enabled) -> AsyncIterator[tuple[FakePstrykApi, str]]:
+    """Serve the fake API, yielding it with its base URL."""
+    api = FakePstrykApi(FakeApiConfig())
+    url = await api.start()
+    yield api, url
+    await api.stop()
+
+
+@pytest.fixture
+async def session(socket_enabled) -> AsyncIterator[aiohttp.ClientSession]:
+    """Return a client session for the fake API."""
+    async with aiohttp.ClientSession() as client_session:
+        yield client_session
+
+
+def make_client(
+    session: aiohttp.ClientSession, url: str, breaker: CircuitBreaker | None = None
+) -> PstrykApiClient:
+    """Return a client of the fake API retrying without delays."""
+    return PstrykApiClient(API_KEY, session, base_url=url, breaker=breaker, rng=lambda: 0.0)
+
+
+async def test_retries_until_success(fake_api, session) -> None:
+    """Failed requests are retried until one succeeds."""
+    api, url = fake_api
+    # With the default seed the first request fails and the second succeeds
+    api.config.error_rate = 0.5
+    client = make_client(session, url)
+
+    _, data = await client.async_fetch_prices()
+
+    assert data["prices"]
+    assert api.errors == 1
+    assert api.requests == 2
+    assert client.breaker.failures == 0
+
+
+async def test_gives_up_after_retries(fake_api, session) -> None:
+    """A fetch fails for good after the configured retries."""
+    api, url = fake_api
+    api.config.error_rate = 1.0
+    client = make_client(session, url)
+
+    with pytest.raises(aiohttp.ClientResponseError):
+        await client.async_fetch_prices()
+
+    assert api.requests == 3
+    assert client.breaker.failures == 1
+    assert not client.breaker.is_open
+
+
+async def test_breaker_open_half_open_close(fake_api, session) -> None:
+    """The circuit opens, lets one trial request through and closes on success."""
+    api, url = fake_api
+    api.config.error_rate = 1.0
+    clock = FakeClock()
+    breaker = CircuitBreaker(threshold=2, reset_timeout=60, clock=clock)
+    client = make_client(session, url, breaker)
+
+    for _ in range(2):
+        with pytest.raises(aiohttp.ClientResponseError):
+            await client.async_fetch_prices()
+    assert breaker.is_open
+    assert breaker.retry_in == 60
+
+    # Open: refused without a request
+    requests = api.requests
+    with pytest.raises(PstrykCircuitOpenError):
+        await client.async_fetch_prices()
+    assert api.requests == requests
+
+    # Half-open: a single trial request, whose failure opens the circuit again
+    clock.now = 61
+    assert breaker.is_half_open
+    with pytest.raises(aiohttp.ClientResponseError):
+        await client.async_fetch_prices()
+    assert api.requests == requests + 1
+    assert breaker.is_open
+
+    # Half-open again: a successful trial closes the circuit
+    clock.now = 122
+    api.config.error_rate = 0.0
+    _, data = await client.async_fetch_prices()
+    assert data["prices"]
+    assert not breaker.is_open
+    assert not breaker.is_half_open
+    assert breaker.failures == 0
+
+
+async def _async_setup_entry(hass: HomeAssistant, client: PstrykApiClient) -> MockConfigEntry:
+    """Set up an entry fetching through the given client."""
+    hass.data[DATA_CLIENTS] = {API_KEY: client}
+    entry = MockConfigEntry(
+        domain=DOMAIN, data={CONF_API_KEY: API_KEY}, title="Pstryk", version=2
+    )
+    entry.add_to_hass(hass)
+    assert await hass.config_entries.async_setup(entry.entry_id)
+    await hass.async_block_till_done()
+    return entry
+
+
+async def test_serves_stale_prices(hass: HomeAssistant, fake_api, session) -> None:
+    """Cached prices are served as stale while the API fails."""
+    api, url = fake_api
+    clock = FakeClock()
+    breaker = CircuitBreaker(threshold=1, reset_timeout=3600, clock=clock)
+    entry = await _async_setup_entry(hass, make_client(session, url, breaker))
+    coordinator = hass.data[DOMAIN][entry.entry_id]
+    state = hass.states.get("sensor.pstryk_current_price")
+    assert state.attributes["stale"] is False
+    price = state.state
+
+    api.config.error_rate = 1.0
+    await coordinator.async_refresh()
+    await hass.async_block_till_done()
+
+    assert coordinator.last_update_success
+    assert coordinator.metrics.refresh_failures == 1
+    state = hass.states.get("sensor.pstryk_current_price")
+    assert state.state == price
+    assert state.attributes["stale"] is True
+    # The next fetch waits for the circuit to let a trial request through
+    assert breaker.is_open
+    assert coordinator.update_interval == timedelta(seconds=3600)
+
+    clock.now = 3600
+    api.config.error_rate = 0.0
+    await coordinator.async_refresh()
+    await hass.async_block_till_done()
+
+    assert hass.states.get("sensor.pstryk_current_price").attributes["stale"] is False
+
+    assert await hass.config_entries.async_unload(entry.entry_id)
+
+
+async def test_storage_error_is_not_a_fetch_failure(
+    hass: HomeAssistant, fake_api, session
+) -> None:
+    """Prices that could not be saved are fresh and written again next time."""
+    api, url = fake_api
+    entry = await _async_setup_entry(hass, make_client(session, url))
+    coordinator = hass.data[DOMAIN][entry.entry_id]
+
+    api.publish()
+    with patch.object(coordinator._price_store, "async_save", side_effect=OSError):
+        await coordinator.async_refresh()
+    await hass.async_block_till_done()
+
+    assert coordinator.last_update_success
+    assert coordinator.metrics.refresh_failures == 0
+    assert coordinator.data["stale"] is False
+
+    # The same payload is processed and saved again
+    with patch.object(coordinator._price_store, "async_save") as save:
+        await coordinator.async_refresh()
+    save.assert_called_once()
+    assert coordinator.metrics.cache_hits == 0
+
+    assert await hass.config_entries.async_unload(entry.entry_id)
@@ -0,0 +1,54 @@
+"""Tests for the price archive."""
+from __future__ import annotations
+
+import os
+
+from custom_components.pstryk_scheduler.archive import (
+    RECORD,
+    PriceArchive,
+    hourly_statistics,
+)
+
+NAN = float("nan")
+
+
+def test_append_and_query(tmp_path) -> None:
+    """Slots are appended once, in order, and read back by range."""
+    archive = PriceArchive(str(tmp_path / "storage" / "archive"))
+    assert archive.query(0, 10_000) == []
+
+    assert archive.append([(1800, 0.2), (0, 0.1), (900, NAN)]) == [(0, 0.1), (1800, 0.2)]
+    # Slots up to the last archived one keep their first price
+    assert archive.append([(1800, 0.9), (2700, 0.3), (3600, 0.4)]) == [(2700, 0.3), (3600, 0.4)]
+
+    assert archive.query(0, 10_000) == [(0, 0.1), (1800, 0.2), (2700, 0.3), (3600, 0.4)]
+    assert archive.query(900, 3600) == [(1800, 0.2), (2700, 0.3)]
+    assert archive.query(5000, 6000) == []
+
+
+def test_truncated_tail_is_dropped(tmp_path) -> None:
+    """A record cut short by an interrupted write is ignored and overwritten."""
+    archive = PriceArchive(str(tmp_path / "archive"))
+    archive.append([(0, 0.1), (900, 0.2)])
+    with open(archive.path, "ab") as handle:
+        handle.write(RECORD.pack(1800, 0.3)[:5])
+
+    assert archive.query(0, 10_000) == [(0, 0.1), (900, 0.2)]
+    assert archive.append([(1800, 0.3)]) == [(1800, 0.3)]
+    assert os.path.getsize(archive.path) == 3 * RECORD.size
+    assert archive.query(0, 10_000) == [(0, 0.1), (900, 0.2), (1800, 0.3)]
+
+    archive.remove()
+    archive.remove()
+    assert archive.query(0, 10_000) == []
+
+
+def test_hourly_statistics() -> None:
+    """Slots are grouped into hours of mean, min and max."""
+    points = [(0, 0.1), (900, 0.3), (1800, 0.2), (2700, 0.2), (3600, 0.5), (10800, 0.7)]
+
+    assert hourly_statistics(points) == [
+        (0, 0.2, 0.1, 0.3),
+        (3600, 0.5, 0.5, 0.5),
+        (10800, 0.7, 0.7, 0.7),
+    ]
@@ -0,0 +1,107 @@
+"""Tests for the schedule timeline and calendar."""
+from __future__ import annotations
+
+import random
+from datetime import UTC, datetime, timedelta
+
+from homeassistant.core import HomeAssistant
+
+from custom_components.pstryk_scheduler.const import (
+    DOMAIN,
+    MODE_BUY,
+    MODE_DEFAULT,
+    MODE_SELL,
+)
+from custom_components.pstryk_scheduler.prices import slot_key
+from custom_components.pstryk_scheduler.timeline import ScheduleTimeline
+
+from .conftest import async_setup_integration, make_prices
+
+CALENDAR = "calendar.pstryk_schedule"
+MIDNIGHT = datetime(2026, 10, 19, tzinfo=UTC)
+
+
+def _brute_force(modes: dict[int, str], step: int, start: int, end: int) -> list:
+    """Return the merged intervals by walking every slot."""
+    intervals: list = []
+    for moment in range(start, end, step):
+        mode = modes.get(moment, MODE_DEFAULT)
+        if mode == MODE_DEFAULT:
+            continue
+        if intervals and intervals[-1][1] == moment and intervals[-1][2] == mode:
+            intervals[-1] = (intervals[-1][0], moment + step, mode)
+        else:
+            intervals.append((moment, moment + step, mode))
+    return intervals
+
+
+def test_timeline_matches_resolver() -> None:
+    """Updated hour by hour, the timeline merges what the resolver returns."""
+    rng = random.Random(1)
+    base = int(MIDNIGHT.timestamp())
+    for step in (900, 3600):
+        modes: dict[int, str] = {}
+
+        def resolve(moment: datetime, modes: dict[int, str] = modes) -> str:
+            return modes.get(int(moment.timestamp()), MODE_DEFAULT)
+
+        timeline = ScheduleTimeline(step, resolve)
+        for _ in range(2000):
+            moment = base + rng.randrange(48 * 3600 // step) * step
+            modes[moment] = rng.choice([MODE_BUY, MODE_SELL, MODE_DEFAULT])
+            timeline.update([slot_key(datetime.fromtimestamp(moment, UTC))])
+
+        expected = _brute_force(modes, step, base, base + 48 * 3600)
+        assert timeline.between(base, base + 48 * 3600) == expected
+        assert timeline.current_or_next(base) == expected[0]
+
+        rebuilt = ScheduleTimeline(step, resolve)
+        rebuilt.rebuild(
+            [slot_key(datetime.fromtimestamp(moment, UTC)) for moment in modes], step
+        )
+        assert rebuilt.between(0, 2**40) == expected
+
+
+async def test_calendar_shows_rule_modes(
+    hass: HomeAssistant, aioclient_mock, freezer
+) -> None:
+    """Modes set by rules are events, split by the schedule entries."""
+    freezer.move_to(MIDNIGHT + timedelta(minutes=30))
+    await hass.config.async_update(time_zone="UTC")
+    await async_setup_integration(
+        hass, aioclient_mock, make_prices(MIDNIGHT, 24, timedelta(hours=1))
+    )
+    assert hass.states.get(CALENDAR).state == "off"
+
+    await hass.services.async_call(
+        DOMAIN,
+        "add_rule",
+        {"mode": MODE_BUY, "after": "02:00", "before": "04:00"},
+        blocking=True,
+    )
+    await hass.services.async_call(
+        DOMAIN, "set_schedule", {"hour": "2026-10-19T03:00:00", "mode": MODE_SELL}, blocking=True
+    )
+    await hass.async_block_till_done()
+
+    response = await hass.services.async_call(
+        "calendar",
+        "get_events",
+        {"entity_id": CALENDAR, "start_date_time": MIDNIGHT, "duration": {"days": 2}},
+        blocking=True,
+        return_response=True,
+    )
+    events = [
+        (event["start"], event["end"], event["summary"])
+        for event in response[CALENDAR]["events"]
+    ]
+    assert events == [
+        ("2026-10-19T02:00:00+00:00", "2026-10-19T03:00:00+00:00", MODE_BUY),
+        ("2026-10-19T03:00:00+00:00", "2026-10-19T04:00:00+00:00", MODE_SELL),
+        # Beyond the prices the rule is shown up to a week ahead
+        ("2026-10-20T02:00:00+00:00", "2026-10-20T04:00:00+00:00", MODE_BUY),
+    ]
+
+    state = hass.states.get(CALENDAR)
+    assert state.attributes["message"] == MODE_BUY
+    assert state.attributes["start_time"] == "2026-10-19 02:00:00"
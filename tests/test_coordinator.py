@@ -0,0 +1,140 @@
+"""Tests for the fetch interval and the schedule kept by the coordinator."""
+from __future__ import annotations
+
+from datetime import UTC, datetime, timedelta
+from unittest.mock import patch
+
+import pytest
+from homeassistant.core import HomeAssistant
+from homeassistant.util import dt as dt_util
+from pytest_homeassistant_custom_component.common import async_fire_time_changed
+
+from custom_components.pstryk_scheduler.const import (
+    API_BREAKER_RESET,
+    API_BREAKER_THRESHOLD,
+    DEFAULT_SCAN_INTERVAL,
+    DOMAIN,
+    MODE_BUY,
+    SCHEDULE_SAVE_DELAY,
+    STORAGE_KEY,
+    STORAGE_KEY_ACCOUNTING,
+    STORAGE_KEY_PRICES,
+)
+
+from .conftest import API_URL, async_setup_integration, make_prices
+
+MIDNIGHT = datetime(2026, 10, 19, tzinfo=UTC)
+RETRY = timedelta(minutes=DEFAULT_SCAN_INTERVAL)
+
+
+
+@pytest.mark.parametrize(
+    ("hour", "days", "interval"),
+    [
+        # Before publication the next fetch waits for it
+        (10, 1, timedelta(hours=4)),
+        # Past publication without tomorrow's prices, poll until they appear
+        (15, 1, RETRY),
+        # Tomorrow is covered, wait for the next publication
+        (15, 2, timedelta(hours=23)),
+        (10, 2, timedelta(days=1, hours=4)),
+    ],
+)
+async def test_fetch_interval(
+    hass: HomeAssistant, aioclient_mock, freezer, hour: int, days: int, interval: timedelta
+) -> None:
+    """Prices are fetched again around the day-ahead publication."""
+    freezer.move_to(MIDNIGHT + timedelta(hours=hour))
+    await hass.config.async_update(time_zone="UTC")
+    entry = await async_setup_integration(
+        hass, aioclient_mock, make_prices(MIDNIGHT, 24 * days, timedelta(hours=1))
+    )
+    coordinator = hass.data[DOMAIN][entry.entry_id]
+
+    assert coordinator.update_interval == interval
+    assert coordinator.metrics.next_fetch == MIDNIGHT + timedelta(hours=hour) + interval
+
+
+async def test_fetch_interval_after_failure(
+    hass: HomeAssistant, aioclient_mock, freezer
+) -> None:
+    """A failed fetch is retried at the default interval, or once the circuit lets it."""
+    freezer.move_to(MIDNIGHT + timedelta(hours=10))
+    await hass.config.async_update(time_zone="UTC")
+    entry = await async_setup_integration(
+        hass, aioclient_mock, make_prices(MIDNIGHT, 24, timedelta(hours=1))
+    )
+    coordinator = hass.data[DOMAIN][entry.entry_id]
+
+    aioclient_mock.clear_requests()
+    aioclient_mock.get(API_URL, status=500)
+    with patch("custom_components.pstryk_scheduler.api.backoff_delay", return_value=0):
+        await coordinator.async_refresh()
+        assert coordinator.data["stale"]
+        assert coordinator.update_interval == RETRY
+
+        for _ in range(API_BREAKER_THRESHOLD - 1):
+            await coordinator.async_refresh()
+    assert coordinator.update_interval.total_seconds() == pytest.approx(API_BREAKER_RESET)
+
+
+async def _async_set_hours(hass: HomeAssistant, count: int) -> None:
+    """Schedule Buy for the first hours of 2030."""
+    for hour in range(count):
+        await hass.services.async_call(
+            DOMAIN,
+            "set_schedule",
+            {"hour": f"2030-01-01T{hour:02d}:00:00", "mode": MODE_BUY},
+            blocking=True,
+        )
+
+
+async def test_schedule_edits_are_saved_once(
+    hass: HomeAssistant, aioclient_mock, hass_storage, freezer
+) -> None:
+    """A burst of edits is written once, after the save delay."""
+    entry = await async_setup_integration(hass, aioclient_mock)
+    coordinator = hass.data[DOMAIN][entry.entry_id]
+    key = f"{STORAGE_KEY}.{entry.entry_id}"
+
+    await _async_set_hours(hass, 24)
+    await hass.async_block_till_done()
+    assert key not in hass_storage
+
+    freezer.tick(timedelta(seconds=SCHEDULE_SAVE_DELAY + 1))
+    async_fire_time_changed(hass, dt_util.utcnow())
+    await hass.async_block_till_done()
+    assert len(hass_storage[key]["data"]["schedule"]) == 24
+    assert coordinator.metrics.schedule_saves == 1
+
+    assert await hass.config_entries.async_unload(entry.entry_id)
+    assert coordinator.metrics.schedule_saves == 1
+
+
+async def test_unload_flushes_pending_edits(
+    hass: HomeAssistant, aioclient_mock, hass_storage
+) -> None:
+    """Edits still waiting for the save delay are written on unload."""
+    entry = await async_setup_integration(hass, aioclient_mock)
+    await _async_set_hours(hass, 3)
+
+    assert await hass.config_entries.async_unload(entry.entry_id)
+    await hass.async_block_till_done()
+
+    assert len(hass_storage[f"{STORAGE_KEY}.{entry.entry_id}"]["data"]["schedule"]) == 3
+
+
+async def test_remove_entry_deletes_its_stores(
+    hass: HomeAssistant, aioclient_mock, hass_storage
+) -> None:
+    """Deleting an entry removes the prices it cached and its cost totals."""
+    entry = await async_setup_integration(hass, aioclient_mock)
+    keys = [f"{key}.{entry.entry_id}" for key in (STORAGE_KEY_PRICES, STORAGE_KEY_ACCOUNTING)]
+    hass_storage[keys[1]] = {"version": 1, "key": keys[1], "data": {}}
+    await hass.async_block_till_done()
+    assert keys[0] in hass_storage
+
+    assert await hass.config_entries.async_remove(entry.entry_id)
+    await hass.async_block_till_done()
+    for key in keys:
+        assert key not in hass_storage
@@ -0,0 +1,70 @@
+"""Tests for the mode executor."""
+from __future__ import annotations
+
+from datetime import UTC, datetime, timedelta
+
+from homeassistant.core import HomeAssistant
+from pytest_homeassistant_custom_component.common import (
+    async_capture_events,
+    async_fire_time_changed,
+    async_mock_service,
+)
+
+from custom_components.pstryk_scheduler.const import (
+    DOMAIN,
+    EVENT_MODE_CHANGED,
+    MODE_ACTION_OPTIONS,
+    MODE_BUY,
+    MODE_DEFAULT,
+    MODE_SELL,
+)
+
+from .conftest import async_setup_integration, make_prices
+
+MIDNIGHT = datetime(2026, 10, 19, tzinfo=UTC)
+SCRIPT = "script.grid_buy"
+
+
+async def test_mode_change_fires_at_slot_boundary(
+    hass: HomeAssistant, aioclient_mock, freezer
+) -> None:
+    """The timer runs the action at the boundary and is cancelled on unload."""
+    freezer.move_to(MIDNIGHT + timedelta(minutes=30))
+    events = async_capture_events(hass, EVENT_MODE_CHANGED)
+    calls = async_mock_service(hass, "script", "turn_on")
+    entry = await async_setup_integration(
+        hass,
+        aioclient_mock,
+        make_prices(MIDNIGHT, 24, timedelta(hours=1)),
+        options={MODE_ACTION_OPTIONS[MODE_BUY]: SCRIPT},
+    )
+    for hour, mode in (("01", MODE_BUY), ("02", MODE_SELL)):
+        await hass.services.async_call(
+            DOMAIN,
+            "set_schedule",
+            {"hour": f"2026-10-19T{hour}:00:00", "mode": mode},
+            blocking=True,
+        )
+
+    freezer.move_to(MIDNIGHT + timedelta(minutes=59, seconds=59))
+    async_fire_time_changed(hass)
+    await hass.async_block_till_done()
+    assert events == []
+
+    freezer.move_to(MIDNIGHT + timedelta(hours=1))
+    async_fire_time_changed(hass)
+    await hass.async_block_till_done()
+    assert [(event.data["previous_mode"], event.data["mode"]) for event in events] == [
+        (MODE_DEFAULT, MODE_BUY)
+    ]
+    assert len(calls) == 1
+    assert calls[0].data == {
+        "entity_id": SCRIPT,
+        "variables": {"mode": MODE_BUY, "previous_mode": MODE_DEFAULT},
+    }
+
+    assert await hass.config_entries.async_unload(entry.entry_id)
+    freezer.move_to(MIDNIGHT + timedelta(hours=2))
+    async_fire_time_changed(hass)
+    await hass.async_block_till_done()
+    assert len(events) == 1
@@ -0,0 +1,71 @@
+"""Tests for the schedule planners."""
+from __future__ import annotations
+
+from array import array
+from datetime import UTC, datetime
+
+from custom_components.pstryk_scheduler.const import MODE_BUY, MODE_DEFAULT, MODE_SELL
+from custom_components.pstryk_scheduler.planner import (
+    Battery,
+    plan_battery,
+    plan_cheapest,
+)
+from custom_components.pstryk_scheduler.prices import PriceSeries
+
+START = int(datetime(2026, 10, 19, tzinfo=UTC).timestamp())
+NAN = float("nan")
+B, D, S = MODE_BUY, MODE_DEFAULT, MODE_SELL
+
+
+def _series(prices: list[float], slot_seconds: int = 3600) -> PriceSeries:
+    """Return a series of the given slot prices."""
+    return PriceSeries(START, slot_seconds, array("d", prices))
+
+
+def test_cheapest_slots() -> None:
+    """The cheapest priced slots of the window get the mode."""
+    series = _series([0.5, 0.1, NAN, 0.3, 0.2, 0.05])
+
+    assert plan_cheapest(series, 0, 5, 2, MODE_BUY) == [D, B, D, D, B]
+    assert plan_cheapest(series, 0, 6, 10, MODE_BUY) == [B, B, D, B, B, B]
+
+
+def test_battery_arbitrage() -> None:
+    """The battery fills in the cheap slots and empties in the dear ones."""
+    series = _series([0.3, 0.1, 0.1, 0.5, NAN, 0.5, 0.2])
+    battery = Battery(capacity=2, charge_rate=1, discharge_rate=1, efficiency=0.81)
+
+    assert plan_battery(series, 0, 7, battery) == [D, B, B, S, D, S, D]
+
+
+def test_battery_idles_when_losses_eat_the_spread() -> None:
+    """A spread smaller than the round-trip loss is not traded."""
+    series = _series([0.4, 0.45])
+    battery = Battery(capacity=1, charge_rate=1, discharge_rate=1, efficiency=0.81)
+
+    assert plan_battery(series, 0, 2, battery) == [D, D]
+
+
+def test_battery_keeps_its_starting_charge() -> None:
+    """A charged battery sells first and buys back before the window ends."""
+    series = _series([0.5, 0.1])
+    battery = Battery(capacity=1, charge_rate=1, discharge_rate=1, efficiency=1, soc=1)
+
+    assert plan_battery(series, 0, 2, battery) == [S, B]
+
+
+def test_battery_rates_are_floored() -> None:
+    """A rate between two steps charges the lower one, never more than it can."""
+    series = _series([0.1, 0.11, 0.12, 0.13, 0.9])
+    battery = Battery(capacity=1, charge_rate=0.37, discharge_rate=1, efficiency=1)
+
+    # 0.37 kWh a slot moves 0.3 kWh, four slots to fill rather than three
+    assert plan_battery(series, 0, 5, battery, levels=10) == [B, B, B, B, S]
+
+
+def test_battery_slow_rate_refines_the_grid() -> None:
+    """A rate moving less than one step a slot is still planned."""
+    series = _series([0.1] * 4 + [0.5] * 4, slot_seconds=900)
+    battery = Battery(capacity=10, charge_rate=0.1, discharge_rate=0.1, efficiency=1)
+
+    assert plan_battery(series, 0, 8, battery) == [B] * 4 + [S] * 4
@@ -0,0 +1,98 @@
+"""Tests for the price series."""
+from __future__ import annotations
+
+from datetime import UTC, datetime, timedelta
+
+import pytest
+
+from custom_components.pstryk_scheduler.prices import (
+    MAX_CACHED_QUERIES,
+    PriceSeries,
+    PriceStats,
+    entry_lengths,
+)
+
+from .conftest import make_prices
+
+START = datetime(2025, 9, 30, tzinfo=UTC)
+HOUR = timedelta(hours=1)
+QUARTER = timedelta(minutes=15)
+
+
+def test_hourly_feed() -> None:
+    """An hourly feed has one slot per entry."""
+    series = PriceSeries.from_api({"prices": make_prices(START, 24, HOUR)})
+
+    assert series.slot_seconds == 3600
+    assert len(series) == 24
+    assert series.price_at(START + timedelta(hours=5, minutes=40)) == 0.15
+    assert series.end == START + timedelta(days=1)
+
+
+def test_mixed_resolution_feed() -> None:
+    """Hourly prices fill all quarter-hour slots of their hour."""
+    day = START + timedelta(days=1)
+    data = {
+        "prices": make_prices(START, 24, HOUR) + make_prices(day, 96, QUARTER, first=1.0)
+    }
+    series = PriceSeries.from_api(data)
+
+    assert series.slot_seconds == 900
+    assert len(series) == 2 * 96
+    assert series.price_at(START + timedelta(hours=10, minutes=20)) == 0.2
+    assert series.price_at(START + timedelta(hours=23, minutes=45)) == 0.33
+    assert series.price_at(day) == 1.0
+    assert series.price_at(day + timedelta(minutes=20)) == 1.01
+    assert series.day_stats(START.date()).count == 96
+    assert series.day_stats(day.date()).count == 96
+
+
+def test_gaps_stay_uncovered() -> None:
+    """A missing entry leaves its slot without a price."""
+    prices = make_prices(START, 6, HOUR)
+    del prices[3]
+    series = PriceSeries.from_api({"prices": prices})
+
+    assert series.slot_seconds == 3600
+    assert series.price_at(START + timedelta(hours=2)) == 0.12
+    assert series.price_at(START + timedelta(hours=3)) is None
+    assert series.price_at(START + timedelta(hours=4)) == 0.14
+
+
+def test_entry_lengths() -> None:
+    """Entries last the shorter step to a neighbour, at most an hour."""
+    assert entry_lengths([0]) == [3600]
+    assert entry_lengths([0, 3600, 4500, 5400]) == [3600, 900, 900, 900]
+    assert entry_lengths([0, 3600, 14400, 18000]) == [3600, 3600, 3600, 3600]
+
+
+def test_query_cache_is_bounded() -> None:
+    """Window answers are kept for repeated queries, the oldest are dropped."""
+    series = PriceSeries.from_api({"prices": make_prices(START, 96, QUARTER)})
+
+    assert series.best_window(0, 96, 4) == 0
+    assert series.best_window(0, 96, 4, cheapest=False) == 92
+    assert series.extreme_slots(8, 16, 2, cheapest=False) == [15, 14]
+    for slots in range(1, MAX_CACHED_QUERIES + 1):
+        series.best_window(0, 96, slots)
+        series.best_window(0, 96, 4)
+    assert len(series._queries) == MAX_CACHED_QUERIES
+    assert ("window", 0, 96, 4, True) in series._queries
+    assert ("window", 0, 96, 4, False) not in series._queries
+
+
+def test_stats_rank_ties_and_missing_slots() -> None:
+    """Equal prices share the lowest rank and slots without a price are left out."""
+    data = {"prices": make_prices(START, 6, HOUR)}
+    data["prices"][4]["price"] = data["prices"][1]["price"]
+    del data["prices"][2]
+    stats = PriceSeries.from_api(data).day_stats(START.date())
+
+    assert list(stats.sorted_values) == [0.1, 0.11, 0.11, 0.13, 0.15]
+    assert [stats.rank(price) for price in (0.1, 0.11, 0.13, 0.15)] == [1, 2, 4, 5]
+    assert stats.percent_rank(0.11) == 25
+    assert stats.percent_rank(0.15) == 100
+    assert stats.percentile(50) == 0.11
+    assert stats.percentile(87.5) == pytest.approx(0.14)
+    assert PriceStats.from_values(iter([0.2])).percent_rank(0.2) == 0
+    assert PriceStats.from_values(iter([])) is None
@@ -0,0 +1,78 @@
+"""Tests for the price ranking sensors and the cheapest slots binary sensor."""
+from __future__ import annotations
+
+from datetime import UTC, datetime, timedelta
+
+import pytest
+from homeassistant.const import STATE_OFF, STATE_ON, STATE_UNKNOWN
+from homeassistant.core import HomeAssistant
+from pytest_homeassistant_custom_component.common import async_fire_time_changed
+
+from .conftest import async_setup_integration, make_prices
+
+MIDNIGHT = datetime(2026, 10, 19, tzinfo=UTC)
+RANK = "sensor.pstryk_price_rank"
+PERCENTILE = "sensor.pstryk_price_percentile"
+LEVEL = "sensor.pstryk_price_level"
+CHEAPEST = "binary_sensor.pstryk_cheapest_4_slots"
+
+
+@pytest.fixture
+async def prices(hass: HomeAssistant, aioclient_mock, freezer) -> None:
+    """Set up a day priced 0.10 rising by 0.01 an hour, 04:00 missing, 06:00 as 03:00."""
+    freezer.move_to(MIDNIGHT + timedelta(minutes=30))
+    await hass.config.async_update(time_zone="UTC")
+    entries = make_prices(MIDNIGHT, 24, timedelta(hours=1))
+    entries[6]["price"] = entries[3]["price"]
+    del entries[4]
+    await async_setup_integration(hass, aioclient_mock, entries)
+
+
+async def _async_move_to(hass: HomeAssistant, freezer, hours: float) -> None:
+    """Move to a moment of the day and let the slot timer run."""
+    freezer.move_to(MIDNIGHT + timedelta(hours=hours))
+    async_fire_time_changed(hass)
+    await hass.async_block_till_done()
+
+
+def _states(hass: HomeAssistant) -> tuple[str, ...]:
+    """Return the states of the rank, level and cheapest slots entities."""
+    return tuple(hass.states.get(entity_id).state for entity_id in (RANK, LEVEL, CHEAPEST))
+
+
+def _percentile(hass: HomeAssistant) -> float:
+    """Return the state of the percentile sensor."""
+    return float(hass.states.get(PERCENTILE).state)
+
+
+@pytest.mark.usefixtures("prices")
+async def test_rank_and_percentile(hass: HomeAssistant) -> None:
+    """The cheapest slot ranks first, missing slots are left out of the day."""
+    assert _states(hass) == ("1", "cheap", STATE_ON)
+    assert _percentile(hass) == 0
+    assert hass.states.get(RANK).attributes["slots"] == 23
+    assert hass.states.get(CHEAPEST).attributes["threshold"] == 0.13
+
+
+@pytest.mark.usefixtures("prices")
+async def test_cheapest_slots_window_edges(hass: HomeAssistant, freezer) -> None:
+    """The binary sensor turns on and off at slot boundaries, ties included."""
+    await _async_move_to(hass, freezer, 3)
+    assert _states(hass) == ("4", "cheap", STATE_ON)
+    assert _percentile(hass) == pytest.approx(3 / 22 * 100)
+
+    # A slot without a price has no rank
+    await _async_move_to(hass, freezer, 4)
+    assert _states(hass) == (STATE_UNKNOWN, STATE_UNKNOWN, STATE_UNKNOWN)
+    assert hass.states.get(PERCENTILE).state == STATE_UNKNOWN
+
+    await _async_move_to(hass, freezer, 5)
+    assert _states(hass) == ("6", "cheap", STATE_OFF)
+    assert _percentile(hass) == pytest.approx(5 / 22 * 100)
+
+    # Priced as the fourth cheapest slot, so it shares its rank
+    await _async_move_to(hass, freezer, 6)
+    assert _states(hass)[0::2] == ("4", STATE_ON)
+
+    await _async_move_to(hass, freezer, 7)
+    assert _states(hass)[0::2] == ("7", STATE_OFF)
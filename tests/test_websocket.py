@@ -0,0 +1,105 @@
+"""Tests for the WebSocket commands of the card."""
+from __future__ import annotations
+
+from homeassistant.core import HomeAssistant
+
+from custom_components.pstryk_scheduler.const import DOMAIN, MODE_BUY, MODE_SELL
+
+from .conftest import async_setup_integration
+
+
+async def test_snapshot_resolves_rule_modes(
+    hass: HomeAssistant, aioclient_mock, hass_ws_client
+) -> None:
+    """Slots set by rules carry their mode in the snapshot."""
+    entry = await async_setup_integration(hass, aioclient_mock)
+    coordinator = hass.data[DOMAIN][entry.entry_id]
+    await hass.services.async_call(DOMAIN, "add_rule", {"mode": MODE_BUY}, blocking=True)
+    first = next(iter(coordinator.data["prices"]))
+    await hass.services.async_call(
+        DOMAIN, "set_schedule", {"hour": first, "mode": MODE_SELL}, blocking=True
+    )
+
+    client = await hass_ws_client(hass)
+    await client.send_json({"id": 1, "type": f"{DOMAIN}/data"})
+    result = (await client.receive_json())["result"]
+
+    assert result["schedule"] == {first: MODE_SELL}
+    assert len(result["modes"]) == len(result["prices"])
+    assert result["modes"][first] == MODE_SELL
+    assert set(result["modes"].values()) == {MODE_BUY, MODE_SELL}
+
+
+async def test_subscription_sends_rule_mode_diffs(
+    hass: HomeAssistant, aioclient_mock, hass_ws_client
+) -> None:
+    """Adding and removing a rule sends the slots whose resolved mode changed."""
+    await async_setup_integration(hass, aioclient_mock)
+    client = await hass_ws_client(hass)
+    await client.send_json({"id": 1, "type": f"{DOMAIN}/subscribe"})
+    assert (await client.receive_json())["success"]
+    full = (await client.receive_json())["event"]
+    assert full["full"] is True
+    assert full["modes"] == {}
+
+    response = await hass.services.async_call(
+        DOMAIN, "add_rule", {"mode": MODE_BUY}, blocking=True, return_response=True
+    )
+    diff = (await client.receive_json())["event"]
+    assert set(diff["modes"]) == set(full["prices"])
+    assert "schedule" not in diff
+
+    await hass.services.async_call(
+        DOMAIN, "remove_rule", {"rule_id": response["rule_id"]}, blocking=True
+    )
+    diff = (await client.receive_json())["event"]
+    assert diff["modes"] == {}
+    assert set(diff["modes_removed"]) == set(full["prices"])
+
+
+async def test_several_entries_need_an_entry_id(
+    hass: HomeAssistant, aioclient_mock, hass_ws_client
+) -> None:
+    """Without an entry id the commands refuse to pick one of several entries."""
+    first = await async_setup_integration(hass, aioclient_mock, title="First")
+    await async_setup_integration(hass, aioclient_mock, title="Second")
+    client = await hass_ws_client(hass)
+
+    await client.send_json({"id": 1, "type": f"{DOMAIN}/subscribe"})
+    response = await client.receive_json()
+    assert not response["success"]
+    assert response["error"]["code"] == "invalid_format"
+
+    await client.send_json({"id": 2, "type": f"{DOMAIN}/data", "entry_id": "missing"})
+    response = await client.receive_json()
+    assert response["error"]["code"] == "not_found"
+
+    await client.send_json({"id": 3, "type": f"{DOMAIN}/data", "entry_id": first.entry_id})
+    assert (await client.receive_json())["success"]
+
+
+async def test_reload_ends_subscription(
+    hass: HomeAssistant, aioclient_mock, hass_ws_client
+) -> None:
+    """A reload of the entry tells the card to subscribe to the new coordinator."""
+    entry = await async_setup_integration(hass, aioclient_mock)
+    client = await hass_ws_client(hass)
+    await client.send_json({"id": 1, "type": f"{DOMAIN}/subscribe"})
+    assert (await client.receive_json())["success"]
+    assert (await client.receive_json())["event"]["full"]
+
+    assert await hass.config_entries.async_reload(entry.entry_id)
+    await hass.async_block_till_done()
+    assert (await client.receive_json())["event"] == {"unloaded": True}
+
+    await client.send_json({"id": 2, "type": "unsubscribe_events", "subscription": 1})
+    assert (await client.receive_json())["success"]
+    await client.send_json({"id": 3, "type": f"{DOMAIN}/subscribe"})
+    assert (await client.receive_json())["success"]
+    assert (await client.receive_json())["event"]["full"]
+
+    await hass.services.async_call(
+        DOMAIN, "set_schedule", {"hour": "2030-01-01T00:00:00", "mode": MODE_BUY}, blocking=True
+    )
+    diff = (await client.receive_json())["event"]
+    assert diff["schedule"] == {"2030-01-01T00:00:00": MODE_BUY}